@@ -1,48 +1,57 @@
-/* global Papa, Plotly */
+/* global Plotly */
 
-function byNumericDesc(key) {
-  return (a, b) => (Number(b[key]) || 0) - (Number(a[key]) || 0);
+// Per-season bundles written by scripts/export_public_report.py. The manifest is tiny
+// and revalidated on every load; bundle names carry a content hash, so the browser can
+// keep them forever.
+const DATA_BASE = './data';
+
+let manifest = null;
+const bundles = new Map();
+
+async function fetchManifest() {
+  const res = await fetch(`${DATA_BASE}/manifest.json`, { cache: 'no-cache' });
+  if (!res.ok) throw new Error(`Failed to fetch manifest: ${res.status}`);
+  return res.json();
 }
 
-function pickColumn(rows, candidates) {
-  if (!rows?.length) return null;
-  const cols = Object.keys(rows[0]);
-  for (const c of candidates) {
-    const hit = cols.find(k => k.toLowerCase() === c.toLowerCase());
-    if (hit) return hit;
+async function fetchBundle(file) {
+  // Precompressed copy first (a fraction of the bytes on hosts that do not gzip JSON).
+  if (typeof DecompressionStream !== 'undefined') {
+    try {
+      const res = await fetch(`${DATA_BASE}/${file}.gz`, { cache: 'force-cache' });
+      if (res.ok) {
+        const stream = res.body.pipeThrough(new DecompressionStream('gzip'));
+        return JSON.parse(await new Response(stream).text());
+      }
+    } catch (err) {
+      console.warn('Falling back to the uncompressed bundle:', err);
+    }
   }
-  return null;
+  const res = await fetch(`${DATA_BASE}/${file}`, { cache: 'force-cache' });
+  if (!res.ok) throw new Error(`Failed to fetch ${file}: ${res.status}`);
+  return res.json();
 }
 
-async function fetchCsv(path) {
-  const res = await fetch(path, { cache: 'no-store' });
-  if (!res.ok) throw new Error(`Failed to fetch ${path}: ${res.status}`);
-  const text = await res.text();
-  const parsed = Papa.parse(text, { header: true, skipEmptyLines: true });
-  if (parsed.errors?.length) {
-    // Keep going but surface the first error.
-    console.warn('CSV parse warnings:', parsed.errors.slice(0, 3));
-  }
-  return parsed.data;
+// Columnar { col: [...] } -> array of row objects for the tables.
+function rowsOf(columns, names) {
+  const n = columns[names[0]]?.length ?? 0;
+  return Array.from({ length: n }, (_, i) => Object.fromEntries(names.map(c => [c, columns[c][i]])));
 }
 
 function renderTable(el, rows, columns) {
-  const thead = `<thead><tr>${columns.map(c => `<th>${c}</th>`).join('')}</tr></thead>`;
-  const tbody = `<tbody>${rows.map(r => `<tr>${columns.map(c => `<td>${r[c] ?? ''}</td>`).join('')}</tr>`).join('')}</tbody>`;
+  const thead = `<thead><tr>${columns.map(([, label]) => `<th>${label}</th>`).join('')}</tr></thead>`;
+  const tbody = `<tbody>${rows.map(r => `<tr>${columns.map(([c]) => `<td>${r[c] ?? ''}</td>`).join('')}</tr>`).join('')}</tbody>`;
   el.innerHTML = thead + tbody;
 }
 
-function renderBarChart(elId, rows, nameCol, pointsCol, title) {
-  const top = [...rows].sort(byNumericDesc(pointsCol)).slice(0, 10);
-  const x = top.map(r => r[nameCol]);
-  const y = top.map(r => Number(r[pointsCol]) || 0);
-
+function renderBarChart(elId, names, points, title) {
+  // Bundles are sorted by standings position, so the top 10 are the first 10.
   const data = [{
     type: 'bar',
-    x,
-    y,
+    x: names.slice(0, 10),
+    y: points.slice(0, 10),
     marker: { color: '#7aa2ff' },
-    hovertemplate: `%{x}<br>${pointsCol}: %{y}<extra></extra>`,
+    hovertemplate: '%{x}<br>points: %{y}<extra></extra>',
   }];
 
   const layout = {
@@ -62,54 +71,46 @@ async function loadSeason(season) {
   const metaEl = document.getElementById('dataMeta');
   metaEl.textContent = 'Loading…';
 
-  // Public-site data source: read directly from the repo's mycsv/ folder.
-  // This avoids copying CSVs into docs/ for manual refresh.
-  const RAW_BASE = 'https://raw.githubusercontent.com/venholm-den/f1-fantasy-optimizer/main/mycsv';
-
-  const driverPath = `${RAW_BASE}/f1_official_driver_standings/f1_official_driver_standings${season}.csv`;
-  const constructorPath = `${RAW_BASE}/f1_official_constructor_standings/f1_official_constructor_standings${season}.csv`;
-
-  const [drivers, constructors] = await Promise.all([
-    fetchCsv(driverPath),
-    fetchCsv(constructorPath),
-  ]);
-
-  const driverNameCol = pickColumn(drivers, ['driver_name', 'driver', 'name', 'driverName', 'full_name']);
-  const driverPointsCol = pickColumn(drivers, ['points', 'pts', 'total_points']);
-  const constructorNameCol = pickColumn(constructors, ['constructor_name', 'constructor', 'team', 'name']);
-  const constructorPointsCol = pickColumn(constructors, ['points', 'pts', 'total_points']);
-
-  if (!driverNameCol || !driverPointsCol) {
-    throw new Error(`Unexpected driver standings columns. Found: ${drivers.length ? Object.keys(drivers[0]).join(', ') : '(none)'}`);
-  }
-  if (!constructorNameCol || !constructorPointsCol) {
-    throw new Error(`Unexpected constructor standings columns. Found: ${constructors.length ? Object.keys(constructors[0]).join(', ') : '(none)'}`);
-  }
-
-  // Charts
-  renderBarChart('driverChart', drivers, driverNameCol, driverPointsCol, 'Top 10 drivers');
-  renderBarChart('constructorChart', constructors, constructorNameCol, constructorPointsCol, 'Top 10 constructors');
-
-  // Tables
-  const driverTable = document.getElementById('driverTable');
-  const constructorTable = document.getElementById('constructorTable');
-
-  const driverCols = [driverNameCol, driverPointsCol, ...Object.keys(drivers[0]).filter(c => ![driverNameCol, driverPointsCol].includes(c))];
-  const constructorCols = [constructorNameCol, constructorPointsCol, ...Object.keys(constructors[0]).filter(c => ![constructorNameCol, constructorPointsCol].includes(c))];
-
-  renderTable(driverTable, drivers.sort(byNumericDesc(driverPointsCol)), driverCols);
-  renderTable(constructorTable, constructors.sort(byNumericDesc(constructorPointsCol)), constructorCols);
+  const entry = manifest.seasons?.[season];
+  if (!entry) throw new Error(`No exported data for season ${season}`);
+  if (!bundles.has(entry.file)) bundles.set(entry.file, await fetchBundle(entry.file));
+  const { drivers, constructors, round, raceName } = bundles.get(entry.file);
+
+  renderBarChart('driverChart', drivers.name, drivers.points, 'Top 10 drivers');
+  renderBarChart('constructorChart', constructors.name, constructors.points, 'Top 10 constructors');
+
+  renderTable(
+    document.getElementById('driverTable'),
+    rowsOf(drivers, ['position', 'name', 'code', 'team', 'points', 'wins']),
+    [['position', 'Pos'], ['name', 'Driver'], ['code', 'Code'], ['team', 'Team'], ['points', 'Points'], ['wins', 'Wins']],
+  );
+  renderTable(
+    document.getElementById('constructorTable'),
+    rowsOf(constructors, ['position', 'name', 'code', 'points', 'wins']),
+    [['position', 'Pos'], ['name', 'Constructor'], ['code', 'Code'], ['points', 'Points'], ['wins', 'Wins']],
+  );
+
+  metaEl.textContent = `Season ${season} • after round ${round} (${raceName}) • ${drivers.name.length} drivers, ${constructors.name.length} constructors`;
+}
 
-  const now = new Date();
-  metaEl.textContent = `Season ${season} • Loaded ${drivers.length} drivers, ${constructors.length} constructors • ${now.toISOString()}`;
+function fillSeasons(select) {
+  const seasons = Object.keys(manifest.seasons || {}).sort();
+  if (!seasons.length) return;
+  const current = select.value;
+  select.innerHTML = seasons.map(s => `<option value="${s}">${s}</option>`).join('');
+  select.value = seasons.includes(current) ? current : seasons[seasons.length - 1];
 }
 
 function init() {
   const seasonSelect = document.getElementById('seasonSelect');
   const reloadBtn = document.getElementById('reloadBtn');
 
-  async function go() {
+  async function go(refreshManifest = false) {
     try {
+      if (!manifest || refreshManifest) {
+        manifest = await fetchManifest();
+        fillSeasons(seasonSelect);
+      }
       await loadSeason(seasonSelect.value);
     } catch (err) {
       console.error(err);
@@ -117,8 +118,8 @@ function init() {
     }
   }
 
-  reloadBtn.addEventListener('click', go);
-  seasonSelect.addEventListener('change', go);
+  reloadBtn.addEventListener('click', () => go(true));
+  seasonSelect.addEventListener('change', () => go());
   go();
 }
 
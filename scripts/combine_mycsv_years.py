@@ -14,10 +14,22 @@ This script will concatenate those into:
 
 It keeps the existing per-year files (safe) and writes the combined file.
 
+Incremental mode:
+- A manifest (`mycsv/.combine_manifest.json`) records size, mtime and sha256
+  of every input and of the combined output.
+- Tables whose year files are unchanged are skipped.
+- If only the newest year file grew (rows appended) or a new year file was
+  added after the others, the new rows are appended to the combined file.
+- Anything else triggers a full rebuild of that table.
+- Table folders are processed concurrently (`--jobs`).
+
+The combined bytes are identical to a full rebuild either way.
+
 Usage:
   python scripts/combine_mycsv_years.py
   python scripts/combine_mycsv_years.py --dry-run
   python scripts/combine_mycsv_years.py --table f1_official_driver_standings
+  python scripts/combine_mycsv_years.py --force
 
 Notes:
 - Assumes all year files for a table share the same header.
@@ -28,12 +40,20 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import io
+import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable
 
 YEAR_SUFFIX_RE = re.compile(r"^(?P<base>.+?)(?P<year>20\d\d)\.csv$", re.IGNORECASE)
 
+MANIFEST_NAME = ".combine_manifest.json"
+MANIFEST_VERSION = 1
+
 
 def iter_year_files(table_dir: Path) -> list[Path]:
     files: list[tuple[int, Path]] = []
@@ -48,28 +68,88 @@ def iter_year_files(table_dir: Path) -> list[Path]:
 
 
 def read_header(path: Path) -> list[str]:
+    """Header row of a CSV; [] for an empty file."""
     # Handle possible UTF-8 BOM.
     with path.open("r", encoding="utf-8-sig", newline="") as f:
         reader = csv.reader(f)
-        return next(reader)
+        return next(reader, [])
+
+
+def first_header(paths: Iterable[Path]) -> list[str]:
+    """Header of the first non-empty input (empty year files are skipped)."""
+    return next((h for h in map(read_header, paths) if h), [])
+
+
+def sha256_file(path: Path, *, limit: int | None = None) -> str:
+    """Hash a file (or only its first `limit` bytes)."""
+    h = hashlib.sha256()
+    remaining = limit
+    with path.open("rb") as f:
+        while remaining is None or remaining > 0:
+            size = 1 << 20 if remaining is None else min(1 << 20, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def file_state(path: Path, previous: dict | None = None) -> dict:
+    """Return {name,size,mtime_ns,sha256,ends_with_newline} for a file.
+
+    The hash is reused from `previous` when size and mtime are unchanged, so an
+    untouched tree costs one stat() per file.
+    """
+    st = path.stat()
+    if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        return dict(previous, name=path.name)
+
+    with path.open("rb") as f:
+        if st.st_size:
+            f.seek(-1, os.SEEK_END)
+            ends_with_newline = f.read(1) in (b"\n", b"\r")
+        else:
+            ends_with_newline = False
+    return {
+        "name": path.name,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha256_file(path),
+        "ends_with_newline": ends_with_newline,
+    }
+
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("tables") or {}
+
+
+def save_manifest(path: Path, tables: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "tables": tables}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _copy_rows(reader: Iterable[list[str]], writer) -> None:
+    for row in reader:
+        writer.writerow(row)
 
 
 def write_combined(out_path: Path, inputs: Iterable[Path], *, dry_run: bool) -> int:
+    """Full rebuild: read every input exactly once and write atomically."""
     inputs = list(inputs)
     if not inputs:
         return 0
 
-    header0 = read_header(inputs[0])
-    for p in inputs[1:]:
-        h = read_header(p)
-        if h != header0:
-            raise SystemExit(
-                "Header mismatch while combining:\n"
-                f"  - {inputs[0].name}: {header0}\n"
-                f"  - {p.name}: {h}\n"
-                "Fix the exports or keep them separate."
-            )
-
     if dry_run:
         print(f"[dry-run] Would write {out_path} from {len(inputs)} files")
         for p in inputs:
@@ -77,29 +157,169 @@ def write_combined(out_path: Path, inputs: Iterable[Path], *, dry_run: bool) ->
         return 0
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8", newline="") as out_f:
-        writer = csv.writer(out_f)
-        writer.writerow(header0)
-
-        for p in inputs:
-            with p.open("r", encoding="utf-8-sig", newline="") as in_f:
-                reader = csv.reader(in_f)
-                # skip header
-                try:
-                    next(reader)
-                except StopIteration:
-                    continue
-                for row in reader:
-                    writer.writerow(row)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    header0: list[str] | None = None
+    first_name = ""
+    try:
+        with tmp.open("w", encoding="utf-8", newline="") as out_f:
+            writer = csv.writer(out_f)
+            for p in inputs:
+                # Handle possible UTF-8 BOM.
+                with p.open("r", encoding="utf-8-sig", newline="") as in_f:
+                    reader = csv.reader(in_f)
+                    try:
+                        h = next(reader)
+                    except StopIteration:
+                        continue  # empty year file
+                    if header0 is None:
+                        header0, first_name = h, p.name
+                        writer.writerow(header0)
+                    elif h != header0:
+                        raise SystemExit(
+                            "Header mismatch while combining:\n"
+                            f"  - {first_name}: {header0}\n"
+                            f"  - {p.name}: {h}\n"
+                            "Fix the exports or keep them separate."
+                        )
+                    _copy_rows(reader, writer)
+        os.replace(tmp, out_path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
 
     print(f"Wrote {out_path} ({len(inputs)} inputs)")
     return 0
 
 
+def append_combined(out_path: Path, sources: list[tuple[Path, int]], header0: list[str]) -> None:
+    """Append rows to an existing combined file.
+
+    `sources` is a list of (path, offset): rows are read from `offset` onwards,
+    or from after the header when offset is 0.
+    """
+    buf = io.StringIO(newline="")
+    writer = csv.writer(buf)
+    for p, offset in sources:
+        with p.open("rb") as f:
+            f.seek(offset)
+            text = f.read().decode("utf-8-sig" if offset == 0 else "utf-8")
+        reader = csv.reader(io.StringIO(text, newline=""))
+        if offset == 0:
+            h = next(reader, [])
+            if not h:
+                continue  # empty year file
+            if h != header0:
+                raise SystemExit(
+                    "Header mismatch while combining:\n"
+                    f"  - {out_path.name}: {header0}\n"
+                    f"  - {p.name}: {h}\n"
+                    "Fix the exports or keep them separate."
+                )
+        _copy_rows(reader, writer)
+
+    with out_path.open("a", encoding="utf-8", newline="") as out_f:
+        out_f.write(buf.getvalue())
+
+
+def plan_table(year_files: list[Path], out_path: Path, previous: dict | None) -> tuple[str, list[dict], list[tuple[Path, int]]]:
+    """Decide how to bring one combined table up to date.
+
+    Returns (action, input_states, append_sources) where action is one of
+    "skip", "append" or "rebuild".
+    """
+    prev_inputs = {i["name"]: i for i in (previous or {}).get("inputs") or []}
+    states = [file_state(p, prev_inputs.get(p.name)) for p in year_files]
+
+    if not previous or not out_path.exists():
+        return "rebuild", states, []
+
+    out_prev = previous.get("output") or {}
+    st = out_path.stat()
+    if st.st_size != out_prev.get("size") or st.st_mtime_ns != out_prev.get("mtime_ns"):
+        # Combined file was edited/replaced outside this script.
+        return "rebuild", states, []
+
+    old = previous.get("inputs") or []
+    old_names = [i["name"] for i in old]
+    new_names = [s["name"] for s in states]
+    if new_names[: len(old_names)] != old_names:
+        return "rebuild", states, []
+
+    # Everything before the last previously-seen input must be untouched.
+    for o, s in zip(old[:-1], states[: len(old) - 1]):
+        if o["sha256"] != s["sha256"]:
+            return "rebuild", states, []
+
+    sources: list[tuple[Path, int]] = []
+    if old:
+        last_old, last_new = old[-1], states[len(old) - 1]
+        if last_old["sha256"] != last_new["sha256"]:
+            # Only allowed if the newest year file grew by whole rows.
+            path = year_files[len(old) - 1]
+            if (
+                last_new["size"] <= last_old["size"]
+                or not last_old.get("ends_with_newline")
+                or last_old["size"] == 0
+                or sha256_file(path, limit=last_old["size"]) != last_old["sha256"]
+            ):
+                return "rebuild", states, []
+            sources.append((path, last_old["size"]))
+
+    for p in year_files[len(old):]:
+        sources.append((p, 0))
+
+    return ("append" if sources else "skip"), states, sources
+
+
+def combine_table(table_dir: Path, previous: dict | None, *, dry_run: bool, force: bool) -> tuple[str, dict | None]:
+    """Bring one table folder up to date. Returns (action, manifest_entry)."""
+    if not table_dir.exists():
+        raise SystemExit(f"Table folder not found: {table_dir}")
+
+    year_files = iter_year_files(table_dir)
+    if not year_files:
+        return "empty", None
+
+    # Determine base name from first file
+    m = YEAR_SUFFIX_RE.match(year_files[0].name)
+    assert m
+    base = m.group("base")
+    out_path = table_dir / f"{base}.csv"
+
+    action, states, sources = plan_table(year_files, out_path, None if force else previous)
+
+    if dry_run:
+        if action == "append":
+            print(f"[dry-run] Would append to {out_path} from {len(sources)} files")
+            for p, off in sources:
+                print(f"  - {p.name} (from byte {off})")
+        elif action == "rebuild":
+            write_combined(out_path, year_files, dry_run=True)
+        else:
+            print(f"[dry-run] Up to date: {out_path}")
+        return action, previous
+
+    header0 = first_header(year_files)
+    if action == "append" and read_header(out_path) != header0:
+        action = "rebuild"  # the output has no header yet (every earlier input was empty)
+    if action == "rebuild":
+        write_combined(out_path, year_files, dry_run=False)
+    elif action == "append":
+        append_combined(out_path, sources, header0)
+        print(f"Appended to {out_path} ({len(sources)} inputs)")
+    else:
+        print(f"Up to date: {out_path}")
+
+    out_prev = (previous or {}).get("output") if action == "skip" else None
+    return action, {"output": file_state(out_path, out_prev), "inputs": states}
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--table", help="Optional: only combine one table folder under mycsv/")
     ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild every table")
+    ap.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1), help="Tables to process concurrently")
     args = ap.parse_args()
 
     repo_root = Path(__file__).resolve().parents[1]
@@ -113,22 +333,25 @@ def main() -> int:
         table_dirs = [mycsv_dir / args.table]
     else:
         table_dirs = [p for p in mycsv_dir.iterdir() if p.is_dir()]
-
-    for table_dir in sorted(table_dirs):
-        if not table_dir.exists():
-            raise SystemExit(f"Table folder not found: {table_dir}")
-
-        year_files = iter_year_files(table_dir)
-        if not year_files:
-            continue
-
-        # Determine base name from first file
-        m = YEAR_SUFFIX_RE.match(year_files[0].name)
-        assert m
-        base = m.group("base")
-        out_path = table_dir / f"{base}.csv"
-
-        write_combined(out_path, year_files, dry_run=args.dry_run)
+    table_dirs.sort()
+
+    manifest_path = mycsv_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {
+            td.name: pool.submit(combine_table, td, manifest.get(td.name), dry_run=args.dry_run, force=args.force)
+            for td in table_dirs
+        }
+        results = {name: fut.result() for name, fut in futures.items()}
+
+    if not args.dry_run:
+        for name, (_, entry) in results.items():
+            if entry is None:
+                manifest.pop(name, None)
+            else:
+                manifest[name] = entry
+        save_manifest(manifest_path, manifest)
 
     return 0
 
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
-"""Copy season exports into docs/ so GitHub Pages can serve them.
+"""Export season data for the GitHub Pages report (docs/).
 
 Usage:
   python scripts/export_public_report.py --season 2025
+  python scripts/export_public_report.py --season 2023 --season 2024 --season 2025
+  python scripts/export_public_report.py --season 2025 --csv   # also copy the raw CSVs
 
-It copies a handful of CSV files from:
+For each season it reads the official standings from:
   data/seasons/<season>/raw/
-into:
-  docs/data/<season>/
+and writes one pre-aggregated bundle with exactly what docs/app.js draws
+(final standings as columnar arrays, already sorted by position):
+  docs/data/<season>/report.<hash>.json      (compact JSON)
+  docs/data/<season>/report.<hash>.json.gz   (precompressed, byte-reproducible)
+plus docs/data/manifest.json, which maps each season to its current bundle.
+
+Bundle names contain a hash of their content, so they never change once
+published and can be cached indefinitely; only the small manifest needs to be
+revalidated. Older bundles of a season are removed when it is re-exported.
 
 This is meant for MANUAL refresh: run it after you update the raw data,
 then commit + push.
@@ -16,9 +25,18 @@ then commit + push.
 from __future__ import annotations
 
 import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
 import shutil
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+DOCS_DATA = ROOT / "docs" / "data"
+BUNDLE_VERSION = 1
+
 FILES = [
     "f1_official_driver_standings.csv",
     "f1_official_constructor_standings.csv",
@@ -29,41 +47,148 @@ FILES = [
 ]
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--season", default="2025")
-    args = ap.parse_args()
-
-    repo_root = Path(__file__).resolve().parents[1]
-    src_dir = repo_root / "data" / "seasons" / str(args.season) / "raw"
-    out_dir = repo_root / "docs" / "data" / str(args.season)
-
-    if not src_dir.exists():
-        raise SystemExit(f"Source directory not found: {src_dir}")
-
+def read_csv(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    # utf-8-sig: the official exports start with a BOM.
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _num(v):
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    return int(x) if x.is_integer() else x
+
+
+def _final(rows: list[dict]) -> tuple[int | None, str, list[dict]]:
+    """Rows of the last round in a cumulative standings table, sorted by position."""
+    rounds = [int(r["round"]) for r in rows if (r.get("round") or "").strip()]
+    if not rounds:
+        return None, "", []
+    last = max(rounds)
+    final = [r for r in rows if (r.get("round") or "").strip() and int(r["round"]) == last]
+    final.sort(key=lambda r: (_num(r.get("position")) or 999, r.get("driverAbbr") or r.get("constructorAbbr") or ""))
+    return last, (final[0].get("raceName") or "") if final else "", final
+
+
+def _column(rows: list[dict], key: str, *, number: bool = False) -> list:
+    return [_num(r.get(key)) if number else (r.get(key) or "").strip() for r in rows]
+
+
+def build_bundle(season: int, raw: Path) -> dict:
+    drivers_rows = read_csv(raw / "f1_official_driver_standings.csv")
+    constructors_rows = read_csv(raw / "f1_official_constructor_standings.csv")
+    if not drivers_rows and not constructors_rows:
+        raise SystemExit(f"No official standings in {raw} (run: python -m src.ergast_points --season {season})")
+
+    d_round, d_race, drivers = _final(drivers_rows)
+    c_round, c_race, constructors = _final(constructors_rows)
+    return {
+        "version": BUNDLE_VERSION,
+        "season": season,
+        "round": max(r for r in (d_round, c_round) if r is not None),
+        "raceName": d_race or c_race,
+        "drivers": {
+            "position": _column(drivers, "position", number=True),
+            "code": _column(drivers, "driverAbbr"),
+            "name": [f"{r.get('driver_givenName') or ''} {r.get('driver_familyName') or ''}".strip() for r in drivers],
+            "team": _column(drivers, "constructor_name"),
+            "points": _column(drivers, "points", number=True),
+            "wins": _column(drivers, "wins", number=True),
+        },
+        "constructors": {
+            "position": _column(constructors, "position", number=True),
+            "code": _column(constructors, "constructorAbbr"),
+            "name": _column(constructors, "constructor_name"),
+            "points": _column(constructors, "points", number=True),
+            "wins": _column(constructors, "wins", number=True),
+        },
+    }
+
+
+def write_bundle(season: int, bundle: dict, out_dir: Path) -> dict:
+    """Write report.<hash>.json(.gz) and drop older bundles; returns the manifest entry."""
+    body = json.dumps(bundle, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    name = f"report.{digest}.json"
     out_dir.mkdir(parents=True, exist_ok=True)
-
-    copied = []
-    missing = []
+    for data, suffix in ((body, ""), (gzip.compress(body, compresslevel=9, mtime=0), ".gz")):
+        path = out_dir / (name + suffix)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    for old in out_dir.glob("report.*.json*"):
+        if not old.name.startswith(name):
+            old.unlink()
+    return {
+        "file": f"{season}/{name}",
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "bytes": len(body),
+        "gzip_bytes": (out_dir / (name + ".gz")).stat().st_size,
+        "round": bundle["round"],
+    }
+
+
+def update_manifest(entries: dict[str, dict]) -> Path:
+    path = DOCS_DATA / "manifest.json"
+    manifest = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    seasons = manifest.get("seasons") or {}
+    seasons.update(entries)
+    manifest = {"version": BUNDLE_VERSION, "seasons": dict(sorted(seasons.items()))}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def copy_csvs(src_dir: Path, out_dir: Path) -> tuple[list[str], list[str]]:
+    copied, missing = [], []
     for name in FILES:
         src = src_dir / name
-        dst = out_dir / name
         if not src.exists():
             missing.append(name)
             continue
-        shutil.copyfile(src, dst)
+        shutil.copyfile(src, out_dir / name)
         copied.append(name)
+    return copied, missing
+
 
-    print(f"Exported season {args.season} to {out_dir}")
-    if copied:
-        print("Copied:")
-        for n in copied:
-            print(f"  - {n}")
-    if missing:
-        print("Missing (skipped):")
-        for n in missing:
-            print(f"  - {n}")
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", action="append", help="Season to export (repeatable, default 2025)")
+    ap.add_argument("--csv", action="store_true", help="Also copy the raw CSVs into docs/data/<season>/")
+    args = ap.parse_args()
 
+    entries = {}
+    for season in sorted({int(s) for s in (args.season or ["2025"])}):
+        src_dir = ROOT / "data" / "seasons" / str(season) / "raw"
+        out_dir = DOCS_DATA / str(season)
+        if not src_dir.exists():
+            raise SystemExit(f"Source directory not found: {src_dir}")
+
+        entry = write_bundle(season, build_bundle(season, src_dir), out_dir)
+        entries[str(season)] = entry
+        raw_bytes = sum((src_dir / n).stat().st_size for n in FILES[:2] if (src_dir / n).exists())
+        print(
+            f"Exported season {season} (round {entry['round']}) -> docs/data/{entry['file']}: "
+            f"{entry['bytes']} B, {entry['gzip_bytes']} B gzipped (standings CSVs: {raw_bytes} B)"
+        )
+
+        if args.csv:
+            copied, missing = copy_csvs(src_dir, out_dir)
+            if copied:
+                print("Copied:")
+                for n in copied:
+                    print(f"  - {n}")
+            if missing:
+                print("Missing (skipped):")
+                for n in missing:
+                    print(f"  - {n}")
+
+    print("Manifest:", update_manifest(entries))
     return 0
 
 
@@ -16,5 +16,6 @@ pip -q install requests
 python -m src.scrape_f1fantasytools --season "$SEASON"
 python -m src.dimensions --season "$SEASON"
 python -m src.ergast_schedule --season "$SEASON"
+python -m src.validate --season "$SEASON"
 
 echo "Done: refreshed season $SEASON"
@@ -0,0 +1,441 @@
+"""Anytime multi-round planner: the best plan found within a time budget, with its gap.
+
+A plan is one team per round over `horizon` rounds starting at `--round`. It is worth
+  sum over rounds of (team points + the DRS-boosted driver's points again)
+  - penalty x (transfers beyond the free ones, per round)
+where the boost goes to the team's best driver that round and a transfer is a held
+asset that is dropped (as in the constrained optimizer: held assets that are not
+priced that round cost nothing). Locks / exclusions apply to every round, a current
+team is the starting point of the first round's transfers and `max_transfers` caps
+every round. The search treats the cap as a soft wall (INFEASIBLE points per extra
+transfer); the returned plan is checked against it afterwards, and if no worker
+found a plan within the cap the planner raises ValueError. The wall never shows up
+in the reported score, gap or `penalty_points`, which only count the transfer penalty.
+
+What the planner may know:
+- rolling: the projection and prices of `--round` for the whole horizon
+- actual:  each round's real points and prices (hindsight, for backtests)
+
+Search: simulated annealing over the plan, one worker process per seed. Moves swap
+one asset for another over a run of rounds (the transfers inside the run do not
+change) or copy a neighbouring round's team. The incumbent lives in shared memory:
+workers publish improvements and restart from a better shared plan when they stall,
+and everyone stops once the incumbent reaches the bound.
+
+Bound: the sum of each round's exact best team (boost, locks and exclusions included,
+transfers ignored), found with the combination index. The same per-round teams seed
+the search, so with a one-round horizon and no current team the incumbent is optimal
+from the start (gap 0).
+
+Outputs (through the optimizer):
+- data/seasons/<season>/derived/team_recommendations.csv (the first round's team)
+- data/seasons/<season>/derived/team_plan.csv (one row per round)
+
+Usage:
+  python -m src.optimizer --season 2025 --round 10 --horizon 4 --time-budget-ms 2000 \
+      --current-drivers COL,STR,HUL,PIA,HAD --current-constructors MCL,WIL
+  python -m src.optimizer --season 2024 --round 5 --horizon 6 --projection actual --time-budget-ms 5000 --workers 4
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import optimizer as opt
+
+
+INFEASIBLE = 1000.0  # points per transfer over the cap: a soft wall the search climbs away from
+SYNC_EVERY = 2000  # iterations between looks at the shared incumbent
+STALL = 20000  # iterations without improvement before restarting from the incumbent
+TEAM = opt.N_DRIVERS + opt.N_CONSTRUCTORS
+
+PLAN_FIELDS = [
+    "season",
+    "round",
+    "drivers",
+    "constructors",
+    "drs_boost",
+    "total_price",
+    "expected_points",
+    "transfers",
+    "penalty_points",
+]
+
+
+@dataclass
+class PlanProblem:
+    """Per-round prices / points over the horizon, in `SeasonData` asset positions."""
+
+    season: int
+    rounds: list[int]
+    ids: list[str]
+    is_driver: np.ndarray
+    price: np.ndarray  # int [H, A]; -1 if not priced
+    points: np.ndarray  # float [H, A]
+    budget: int
+    free_transfers: int
+    penalty: float
+    max_transfers: int | None
+    lock: frozenset[int]
+    exclude: frozenset[int]
+    current: tuple[int, ...] | None
+
+    @classmethod
+    def build(
+        cls,
+        data: opt.SeasonData,
+        rnd: int,
+        *,
+        horizon: int,
+        window: int = 3,
+        mode: str = "rolling",
+        budget: int = opt.BUDGET,
+        constraints: opt.Constraints | None = None,
+        free_transfers: int = 2,
+        penalty: float = 10.0,
+    ) -> "PlanProblem":
+        start = data.round_index(rnd)
+        rounds = data.rounds[start : start + horizon]
+        if len(rounds) < horizon:
+            raise ValueError(f"Season {data.season} has only {len(rounds)} rounds from round {rnd}")
+        if mode == "actual":
+            price = data.price[start : start + horizon]
+            points = np.stack([opt.project(data, r, mode="actual") for r in rounds])
+        else:
+            price = np.tile(data.price[start], (horizon, 1))
+            points = np.tile(opt.project(data, rnd, window=window), (horizon, 1))
+
+        c = constraints or opt.Constraints()
+        lookup = {a: i for i, a in enumerate(data.ids)}
+        for i, ab in enumerate(data.abbr):
+            if data.price[start, i] >= 0:
+                lookup.setdefault(ab, i)
+
+        def positions(keys: list[str], what: str) -> frozenset[int]:
+            out = set()
+            for k in keys:
+                i = lookup.get(k.strip().upper())
+                if i is None:
+                    raise ValueError(f"Unknown {what} asset {k!r}")
+                out.add(i)
+            return frozenset(out)
+
+        lock, exclude = positions(c.lock, "locked"), positions(c.exclude, "excluded")
+        if lock & exclude:
+            raise ValueError("Assets both locked and excluded: " + ", ".join(data.ids[i] for i in sorted(lock & exclude)))
+        for i in lock:
+            if (price[:, i] < 0).any():
+                raise ValueError(f"Locked asset {data.ids[i]} is not priced in every round of the horizon")
+        current = positions(c.drivers + c.constructors, "current")
+        return cls(
+            season=data.season,
+            rounds=rounds,
+            ids=data.ids,
+            is_driver=data.is_driver,
+            price=price.astype(np.int64),
+            points=np.nan_to_num(points, nan=0.0),
+            budget=budget,
+            free_transfers=free_transfers,
+            penalty=penalty,
+            max_transfers=c.max_transfers,
+            lock=lock,
+            exclude=exclude,
+            current=tuple(sorted(current)) if current else None,
+        )
+
+    @property
+    def horizon(self) -> int:
+        return len(self.rounds)
+
+    def round_pool(self, h: int) -> opt.Pool:
+        avail = [a for a in np.flatnonzero(self.price[h] >= 0) if a not in self.exclude]
+        return opt.Pool(
+            ids=[self.ids[a] for a in avail],
+            abbr=[self.ids[a] for a in avail],
+            is_driver=self.is_driver[avail],
+            price=self.price[h, avail].astype(np.int32),
+            points=self.points[h, avail],
+        )
+
+    def best_round_team(self, h: int) -> tuple[float, tuple[int, ...] | None]:
+        """Exact best single-round team with the boost and locks: (value, team)."""
+        pool = self.round_pool(h)
+        if len(pool.drivers) < opt.N_DRIVERS or len(pool.constructors) < opt.N_CONSTRUCTORS:
+            return -math.inf, None
+        index = opt.ComboIndex.build(pool)
+        d_points = index.driver_points(pool.points, opt.BOOSTS["2x"])
+        c_points = index.constructor_points(pool.points)
+        position = {a: i for i, a in enumerate(self.ids)}
+        locked = np.array([position[a] in self.lock for a in pool.ids])
+        d_need, c_need = locked[pool.drivers].sum(), locked[pool.constructors].sum()
+        d_points[locked[index.d_combo].sum(axis=1) < d_need] = -np.inf
+        c_points[locked[index.c_combo].sum(axis=1) < c_need] = -np.inf
+        total = opt.score_driver_sets(index, d_points, c_points, self.budget)
+        rows = opt.top_rows(total, 1)
+        if not len(rows):
+            return -math.inf, None
+        t = opt.teams_for_rows(pool, index, rows, total, c_points, self.budget)[0]
+        return t.points, _team([position[a] for a in t.drivers], [position[a] for a in t.constructors])
+
+    def bound(self) -> tuple[float, list[tuple[int, ...] | None]]:
+        """Upper bound (sum of the per-round optima) and those per-round teams."""
+        cache: dict[bytes, tuple[float, tuple[int, ...] | None]] = {}
+        total, teams = 0.0, []
+        for h in range(self.horizon):
+            key = self.price[h].tobytes() + self.points[h].tobytes()
+            if key not in cache:
+                cache[key] = self.best_round_team(h)
+            value, team = cache[key]
+            total += value
+            teams.append(team)
+        return total, teams
+
+
+def _team(drivers, constructors) -> tuple[int, ...]:
+    return tuple(sorted(drivers)) + tuple(sorted(constructors))
+
+
+class Search:
+    """Plain-Python state for one annealing run (tuples and lists beat NumPy at this size)."""
+
+    def __init__(self, problem: PlanProblem, seed: int):
+        self.p = problem
+        self.rng = random.Random(seed)
+        self.h = problem.horizon
+        self.price = problem.price.tolist()
+        self.points = problem.points.tolist()
+        self.avail = [
+            [
+                [a for a in np.flatnonzero(problem.price[h] >= 0).tolist() if a not in problem.exclude and problem.is_driver[a] == kind]
+                for kind in (True, False)
+            ]
+            for h in range(self.h)
+        ]
+
+    def value(self, h: int, team: tuple[int, ...]) -> float:
+        pts = self.points[h]
+        return sum(pts[a] for a in team) + max(pts[a] for a in team[: opt.N_DRIVERS])
+
+    def transfers(self, h: int, plan: list[tuple[int, ...]]) -> int:
+        prev = plan[h - 1] if h else self.p.current
+        if prev is None:
+            return 0
+        price, team = self.price[h], plan[h]
+        return sum(1 for a in prev if price[a] >= 0 and a not in team)
+
+    def penalty(self, h: int, plan: list[tuple[int, ...]]) -> float:
+        """Points lost to transfers beyond the free ones in round h."""
+        return self.p.penalty * max(0, self.transfers(h, plan) - self.p.free_transfers)
+
+    def over_cap(self, plan: list[tuple[int, ...]]) -> list[int]:
+        """Rounds (horizon positions) whose transfers exceed `max_transfers`."""
+        cap = self.p.max_transfers
+        return [] if cap is None else [h for h in range(self.h) if self.transfers(h, plan) > cap]
+
+    def cost(self, h: int, plan: list[tuple[int, ...]]) -> float:
+        """Transfer penalty plus the soft wall for transfers over the cap (search objective only)."""
+        if h >= self.h:
+            return 0.0
+        out = self.penalty(h, plan)
+        if self.p.max_transfers is not None:
+            out += INFEASIBLE * max(0, self.transfers(h, plan) - self.p.max_transfers)
+        return out
+
+    def score(self, plan: list[tuple[int, ...]]) -> float:
+        return sum(self.value(h, plan[h]) - self.cost(h, plan) for h in range(self.h))
+
+    def net(self, plan: list[tuple[int, ...]]) -> float:
+        """Plan points minus transfer penalties, without the soft wall (what gets reported)."""
+        return sum(self.value(h, plan[h]) - self.penalty(h, plan) for h in range(self.h))
+
+    def fits(self, h: int, team: tuple[int, ...]) -> bool:
+        price = self.price[h]
+        return all(price[a] >= 0 for a in team) and sum(price[a] for a in team) <= self.p.budget
+
+    def propose(self, plan: list[tuple[int, ...]]) -> tuple[int, list[tuple[int, ...]]] | None:
+        """(first round changed, new teams from there) or None if the move is not valid."""
+        rng, h = self.rng, self.rng.randrange(self.h)
+        team = plan[h]
+        if rng.random() < 0.15 and self.h > 1:
+            src = h - 1 if h and (h == self.h - 1 or rng.random() < 0.5) else h + 1
+            if plan[src] == team or not self.fits(h, plan[src]):
+                return None
+            return h, [plan[src]]
+
+        k = rng.randrange(TEAM)
+        out = team[k]
+        if out in self.p.lock:
+            return None
+        choices = self.avail[h][0 if k < opt.N_DRIVERS else 1]
+        inn = choices[rng.randrange(len(choices))]
+        if inn in team:
+            return None
+        end = h if rng.random() < 0.5 else rng.randrange(h, self.h)
+        new = []
+        for t in range(h, end + 1):
+            cur = plan[t]
+            if out not in cur or inn in cur or self.price[t][inn] < 0:
+                break
+            nt = tuple(inn if a == out else a for a in cur)
+            nt = _team(nt[: opt.N_DRIVERS], nt[opt.N_DRIVERS :])
+            if not self.fits(t, nt):
+                break
+            new.append(nt)
+        return (h, new) if new else None
+
+    def delta(self, plan: list[tuple[int, ...]], h: int, new: list[tuple[int, ...]]) -> float:
+        end = h + len(new)
+        before = sum(self.value(t, plan[t]) for t in range(h, end)) - self.cost(h, plan) - self.cost(end, plan)
+        saved = plan[h:end]
+        plan[h:end] = new
+        after = sum(self.value(t, plan[t]) for t in range(h, end)) - self.cost(h, plan) - self.cost(end, plan)
+        plan[h:end] = saved
+        return after - before
+
+
+# Shared incumbent: (score, flattened plan), set up per worker process.
+_SHARED: dict = {}
+
+
+def _init_shared(best, plan, lock) -> None:
+    _SHARED.update(best=best, plan=plan, lock=lock)
+
+
+def _publish(score: float, plan: list[tuple[int, ...]]) -> None:
+    with _SHARED["lock"]:
+        if score > _SHARED["best"].value:
+            _SHARED["best"].value = score
+            _SHARED["plan"][:] = [a for team in plan for a in team]
+
+
+def _shared() -> tuple[float, list[tuple[int, ...]]]:
+    with _SHARED["lock"]:
+        flat = list(_SHARED["plan"])
+        return _SHARED["best"].value, [tuple(flat[i : i + TEAM]) for i in range(0, len(flat), TEAM)]
+
+
+def run_worker(
+    problem: PlanProblem, start: list[tuple[int, ...]], seed: int, deadline: float, bound: float
+) -> tuple[float, list[tuple[int, ...]], int]:
+    """Anneal from `start` until `deadline` (time.monotonic) or the bound is reached."""
+    s = Search(problem, seed)
+    plan = list(start)
+    cur = best = s.score(plan)
+    best_plan = list(plan)
+    _publish(best, best_plan)
+    began, it, last_gain = time.monotonic(), 0, 0
+    span = max(deadline - began, 1e-3)
+    temp = 2.05
+    while True:
+        it += 1
+        if it % SYNC_EVERY == 0:
+            now = time.monotonic()
+            shared, shared_plan = _shared()
+            if now >= deadline or shared >= bound - 1e-9:
+                break
+            if it - last_gain > STALL:
+                # Stalled: continue from the better of our own best and the shared incumbent.
+                plan, cur = (list(shared_plan), shared) if shared > best else (list(best_plan), best)
+                last_gain = it
+            temp = 2.0 * max(0.0, 1 - (now - began) / span) + 0.05
+        move = s.propose(plan)
+        if move is None:
+            continue
+        h, new = move
+        d = s.delta(plan, h, new)
+        if d >= 0 or s.rng.random() < math.exp(d / temp):
+            plan[h : h + len(new)] = new
+            cur += d
+            if cur > best + 1e-9:
+                best, best_plan, last_gain = cur, list(plan), it
+                _publish(best, best_plan)
+    best = s.score(best_plan)  # re-add from scratch, free of accumulated rounding
+    return best, best_plan, it
+
+
+def _starts(problem: PlanProblem, teams: list[tuple[int, ...] | None], workers: int) -> list[list[tuple[int, ...]]]:
+    """Per-round optima; every other worker instead holds the first round's team where it fits."""
+    if any(t is None for t in teams):
+        raise ValueError("No team satisfies the constraints in some round of the horizon")
+    starts = []
+    s = Search(problem, 0)
+    for w in range(workers):
+        plan = list(teams)
+        if w % 2 == 1:
+            plan = [teams[0] if s.fits(h, teams[0]) else teams[h] for h in range(problem.horizon)]
+        starts.append(plan)
+    return starts
+
+
+@dataclass
+class PlanResult:
+    score: float
+    bound: float
+    plan: list[tuple[int, ...]]
+    iterations: int
+    workers: int
+    elapsed_ms: float
+
+    @property
+    def gap(self) -> float:
+        return max(self.bound - self.score, 0.0)
+
+
+def solve_anytime(problem: PlanProblem, *, time_budget_ms: int, workers: int = 1, seed: int = 0) -> PlanResult:
+    t0 = time.monotonic()
+    bound, teams = problem.bound()
+    starts = _starts(problem, teams, workers)
+    deadline = t0 + time_budget_ms / 1000
+    best, plan, lock = mp.Value("d", -math.inf, lock=False), mp.Array("i", problem.horizon * TEAM, lock=False), mp.Lock()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_shared, initargs=(best, plan, lock)) as ex:
+            futures = [ex.submit(run_worker, problem, starts[w], seed + w, deadline, bound) for w in range(workers)]
+            results = [f.result() for f in futures]
+    else:
+        _init_shared(best, plan, lock)
+        results = [run_worker(problem, starts[0], seed, deadline, bound)]
+    s = Search(problem, 0)
+    feasible = [r for r in results if not s.over_cap(r[1])]
+    if not feasible:
+        raise ValueError(
+            f"No plan with at most {problem.max_transfers} transfer(s) per round found in {time_budget_ms} ms "
+            "(the current team may be over budget, or the time budget too short)"
+        )
+    _, best_plan, _ = max(feasible, key=lambda r: r[0])
+    return PlanResult(
+        score=s.net(best_plan),
+        bound=bound,
+        plan=best_plan,
+        iterations=sum(r[2] for r in results),
+        workers=workers,
+        elapsed_ms=(time.monotonic() - t0) * 1000,
+    )
+
+
+def plan_rows(problem: PlanProblem, result: PlanResult) -> list[dict]:
+    s = Search(problem, 0)
+    rows = []
+    for h, team in enumerate(result.plan):
+        drivers, constructors = team[: opt.N_DRIVERS], team[opt.N_DRIVERS :]
+        boost = max(drivers, key=lambda a: s.points[h][a])
+        rows.append(
+            {
+                "season": problem.season,
+                "round": problem.rounds[h],
+                "drivers": "|".join(problem.ids[a] for a in drivers),
+                "constructors": "|".join(problem.ids[a] for a in constructors),
+                "drs_boost": problem.ids[boost],
+                "total_price": f"{sum(s.price[h][a] for a in team) / 10:.1f}",
+                "expected_points": f"{s.value(h, team):.2f}",
+                "transfers": s.transfers(h, result.plan),
+                "penalty_points": f"{s.penalty(h, result.plan):g}",
+            }
+        )
+    return rows
@@ -0,0 +1,371 @@
+"""Backtest a team-selection strategy over historical seasons.
+
+Replays a strategy round by round against the real f1fantasytools `price` and
+`totalPoints` series:
+
+- round 1: best team under the starting budget (100M)
+- every later round: team value = bank + current prices of the held assets;
+  pick the best team (by the strategy's projection) reachable with the allowed
+  transfers and affordable with that value, then score it with the round's real points.
+
+Strategy knobs (`Strategy`):
+- window / projection: rolling mean of the previous `window` rounds (or `actual`, the
+  hindsight upper bound)
+- transfers: free transfers per round
+- extra_transfers / penalty: additional transfers allowed per round, each costing
+  `penalty` points (deducted from both the projection and the realized score)
+
+Scoring is batched: all driver 5-sets and constructor pairs of the season are
+enumerated once (`SeasonIndex`) with their per-round price / projection sums, and each
+round is a few NumPy passes over them (transfer counts, a searchsorted per
+constructor-change level). Once the index is built a season replays in a few tens of
+milliseconds, and many strategies can share one index.
+
+Held assets that disappear from the price list (e.g. a replaced driver) are sold at
+their last known price and their replacement does not use up a transfer.
+
+Outputs:
+- outputs/backtest/backtest_rounds.csv   (one row per strategy x season x round)
+- outputs/backtest/backtest_summary.csv  (one row per strategy x season)
+
+Usage:
+  python -m src.backtest --season 2023 --season 2024 --season 2025
+  python -m src.backtest --season 2025 --window 5 --transfers 2 --extra-transfers 1 --penalty 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from . import optimizer as opt
+from .dimensions import write_csv
+
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "outputs" / "backtest"
+
+ROUND_FIELDS = [
+    "strategy",
+    "season",
+    "round",
+    "drivers",
+    "constructors",
+    "team_value",
+    "team_price",
+    "bank",
+    "transfers",
+    "transfers_in",
+    "transfers_out",
+    "penalty_points",
+    "projected_points",
+    "points",
+    "cumulative_points",
+]
+
+SUMMARY_FIELDS = [
+    "strategy",
+    "season",
+    "rounds",
+    "total_points",
+    "avg_points",
+    "transfers",
+    "penalty_points",
+    "start_value",
+    "final_value",
+    "elapsed_ms",
+]
+
+
+@dataclass(frozen=True)
+class Strategy:
+    window: int = 3
+    projection: str = "rolling"
+    transfers: int = 1
+    extra_transfers: int = 0
+    penalty: float = 10.0
+    budget: int = opt.BUDGET  # starting budget, tenths
+
+    @property
+    def name(self) -> str:
+        s = f"{self.projection}{self.window if self.projection == 'rolling' else ''}_t{self.transfers}"
+        if self.extra_transfers:
+            s += f"+{self.extra_transfers}p{self.penalty:g}"
+        if self.budget != opt.BUDGET:
+            s += f"_b{self.budget / 10:g}"
+        return s
+
+
+def _combo_sums(values: np.ndarray, combo: np.ndarray) -> np.ndarray:
+    """values[..., combo].sum(-1), one column at a time (faster than a reduce over a length-5 axis)."""
+    out = values[..., combo[:, 0]].copy()
+    for j in range(1, combo.shape[1]):
+        out += values[..., combo[:, j]]
+    return out
+
+
+@dataclass
+class SeasonIndex:
+    """Season-wide combination index (positions into `data.ids`) with per-round sums.
+
+    Prices and availability do not depend on the strategy, so they are summed for every
+    (round, combination) once; projected-point sums are cached per (window, projection).
+    """
+
+    data: opt.SeasonData
+    d_combo: np.ndarray  # int [Nd, 5]
+    c_combo: np.ndarray  # int [Nc, 2]
+    d_price: np.ndarray  # int [R, Nd]
+    c_price: np.ndarray  # int [R, Nc]
+    d_ok: np.ndarray  # bool [R, Nd], every member priced that round
+    c_ok: np.ndarray  # bool [R, Nc]
+    actual: np.ndarray  # float [R, A], real points with nan -> 0
+    _points: dict[tuple[int, str], tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, data: opt.SeasonData) -> "SeasonIndex":
+        d_combo = np.array(list(itertools.combinations(np.flatnonzero(data.is_driver), opt.N_DRIVERS)), dtype=np.int32)
+        c_combo = np.array(list(itertools.combinations(np.flatnonzero(~data.is_driver), opt.N_CONSTRUCTORS)), dtype=np.int32)
+        price = data.price.astype(np.int64)
+        missing = (data.price < 0).astype(np.int8)
+        return cls(
+            data=data,
+            d_combo=d_combo,
+            c_combo=c_combo,
+            d_price=_combo_sums(price, d_combo),
+            c_price=_combo_sums(price, c_combo),
+            d_ok=_combo_sums(missing, d_combo) == 0,
+            c_ok=_combo_sums(missing, c_combo) == 0,
+            actual=np.nan_to_num(data.points, nan=0.0),
+        )
+
+    def points(self, window: int, mode: str) -> tuple[np.ndarray, np.ndarray]:
+        """Projected points per (round, driver set) and (round, constructor pair)."""
+        key = (window, mode)
+        if key not in self._points:
+            proj = np.stack([opt.project(self.data, rnd, window=window, mode=mode) for rnd in self.data.rounds])
+            self._points[key] = (_combo_sums(proj, self.d_combo), _combo_sums(proj, self.c_combo))
+        return self._points[key]
+
+
+@dataclass
+class RoundResult:
+    round: int
+    drivers: list[str]
+    constructors: list[str]
+    team_value: int  # tenths, budget available this round
+    team_price: int  # tenths
+    transfers: int
+    transfers_in: list[str]
+    transfers_out: list[str]
+    penalty_points: float
+    projected_points: float
+    points: float
+
+
+@dataclass
+class BacktestResult:
+    strategy: Strategy
+    season: int
+    rounds: list[RoundResult]
+    elapsed_ms: float
+
+    @property
+    def total_points(self) -> float:
+        return float(sum(r.points for r in self.rounds))
+
+    @property
+    def transfers(self) -> int:
+        return sum(r.transfers for r in self.rounds[1:])
+
+
+def _best_pairs(c_price: np.ndarray, c_points: np.ndarray, mask: np.ndarray):
+    """best_constructors_under restricted to `mask`; pair indices map back to the full array."""
+    sel = np.flatnonzero(mask)
+    if not len(sel):
+        return None
+    sp, best, pair = opt.best_constructors_under(c_price[sel], c_points[sel])
+    return sp, best, sel[pair]
+
+
+def run_backtest(index: SeasonIndex, strategy: Strategy) -> BacktestResult:
+    t0 = time.perf_counter()
+    data = index.data
+    d_points, c_points = index.points(strategy.window, strategy.projection)
+    d_combo, c_combo = index.d_combo, index.c_combo
+    n_assets = len(data.ids)
+    squad = opt.N_DRIVERS + opt.N_CONSTRUCTORS
+
+    held: np.ndarray | None = None  # bool [A]
+    last_price = np.zeros(n_assets, dtype=np.int64)
+    bank = strategy.budget
+    results: list[RoundResult] = []
+
+    for ri, rnd in enumerate(data.rounds):
+        price = data.price[ri].astype(np.int64)
+        avail = price >= 0
+        last_price = np.where(avail, price, last_price)
+
+        if held is None:
+            value, free, cap = bank, squad, squad
+            d_moves = np.full(len(d_combo), opt.N_DRIVERS)
+            c_moves = np.full(len(c_combo), opt.N_CONSTRUCTORS)
+        else:
+            value = bank + int(last_price[held].sum())
+            free = strategy.transfers + int((held & ~avail).sum())
+            cap = free + strategy.extra_transfers
+            kept = held.astype(np.int8)
+            d_moves = opt.N_DRIVERS - _combo_sums(kept, d_combo)
+            c_moves = opt.N_CONSTRUCTORS - _combo_sums(kept, c_combo)
+
+        # Only driver sets reachable within the transfer cap (a few hundred for 1-2 transfers).
+        rows = np.flatnonzero(index.d_ok[ri] & (d_moves <= cap))
+        d_price, d_pts, moves_d = index.d_price[ri, rows], d_points[ri, rows], d_moves[rows]
+
+        # Best score per driver set, over the constructor-change levels 0..2.
+        total = np.full(len(rows), -np.inf)
+        pair_of = np.full(len(rows), -1)
+        moves_of = np.zeros(len(rows), dtype=np.int64)
+        for cm in range(opt.N_CONSTRUCTORS + 1):
+            table = _best_pairs(index.c_price[ri], c_points[ri], index.c_ok[ri] & (c_moves == cm))
+            if table is None:
+                continue
+            sp, best, pair = table
+            moves = moves_d + cm
+            k = np.searchsorted(sp, value - d_price, side="right") - 1
+            ok = (k >= 0) & (moves <= cap)
+            score = np.full(len(rows), -np.inf)
+            score[ok] = d_pts[ok] + best[k[ok]] - strategy.penalty * np.maximum(moves[ok] - free, 0)
+            better = score > total
+            total[better] = score[better]
+            pair_of[better] = pair[k[better]]
+            moves_of[better] = moves[better]
+
+        if not np.isfinite(total).any():
+            raise SystemExit(f"{strategy.name}: no feasible team in {data.season} round {rnd}")
+        best_row = int(np.argmax(total))
+        di, ci = rows[best_row], int(pair_of[best_row])
+        team = np.zeros(n_assets, dtype=bool)
+        team[d_combo[di]] = True
+        team[c_combo[ci]] = True
+
+        if held is None:
+            transfers, penalty, t_in, t_out = 0, 0.0, [], []
+        else:
+            transfers = int(moves_of[best_row])
+            penalty = strategy.penalty * max(transfers - free, 0)
+            t_in = [data.ids[a] for a in np.flatnonzero(team & ~held)]
+            t_out = [data.ids[a] for a in np.flatnonzero(held & ~team)]
+        team_price = int(price[team].sum())
+        results.append(
+            RoundResult(
+                round=rnd,
+                drivers=[data.ids[a] for a in d_combo[di]],
+                constructors=[data.ids[a] for a in c_combo[ci]],
+                team_value=value,
+                team_price=team_price,
+                transfers=transfers,
+                transfers_in=t_in,
+                transfers_out=t_out,
+                penalty_points=penalty,
+                projected_points=float(total[best_row]),
+                points=float(index.actual[ri][team].sum()) - penalty,
+            )
+        )
+        held = team
+        bank = value - team_price
+
+    return BacktestResult(strategy, data.season, results, (time.perf_counter() - t0) * 1000)
+
+
+def round_rows(result: BacktestResult) -> list[dict]:
+    rows = []
+    cumulative = 0.0
+    for r in result.rounds:
+        cumulative += r.points
+        rows.append(
+            {
+                "strategy": result.strategy.name,
+                "season": result.season,
+                "round": r.round,
+                "drivers": "|".join(r.drivers),
+                "constructors": "|".join(r.constructors),
+                "team_value": f"{r.team_value / 10:.1f}",
+                "team_price": f"{r.team_price / 10:.1f}",
+                "bank": f"{(r.team_value - r.team_price) / 10:.1f}",
+                "transfers": r.transfers,
+                "transfers_in": "|".join(r.transfers_in),
+                "transfers_out": "|".join(r.transfers_out),
+                "penalty_points": f"{r.penalty_points:g}",
+                "projected_points": f"{r.projected_points:.2f}",
+                "points": f"{r.points:g}",
+                "cumulative_points": f"{cumulative:g}",
+            }
+        )
+    return rows
+
+
+def summary_row(result: BacktestResult) -> dict:
+    rounds = result.rounds
+    return {
+        "strategy": result.strategy.name,
+        "season": result.season,
+        "rounds": len(rounds),
+        "total_points": f"{result.total_points:g}",
+        "avg_points": f"{result.total_points / max(len(rounds), 1):.2f}",
+        "transfers": result.transfers,
+        "penalty_points": f"{sum(r.penalty_points for r in rounds):g}",
+        "start_value": f"{rounds[0].team_value / 10:.1f}" if rounds else "",
+        "final_value": f"{rounds[-1].team_value / 10:.1f}" if rounds else "",
+        "elapsed_ms": f"{result.elapsed_ms:.1f}",
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, action="append", help="Season to replay (repeatable, default 2023-2025)")
+    ap.add_argument("--window", type=int, default=3, help="Rounds in the rolling projection")
+    ap.add_argument("--projection", choices=["rolling", "actual"], default="rolling")
+    ap.add_argument("--transfers", type=int, default=1, help="Free transfers per round")
+    ap.add_argument("--extra-transfers", type=int, default=0, help="Paid transfers allowed per round on top")
+    ap.add_argument("--penalty", type=float, default=10.0, help="Points per paid transfer")
+    ap.add_argument("--budget", type=float, default=opt.BUDGET / 10, help="Starting budget in millions")
+    ap.add_argument("--outdir", default=str(OUT))
+    args = ap.parse_args()
+
+    strategy = Strategy(
+        window=args.window,
+        projection=args.projection,
+        transfers=args.transfers,
+        extra_transfers=args.extra_transfers,
+        penalty=args.penalty,
+        budget=opt.to_tenths(args.budget),
+    )
+
+    results = []
+    for season in args.season or [2023, 2024, 2025]:
+        index = SeasonIndex.build(opt.load_season(season))
+        result = run_backtest(index, strategy)
+        results.append(result)
+        last = result.rounds[-1]
+        print(
+            f"{season} {strategy.name}: {result.total_points:g} pts over {len(result.rounds)} rounds, "
+            f"{result.transfers} transfers, value {result.rounds[0].team_value / 10:.1f}M -> {last.team_value / 10:.1f}M "
+            f"({result.elapsed_ms:.1f} ms)"
+        )
+
+    outdir = Path(args.outdir)
+    write_csv(outdir / "backtest_rounds.csv", [row for r in results for row in round_rows(r)], ROUND_FIELDS)
+    write_csv(outdir / "backtest_summary.csv", [summary_row(r) for r in results], SUMMARY_FIELDS)
+    print("Wrote", outdir / "backtest_rounds.csv")
+    print("Wrote", outdir / "backtest_summary.csv")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
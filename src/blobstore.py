@@ -0,0 +1,315 @@
+"""Content-addressed store for the season tables that live in several places.
+
+The same season table exists as:
+- data/seasons/<season>/raw/<table>.csv                  (canonical, written by the pipeline)
+- mycsv/<table>/<table><season>.csv                      (public copy for the website / Looker)
+- outputs/official_points/<season>/<table>.csv           (official points tables only)
+
+Instead of copying bytes around on every refresh, the canonical files are hashed
+into a blob store (`.blobs/sha256/<aa>/<hash>`) and the copies are materialized
+from it as hardlinks. Copies that are not byte-identical to the canonical file
+(e.g. the CRLF exports under mycsv/) are *views*: generated from the canonical
+blob on demand, stored once, and hardlinked like everything else.
+
+The layout manifest (`.blobs/layout.json`) records, for every managed path, the
+source path, the view and the blob it should contain.
+
+Usage:
+  python -m src.blobstore ingest          # hash canonical files, (re)build the layout
+  python -m src.blobstore materialize     # write/link every copy from the store
+  python -m src.blobstore verify          # report drift (exit code 1 if any)
+  python -m src.blobstore cat mycsv/dim_round/dim_round2025.csv
+  python -m src.blobstore gc              # drop blobs no longer referenced
+
+Notes:
+- Only copies are hardlinked by default. Pass `--link-sources` to materialize to
+  also hardlink the canonical raw files (saves one more copy, but anything that
+  rewrites a raw file in place would then also rewrite the blob).
+- materialize refuses to run (exit 1) while a source changed since the last ingest
+  (its copies are stale) or a blob is missing / was modified: linking then would put
+  old content back over new pipeline output. Run ingest first.
+- Copies that drifted (edited by hand / exported elsewhere) are reported and
+  left alone unless `--force` is given.
+- Blobs are read-only (0444), and so are their hardlinked copies: tools that write a
+  copy in place fail loudly instead of corrupting the store. The pipeline's CSV
+  writers write a temp file and `os.replace` it, which leaves the blob untouched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+STORE = ROOT / ".blobs"
+LAYOUT = STORE / "layout.json"
+LAYOUT_VERSION = 1
+# Read-only: a writer that rewrites a linked copy in place (open("w")) fails instead of
+# rewriting the blob and every other link to it. Replacing the file is unaffected.
+BLOB_MODE = 0o444
+
+
+def _crlf(data: bytes) -> bytes:
+    return data.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+
+
+VIEWS = {
+    "identity": lambda data: data,
+    "crlf": _crlf,
+}
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def blob_path(digest: str) -> Path:
+    return STORE / "sha256" / digest[:2] / digest
+
+
+def put_blob(data: bytes) -> str:
+    digest = sha256_bytes(data)
+    p = blob_path(digest)
+    if not p.exists():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_bytes(data)
+        os.chmod(tmp, BLOB_MODE)
+        os.replace(tmp, p)
+    elif p.stat().st_mode & 0o777 != BLOB_MODE:
+        os.chmod(p, BLOB_MODE)  # blobs stored before they were made read-only
+    return digest
+
+
+def get_blob(digest: str) -> bytes:
+    return blob_path(digest).read_bytes()
+
+
+def _rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+
+def discover_copies() -> dict[str, str]:
+    """Return {copy_path: source_path} for every known copy of a raw table."""
+    out: dict[str, str] = {}
+    for raw in sorted((ROOT / "data" / "seasons").glob("*/raw/*.csv")):
+        season = raw.parent.parent.name
+        table = raw.stem
+        out[_rel(ROOT / "mycsv" / table / f"{table}{season}.csv")] = _rel(raw)
+        if table.startswith("f1_official_"):
+            out[_rel(ROOT / "outputs" / "official_points" / season / f"{table}.csv")] = _rel(raw)
+    return out
+
+
+def _guess_view(copy: Path, source_data: bytes) -> str:
+    """Pick the view that reproduces an existing copy (identity if none does)."""
+    if not copy.exists():
+        return "identity"
+    data = copy.read_bytes()
+    for name, fn in VIEWS.items():
+        if fn(source_data) == data:
+            return name
+    # Keep the line-ending convention of the existing copy.
+    return "crlf" if b"\r\n" in data[:4096] else "identity"
+
+
+def load_layout() -> dict:
+    if not LAYOUT.exists():
+        return {}
+    data = json.loads(LAYOUT.read_text(encoding="utf-8"))
+    if data.get("version") != LAYOUT_VERSION:
+        return {}
+    return data.get("paths") or {}
+
+
+def save_layout(paths: dict) -> None:
+    LAYOUT.parent.mkdir(parents=True, exist_ok=True)
+    tmp = LAYOUT.with_name(LAYOUT.name + ".tmp")
+    tmp.write_text(json.dumps({"version": LAYOUT_VERSION, "paths": paths}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, LAYOUT)
+
+
+def ingest() -> dict:
+    """Hash canonical files into the store and rebuild the layout manifest."""
+    previous = load_layout()
+    paths: dict[str, dict] = {}
+    source_blobs: dict[str, str] = {}
+
+    for copy_rel, src_rel in discover_copies().items():
+        if src_rel not in source_blobs:
+            data = (ROOT / src_rel).read_bytes()
+            digest = put_blob(data)
+            source_blobs[src_rel] = digest
+            paths[src_rel] = {"source": src_rel, "view": "identity", "blob": digest}
+
+        src_data = get_blob(source_blobs[src_rel])
+        view = (previous.get(copy_rel) or {}).get("view") or _guess_view(ROOT / copy_rel, src_data)
+        paths[copy_rel] = {
+            "source": src_rel,
+            "view": view,
+            "blob": put_blob(VIEWS[view](src_data)),
+        }
+
+    save_layout(paths)
+    print(f"Ingested {len(source_blobs)} source tables ({len(paths)} managed paths) into {STORE}")
+    return paths
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _link(blob: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(blob, tmp)
+    except OSError:
+        # Different filesystem / no hardlink support: fall back to a copy.
+        shutil.copyfile(blob, tmp)
+    os.replace(tmp, dest)
+
+
+def check(paths: dict) -> list[tuple[str, str]]:
+    """Return [(path, problem)] for every managed path that is out of sync."""
+    problems: list[tuple[str, str]] = []
+    source_hashes: dict[str, str | None] = {}
+    for rel, entry in sorted(paths.items()):
+        blob = blob_path(entry["blob"])
+        if not blob.exists():
+            problems.append((rel, "blob missing from store (run ingest)"))
+            continue
+
+        p = ROOT / rel
+        if not p.exists():
+            problems.append((rel, "missing"))
+            continue
+        if rel == entry["source"]:
+            if sha256_file(p) != entry["blob"]:
+                # A linked source that changed was written in place, through the blob.
+                problems.append((rel, "blob modified in place" if _same_file(p, blob) else "source changed since last ingest"))
+            continue
+
+        src_rel = entry["source"]
+        if src_rel not in source_hashes:
+            src = ROOT / src_rel
+            source_hashes[src_rel] = sha256_file(src) if src.exists() else None
+        src_hash = source_hashes[src_rel]
+        if src_hash is not None and src_hash != (paths.get(src_rel) or {}).get("blob"):
+            problems.append((rel, "stale: source changed since last ingest"))
+            continue
+        if _same_file(p, blob):
+            # Shares the blob's inode, so only an in-place write to the blob can break it.
+            if sha256_file(blob) != entry["blob"]:
+                problems.append((rel, "blob modified in place"))
+            continue
+        if sha256_file(p) != entry["blob"]:
+            problems.append((rel, f"drift: differs from {entry['source']} ({entry['view']} view)"))
+    return problems
+
+
+def materialize(paths: dict, *, force: bool, link_sources: bool) -> int:
+    problems = check(paths)
+    blocking = [(rel, problem) for rel, problem in problems if not problem.startswith(("drift", "missing"))]
+    if blocking:
+        for rel, problem in blocking:
+            print(f"{rel}: {problem}")
+        print(f"Refusing to materialize: {len(blocking)} paths are out of sync with the store (run ingest first)")
+        return 1
+    drifted = {rel for rel, problem in problems if problem.startswith("drift")}
+    linked = skipped = 0
+    for rel, entry in sorted(paths.items()):
+        if rel == entry["source"] and not link_sources:
+            continue
+        p = ROOT / rel
+        blob = blob_path(entry["blob"])
+        if _same_file(p, blob):
+            continue
+        if rel in drifted and not force:
+            print(f"Skipping drifted copy (use --force to overwrite): {rel}")
+            skipped += 1
+            continue
+        _link(blob, p)
+        linked += 1
+    print(f"Materialized {linked} paths ({skipped} skipped)")
+    return 1 if skipped else 0
+
+
+def gc(paths: dict) -> None:
+    live = {e["blob"] for e in paths.values()}
+    removed = 0
+    for p in (STORE / "sha256").glob("*/*"):
+        if p.name not in live:
+            p.unlink()
+            removed += 1
+    print(f"Removed {removed} unreferenced blobs")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("ingest", help="hash canonical raw tables into the store and rebuild the layout")
+    m = sub.add_parser("materialize", help="write every managed copy from the store")
+    m.add_argument("--force", action="store_true", help="overwrite copies that drifted")
+    m.add_argument("--link-sources", action="store_true", help="also hardlink the canonical raw files")
+    sub.add_parser("verify", help="report managed paths that drifted from the layout")
+    c = sub.add_parser("cat", help="print the expected contents of a managed path")
+    c.add_argument("path")
+    sub.add_parser("gc", help="remove blobs not referenced by the layout")
+    args = ap.parse_args()
+
+    if args.cmd == "ingest":
+        ingest()
+        return 0
+
+    paths = load_layout()
+    if not paths:
+        raise SystemExit(f"No layout at {LAYOUT} (run: python -m src.blobstore ingest)")
+
+    if args.cmd == "materialize":
+        return materialize(paths, force=args.force, link_sources=args.link_sources)
+
+    if args.cmd == "verify":
+        problems = check(paths)
+        for rel, problem in problems:
+            print(f"{rel}: {problem}")
+        print(f"Checked {len(paths)} paths, {len(problems)} out of sync")
+        return 1 if problems else 0
+
+    if args.cmd == "cat":
+        rel = Path(args.path).as_posix()
+        entry = paths.get(rel)
+        if not entry:
+            raise SystemExit(f"Not a managed path: {rel}")
+        src_entry = paths[entry["source"]]
+        sys.stdout.buffer.write(VIEWS[entry["view"]](get_blob(src_entry["blob"])))
+        return 0
+
+    if args.cmd == "gc":
+        gc(paths)
+        return 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,381 @@
+"""Conformed dimensions across all seasons (one member per driver / team / race).
+
+`python -m src.dimensions --season N` writes per-season dims keyed by the fantasy ids,
+which are `<TEAM>_<ABBR>` for drivers: the same driver gets a new id every time they
+change team, and nothing links 2023 to 2025. This scans every
+data/seasons/*/raw folder (in parallel, one process per season) and writes
+season-independent dimensions with stable integer surrogate keys:
+
+Outputs (data/conformed/):
+- dim_driver.csv        driver_key, abbr, ergast_driver_id, driver_name, first/last season
+- dim_constructor.csv   constructor_key, constructor_id, ergast_constructor_id, name, first/last season
+- dim_round.csv         round_key, season, round, season_round, raceName, raceDate
+- dim_driver_team.csv   one validity range per driver, team and season: the fantasy id
+                        (join key of the long / fact tables), driver_key, constructor_key,
+                        valid_from / valid_to round and is_current
+
+Identity:
+- drivers are conformed on the 3-letter code, constructors on the fantasy team id
+  (renamed teams such as ALF -> KCK stay separate members, with their Ergast ids)
+- surrogate keys are read back from the previous output, so a member keeps its key
+  across rebuilds; new members are numbered after the existing ones, in order of first
+  appearance
+- f1fantasytools keeps listing a driver's old id (with a frozen price) after a mid-season
+  move. When a code has several ids in a round, the one whose team the driver raced for
+  (official race results) is the active one; without a result the newest id wins.
+
+Incremental:
+- every season's input files are hashed into `.conformed.manifest.json` together with
+  that season's scan result; only seasons whose inputs changed are rescanned (usually
+  just the current one), the others are merged from the manifest
+- a mappings/ change rescans everything; `--force` ignores the manifest
+
+Usage:
+  python -m src.dimensions --conformed
+  python -m src.dimensions --conformed --workers 1 --force
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .dimensions import read_csv
+from .fact_table import IdIndex, align_rounds
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SEASONS_DIR = ROOT / "data" / "seasons"
+MAPS_DIR = ROOT / "mappings"
+OUT = ROOT / "data" / "conformed"
+MANIFEST = OUT / ".conformed.manifest.json"
+MANIFEST_VERSION = 1
+
+INPUTS = [
+    "f1fantasytools_prices_drivers_long.csv",
+    "f1fantasytools_prices_constructors_long.csv",
+    "f1_official_driver_race_points.csv",
+    "f1_official_driver_standings.csv",
+    "f1_official_constructor_race_points.csv",
+    "dim_round_dates.csv",
+]
+MAPPINGS = ["drivers_abbr_to_ergast.csv", "constructors_abbr_to_ergast.csv"]
+
+DRIVER_FIELDS = ["driver_key", "abbr", "ergast_driver_id", "driver_name", "first_season", "last_season"]
+CONSTRUCTOR_FIELDS = ["constructor_key", "constructor_id", "ergast_constructor_id", "constructor_name", "first_season", "last_season"]
+ROUND_FIELDS = ["round_key", "season", "round", "season_round", "raceName", "raceDate"]
+DRIVER_TEAM_FIELDS = [
+    "driver_team_key",
+    "driver_key",
+    "constructor_key",
+    "season",
+    "driver_id",
+    "abbr",
+    "constructor_id",
+    "valid_from_round",
+    "valid_to_round",
+    "valid_from",
+    "valid_to",
+    "is_current",
+]
+
+
+def _digest(paths: list[Path]) -> str:
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(p.name.encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(p.read_bytes()).digest() if p.exists() else b"missing")
+    return h.hexdigest()
+
+
+def input_digest(season: int) -> str:
+    raw = SEASONS_DIR / str(season) / "raw"
+    return _digest([raw / n for n in INPUTS] + [MAPS_DIR / n for n in MAPPINGS])
+
+
+def discover_seasons() -> list[int]:
+    return sorted(int(p.parent.name) for p in SEASONS_DIR.glob("*/raw") if p.parent.name.isdigit())
+
+
+def _ranges(rounds: list[int], all_rounds: list[int]) -> list[tuple[int, int]]:
+    """Contiguous runs of `rounds` within the season's round list (gaps in numbering are not breaks)."""
+    pos = {r: i for i, r in enumerate(all_rounds)}
+    out: list[tuple[int, int]] = []
+    for r in sorted(rounds):
+        if out and pos[r] == pos[out[-1][1]] + 1:
+            out[-1] = (out[-1][0], r)
+        else:
+            out.append((r, r))
+    return out
+
+
+def scan_season(season: int) -> dict:
+    """Everything the merge needs from one season, as plain JSON-able data."""
+    raw = SEASONS_DIR / str(season) / "raw"
+    dprices = read_csv(raw / "f1fantasytools_prices_drivers_long.csv")
+    cprices = read_csv(raw / "f1fantasytools_prices_constructors_long.csv")
+    dates = read_csv(raw / "dim_round_dates.csv")
+
+    listed: dict[int, dict[str, list[str]]] = defaultdict(lambda: defaultdict(list))  # round -> abbr -> ids
+    first_seen: dict[str, int] = {}
+    for r in dprices:
+        rnd, fid = int(r["round"]), r["id"]
+        listed[rnd][(r.get("abbr") or "").strip().upper()].append(fid)
+        first_seen[fid] = min(first_seen.get(fid, rnd), rnd)
+    constructors = {}
+    for r in cprices:
+        constructors.setdefault(r["id"], (r.get("abbr") or "").strip().upper())
+    rounds = sorted(set(listed) | {int(r["round"]) for r in cprices})
+
+    race_rounds = align_rounds(rounds, [int(r["round"]) for r in dates] or rounds)
+    index = IdIndex(raw, MAPS_DIR, race_rounds)
+    race = {int(r["round"]): r for r in dates}
+
+    active: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for rnd in rounds:
+        team_drivers: dict[str, list[str]] = defaultdict(list)
+        for abbr, ids in listed[rnd].items():
+            for fid in ids:
+                team_drivers[fid.split("_", 1)[0]].append(abbr)
+        for abbr, ids in listed[rnd].items():
+            fid = max(ids, key=lambda i: (first_seen[i], i))
+            if len(ids) > 1:
+                _, _, off = index.driver(rnd, abbr)
+                code = (off or {}).get("constructorCode") or ""
+                for cand in ids:
+                    team = cand.split("_", 1)[0]
+                    if code and index.constructor(rnd, constructors.get(team, team), team_drivers[team])[0] == code:
+                        fid = cand
+                        break
+            active[(abbr, fid)].append(rnd)
+
+    assignments = []
+    for (abbr, fid), rs in sorted(active.items()):
+        for lo, hi in _ranges(rs, rounds):
+            assignments.append([abbr, fid, fid.split("_", 1)[0], lo, hi])
+
+    constructor_info = {}
+    for cid, abbr in sorted(constructors.items()):
+        code, name, _ = index.constructor(rounds[0], abbr, [])
+        if not code:
+            # Renamed teams: first round any of its drivers has an official result.
+            for rnd in rounds:
+                drivers = [a for a, ids in listed[rnd].items() if any(i.split("_", 1)[0] == cid for i in ids)]
+                code, name, _ = index.constructor(rnd, abbr, drivers)
+                if code:
+                    break
+        constructor_info[cid] = [code, name]
+
+    return {
+        "season": season,
+        "rounds": rounds,
+        "races": {
+            str(rnd): [
+                (race.get(race_rounds.get(rnd, rnd)) or {}).get("raceName") or "",
+                (race.get(race_rounds.get(rnd, rnd)) or {}).get("raceDate") or "",
+            ]
+            for rnd in rounds
+        },
+        "drivers": {abbr: list(index.driver_ids.get(abbr, ("", ""))) for abbr in sorted({a for a, _ in active})},
+        "constructors": constructor_info,
+        "assignments": assignments,
+    }
+
+
+def _load_manifest() -> dict:
+    if not MANIFEST.exists():
+        return {}
+    data = json.loads(MANIFEST.read_text(encoding="utf-8"))
+    return data if data.get("version") == MANIFEST_VERSION else {}
+
+
+def _existing_keys(name: str, key: str, natural) -> dict:
+    path = OUT / name
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return {natural(r): int(r[key]) for r in csv.DictReader(f)}
+
+
+def _assign(keys: dict, members: list) -> dict:
+    """Keep existing keys, number new members (already in first-appearance order) after them."""
+    nxt = max(keys.values(), default=0) + 1
+    out = {}
+    for m in members:
+        if m not in keys:
+            keys[m] = nxt
+            nxt += 1
+        out[m] = keys[m]
+    return out
+
+
+def _write(name: str, rows: list[dict], fields: list[str]) -> bool:
+    """Atomic write; False (file untouched) if the content is unchanged."""
+    path = OUT / name
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerows(rows)
+    if path.exists() and path.read_bytes() == tmp.read_bytes():
+        tmp.unlink()
+        return False
+    os.replace(tmp, path)
+    return True
+
+
+def merge(scans: list[dict]) -> dict[str, list[dict]]:
+    """Conformed tables from per-season scans (oldest season first)."""
+    first: dict[str, tuple[int, int]] = {}
+    last: dict[str, int] = {}
+    driver_info: dict[str, list[str]] = {}
+    cfirst: dict[str, tuple[int, int]] = {}
+    clast: dict[str, int] = {}
+    constructor_info: dict[str, list[str]] = {}
+    for s in scans:
+        season = s["season"]
+        for abbr, fid, team, lo, _ in s["assignments"]:
+            first.setdefault(abbr, (season, lo))
+            first[abbr] = min(first[abbr], (season, lo))
+            last[abbr] = season
+            cfirst.setdefault(team, (season, lo))
+            cfirst[team] = min(cfirst[team], (season, lo))
+            clast[team] = season
+        for abbr, (eid, name) in s["drivers"].items():
+            # Later seasons win, but never blank out a known id / name.
+            old = driver_info.get(abbr, ["", ""])
+            driver_info[abbr] = [eid or old[0], name or old[1]]
+        for cid, (code, name) in s["constructors"].items():
+            old = constructor_info.get(cid, ["", ""])
+            constructor_info[cid] = [code or old[0], name or old[1]]
+            cfirst.setdefault(cid, (season, s["rounds"][0] if s["rounds"] else 0))
+            clast[cid] = max(clast.get(cid, season), season)
+
+    dkeys = _assign(
+        _existing_keys("dim_driver.csv", "driver_key", lambda r: r["abbr"]),
+        sorted(first, key=lambda a: (first[a], a)),
+    )
+    ckeys = _assign(
+        _existing_keys("dim_constructor.csv", "constructor_key", lambda r: r["constructor_id"]),
+        sorted(cfirst, key=lambda c: (cfirst[c], c)),
+    )
+    rkeys = _assign(
+        _existing_keys("dim_round.csv", "round_key", lambda r: (int(r["season"]), int(r["round"]))),
+        [(s["season"], rnd) for s in scans for rnd in s["rounds"]],
+    )
+    tkeys = _assign(
+        _existing_keys("dim_driver_team.csv", "driver_team_key", lambda r: (int(r["season"]), r["driver_id"], int(r["valid_from_round"]))),
+        [(s["season"], a[1], a[3]) for s in scans for a in sorted(s["assignments"], key=lambda a: (a[3], a[1]))],
+    )
+
+    latest = max(((s["season"], s["rounds"][-1]) for s in scans if s["rounds"]), default=None)
+    driver_team = []
+    for s in scans:
+        season = s["season"]
+        for abbr, fid, team, lo, hi in sorted(s["assignments"], key=lambda a: (a[3], a[1])):
+            driver_team.append(
+                {
+                    "driver_team_key": tkeys[(season, fid, lo)],
+                    "driver_key": dkeys[abbr],
+                    "constructor_key": ckeys[team],
+                    "season": season,
+                    "driver_id": fid,
+                    "abbr": abbr,
+                    "constructor_id": team,
+                    "valid_from_round": lo,
+                    "valid_to_round": hi,
+                    "valid_from": f"{season}-R{lo:02d}",
+                    "valid_to": f"{season}-R{hi:02d}",
+                    "is_current": int((season, hi) == latest),
+                }
+            )
+    return {
+        "dim_driver.csv": sorted(
+            (
+                {
+                    "driver_key": dkeys[a],
+                    "abbr": a,
+                    "ergast_driver_id": driver_info.get(a, ["", ""])[0],
+                    "driver_name": driver_info.get(a, ["", ""])[1],
+                    "first_season": first[a][0],
+                    "last_season": last[a],
+                }
+                for a in first
+            ),
+            key=lambda r: r["driver_key"],
+        ),
+        "dim_constructor.csv": sorted(
+            (
+                {
+                    "constructor_key": ckeys[c],
+                    "constructor_id": c,
+                    "ergast_constructor_id": constructor_info.get(c, ["", ""])[0],
+                    "constructor_name": constructor_info.get(c, ["", ""])[1],
+                    "first_season": cfirst[c][0],
+                    "last_season": clast[c],
+                }
+                for c in cfirst
+            ),
+            key=lambda r: r["constructor_key"],
+        ),
+        "dim_round.csv": [
+            {
+                "round_key": rkeys[(s["season"], rnd)],
+                "season": s["season"],
+                "round": rnd,
+                "season_round": f"{s['season']}-R{rnd:02d}",
+                "raceName": s["races"][str(rnd)][0],
+                "raceDate": s["races"][str(rnd)][1],
+            }
+            for s in scans
+            for rnd in s["rounds"]
+        ],
+        "dim_driver_team.csv": driver_team,
+    }
+
+
+FIELDS = {
+    "dim_driver.csv": DRIVER_FIELDS,
+    "dim_constructor.csv": CONSTRUCTOR_FIELDS,
+    "dim_round.csv": ROUND_FIELDS,
+    "dim_driver_team.csv": DRIVER_TEAM_FIELDS,
+}
+
+
+def build_conformed(seasons: list[int] | None = None, *, workers: int = 1, force: bool = False) -> Path:
+    seasons = seasons or discover_seasons()
+    manifest = {} if force else _load_manifest()
+    cached: dict[str, dict] = manifest.get("seasons") or {}
+    digests = {s: input_digest(s) for s in seasons}
+    todo = [s for s in seasons if (cached.get(str(s)) or {}).get("digest") != digests[s]]
+    outputs_exist = all((OUT / name).exists() for name in FIELDS)
+    if not todo and outputs_exist and list(map(int, cached)) == seasons:
+        print(f"{OUT}: up to date ({len(seasons)} seasons)")
+        return OUT
+
+    if todo:
+        if workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as ex:
+                scanned = dict(zip(todo, ex.map(scan_season, todo)))
+        else:
+            scanned = {s: scan_season(s) for s in todo}
+        for s, scan in scanned.items():
+            cached[str(s)] = {"digest": digests[s], "scan": scan}
+    scans = [cached[str(s)]["scan"] for s in seasons]
+
+    OUT.mkdir(parents=True, exist_ok=True)
+    written = [name for name, rows in merge(scans).items() if _write(name, rows, FIELDS[name])]
+    MANIFEST.write_text(
+        json.dumps({"version": MANIFEST_VERSION, "seasons": {str(s): cached[str(s)] for s in seasons}}, indent=1) + "\n",
+        encoding="utf-8",
+    )
+    print(
+        f"{OUT}: scanned {len(todo)} of {len(seasons)} season(s) ({', '.join(map(str, todo)) or 'none'}), "
+        f"rewrote {', '.join(written) or 'nothing'}"
+    )
+    return OUT
@@ -6,20 +6,25 @@ Creates:
 - data/seasons/<season>/raw/dim_constructor.csv
 
 These are generated from the f1fantasytools long tables.
+
+`--conformed` instead builds season-independent dimensions over every season
+(data/conformed/, see src/conformed.py), rescanning only seasons whose inputs changed.
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
+import os
 from pathlib import Path
 
+from .records import Table
+
 
-def read_csv(path: Path) -> list[dict]:
-    if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8", newline="") as f:
-        return list(csv.DictReader(f))
+def read_csv(path: Path) -> Table:
+    # Column table with interned values; rows are read-only mappings (see src/records.py).
+    # utf-8-sig: the official points exports start with a BOM.
+    return Table.read_csv(path)
 
 
 def index_by(rows: list[dict], key: str) -> dict[str, dict]:
@@ -34,18 +39,31 @@ def index_by(rows: list[dict], key: str) -> dict[str, dict]:
 
 def write_csv(path: Path, rows: list[dict], fieldnames: list[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
+    # Write a sibling and replace: never rewrite the file in place (it may be a
+    # read-only hardlink into the blob store, see src/blobstore.py).
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for r in rows:
             w.writerow(r)
+    os.replace(tmp, path)
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--season", type=int, default=2025)
+    ap.add_argument("--conformed", action="store_true", help="Conformed dims over all seasons -> data/conformed/")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for --conformed (one season each)")
+    ap.add_argument("--force", action="store_true", help="With --conformed: rescan every season")
     args = ap.parse_args()
 
+    if args.conformed:
+        from .conformed import build_conformed  # imports this module
+
+        build_conformed(workers=args.workers, force=args.force)
+        return 0
+
     root = Path(__file__).resolve().parents[1]
     raw = root / "data" / "seasons" / str(args.season) / "raw"
 
@@ -14,6 +14,7 @@ All tables are long-format and round-grained (season, round).
 
 Data source:
 - Tries https://api.jolpi.ca/ergast first, falls back to https://ergast.com/mrd
+  (override with --base-url / ERGAST_BASE_URLS)
 
 Notes:
 - Ergast is a community API and can lag briefly after sessions.
@@ -25,17 +26,39 @@ from __future__ import annotations
 
 import argparse
 import csv
+import os
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
 from pathlib import Path
 
 import requests
 
+from .records import Table
 
-BASE_URLS = [
+
+DEFAULT_BASE_URLS = [
     "https://api.jolpi.ca/ergast",
     "https://ergast.com/mrd",
 ]
 
+# ERGAST_BASE_URLS (comma-separated) or --base-url replaces the list, e.g. with the
+# local record/replay stand-in (src/standin.py).
+BASE_URLS = [u.strip() for u in os.environ.get("ERGAST_BASE_URLS", "").split(",") if u.strip()] or list(DEFAULT_BASE_URLS)
+
+# Output columns; rows are collected into compact column tables (src/records.py).
+DRIVER_RACE_FIELDS = [
+    "season", "round", "raceName", "position", "points", "driverCode", "ergast_driver_id",
+    "driver_givenName", "driver_familyName", "constructorCode", "constructor_name",
+]
+CONSTRUCTOR_RACE_FIELDS = ["season", "round", "raceName", "points", "constructorCode", "constructor_name"]
+DRIVER_STANDINGS_FIELDS = [
+    "season", "round", "raceName", "position", "points", "wins", "driverCode", "ergast_driver_id",
+    "driver_givenName", "driver_familyName", "constructorCode", "constructor_name",
+]
+CONSTRUCTOR_STANDINGS_FIELDS = [
+    "season", "round", "raceName", "position", "points", "wins", "constructorCode", "constructor_name",
+]
+
 
 def _get_json(path: str, *, params: dict | None = None) -> dict:
     last = None
@@ -59,17 +82,21 @@ def _races_for_season(season: int) -> list[dict]:
     return races
 
 
-def _write_csv(path: Path, rows: list[dict], fieldnames: list[str]) -> None:
+def _write_csv(path: Path, rows: Iterable[Mapping], fieldnames: list[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for r in rows:
             w.writerow(r)
+    os.replace(tmp, path)
 
 
 @dataclass
 class RoundInfo:
+    __slots__ = ("season", "round", "race_name")
+
     season: int
     round: int
     race_name: str
@@ -88,10 +115,10 @@ def _rounds(season: int) -> list[RoundInfo]:
     return out
 
 
-def fetch_race_points(season: int) -> tuple[list[dict], list[dict]]:
+def fetch_race_points(season: int) -> tuple[Table, Table]:
     """Return (driver_rows, constructor_rows) with *per-race* points."""
-    driver_rows: list[dict] = []
-    constructor_rows: list[dict] = []
+    driver_rows = Table(DRIVER_RACE_FIELDS)
+    constructor_rows = Table(CONSTRUCTOR_RACE_FIELDS)
 
     for rd in _rounds(season):
         data = _get_json(f"/f1/{season}/{rd.round}/results.json", params={"limit": 500})
@@ -147,10 +174,10 @@ def fetch_race_points(season: int) -> tuple[list[dict], list[dict]]:
     return driver_rows, constructor_rows
 
 
-def fetch_standings(season: int) -> tuple[list[dict], list[dict]]:
+def fetch_standings(season: int) -> tuple[Table, Table]:
     """Return (driver_rows, constructor_rows) with *cumulative* points after each round."""
-    driver_rows: list[dict] = []
-    constructor_rows: list[dict] = []
+    driver_rows = Table(DRIVER_STANDINGS_FIELDS)
+    constructor_rows = Table(CONSTRUCTOR_STANDINGS_FIELDS)
 
     for rd in _rounds(season):
         d = _get_json(
@@ -215,7 +242,10 @@ def main() -> int:
         default="both",
         help="race=per-race points, standings=cumulative after each round, both=emit all",
     )
+    ap.add_argument("--base-url", action="append", help="Ergast-compatible base URL (repeatable, tried in order)")
     args = ap.parse_args()
+    if args.base_url:
+        BASE_URLS[:] = args.base_url
 
     root = Path(__file__).resolve().parents[1]
     raw_dir = root / "data" / "seasons" / str(args.season) / "raw"
@@ -225,24 +255,12 @@ def main() -> int:
         _write_csv(
             raw_dir / "f1_official_driver_race_points.csv",
             drows,
-            [
-                "season",
-                "round",
-                "raceName",
-                "position",
-                "points",
-                "driverCode",
-                "ergast_driver_id",
-                "driver_givenName",
-                "driver_familyName",
-                "constructorCode",
-                "constructor_name",
-            ],
+            DRIVER_RACE_FIELDS,
         )
         _write_csv(
             raw_dir / "f1_official_constructor_race_points.csv",
             crows,
-            ["season", "round", "raceName", "points", "constructorCode", "constructor_name"],
+            CONSTRUCTOR_RACE_FIELDS,
         )
         print("Wrote race points to", raw_dir)
 
@@ -251,34 +269,12 @@ def main() -> int:
         _write_csv(
             raw_dir / "f1_official_driver_standings.csv",
             drows,
-            [
-                "season",
-                "round",
-                "raceName",
-                "position",
-                "points",
-                "wins",
-                "driverCode",
-                "ergast_driver_id",
-                "driver_givenName",
-                "driver_familyName",
-                "constructorCode",
-                "constructor_name",
-            ],
+            DRIVER_STANDINGS_FIELDS,
         )
         _write_csv(
             raw_dir / "f1_official_constructor_standings.csv",
             crows,
-            [
-                "season",
-                "round",
-                "raceName",
-                "position",
-                "points",
-                "wins",
-                "constructorCode",
-                "constructor_name",
-            ],
+            CONSTRUCTOR_STANDINGS_FIELDS,
         )
         print("Wrote standings to", raw_dir)
 
@@ -20,16 +20,21 @@ from __future__ import annotations
 
 import argparse
 import csv
+import os
 from pathlib import Path
 
 import requests
 
 
-BASE_URLS = [
+DEFAULT_BASE_URLS = [
     "https://api.jolpi.ca/ergast",
     "https://ergast.com/mrd",
 ]
 
+# ERGAST_BASE_URLS (comma-separated) or --base-url replaces the list, e.g. with the
+# local record/replay stand-in (src/standin.py).
+BASE_URLS = [u.strip() for u in os.environ.get("ERGAST_BASE_URLS", "").split(",") if u.strip()] or list(DEFAULT_BASE_URLS)
+
 
 def _get_json(path: str) -> dict:
     last = None
@@ -48,7 +53,10 @@ def _get_json(path: str) -> dict:
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--season", type=int, default=2025)
+    ap.add_argument("--base-url", action="append", help="Ergast-compatible base URL (repeatable, tried in order)")
     args = ap.parse_args()
+    if args.base_url:
+        BASE_URLS[:] = args.base_url
 
     data = _get_json(f"/f1/{args.season}.json")
     races = (((data.get("MRData") or {}).get("RaceTable") or {}).get("Races") or [])
@@ -59,7 +67,8 @@ def main() -> int:
     out = root / "data" / "seasons" / str(args.season) / "raw" / "dim_round_dates.csv"
     out.parent.mkdir(parents=True, exist_ok=True)
 
-    with out.open("w", encoding="utf-8", newline="") as f:
+    tmp = out.with_name(out.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
         w = csv.DictWriter(
             f,
             fieldnames=[
@@ -89,6 +98,7 @@ def main() -> int:
                     "raceTime": r.get("time") or "",
                 }
             )
+    os.replace(tmp, out)
 
     print("Wrote", out)
     return 0
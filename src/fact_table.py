@@ -0,0 +1,311 @@
+"""Materialize one wide fact table per season: fantasy points + prices + official points.
+
+Power BI used to merge the f1fantasytools points/prices tables with the official
+(Ergast/Jolpica) race points itself, bridging through `mappings/*_abbr_to_ergast.csv`.
+That join is slow at refresh time and lossy (many `ergast_driver_id` values in
+`dim_driver.csv` are blank). This module does the join once, in Python:
+
+Output:
+- data/seasons/<season>/derived/fact_asset_round.csv   keyed by (season, round, asset_id)
+
+ID resolution (per season):
+- drivers: f1fantasytools id `<TEAM>_<ABBR>` -> official race row for that round via the
+  3-letter code, then any official row of the season, then mappings/drivers_abbr_to_ergast.csv.
+  A driver who switches team keeps the same ergast id under both fantasy ids.
+- constructors: official `constructorAbbr`, else the constructor the team's drivers raced for
+  in that round (covers renamed teams such as ALF/ALT in 2023), else the mapping CSV.
+- rounds: f1fantasytools keeps the original calendar numbering when a race is cancelled
+  (2023 has no round 6), Ergast renumbers. If both sides have the same number of rounds
+  they are aligned by order, otherwise by number.
+
+Incremental:
+- A per-round digest of all inputs is kept in `derived/.fact_asset_round.manifest.json`.
+- Unchanged rounds are reused from the existing output; if only new rounds appeared,
+  their rows are appended instead of rewriting the file.
+
+Usage:
+  python -m src.fact_table --season 2025
+  python -m src.fact_table --season 2023 --season 2024 --season 2025 --force
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from .dimensions import read_csv
+from .records import json_default
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FACT_NAME = "fact_asset_round.csv"
+MANIFEST_NAME = ".fact_asset_round.manifest.json"
+MANIFEST_VERSION = 1
+
+FIELDS = [
+    "season",
+    "round",
+    "season_round",
+    "asset_type",
+    "asset_id",
+    "abbr",
+    "team_abbr",
+    "ergast_id",
+    "name",
+    "price",
+    "priceChange",
+    "percentOwned",
+    "x2PercentOwned",
+    "totalPoints",
+    "nnTotalPoints",
+    "ergast_round",
+    "raceName",
+    "official_position",
+    "official_points",
+]
+
+
+def _by_round(rows: list[dict], key: str = "round") -> dict[int, list[dict]]:
+    out: dict[int, list[dict]] = defaultdict(list)
+    for r in rows:
+        out[int(r[key])].append(r)
+    return out
+
+
+def align_rounds(fantasy_rounds: list[int], official_rounds: list[int]) -> dict[int, int]:
+    """Map fantasy round -> official (Ergast) round."""
+    f, o = sorted(set(fantasy_rounds)), sorted(set(official_rounds))
+    if f != o and len(f) == len(o):
+        return dict(zip(f, o))
+    return {r: r for r in f}
+
+
+class IdIndex:
+    """Resolve f1fantasytools asset ids to Ergast ids for one season."""
+
+    def __init__(self, raw: Path, maps_dir: Path, race_rounds: dict[int, int]):
+        self.race_rounds = race_rounds
+
+        self.driver_rows: dict[tuple[int, str], dict] = {}
+        self.driver_ids: dict[str, tuple[str, str]] = {}
+        self.constructor_by_abbr: dict[str, tuple[str, str]] = {}
+        self.constructor_rows: dict[tuple[int, str], dict] = {}
+
+        for r in read_csv(maps_dir / "drivers_abbr_to_ergast.csv"):
+            abbr = (r.get("abbr") or "").strip().upper()
+            if abbr and not abbr.startswith("#") and (r.get("ergast_driver_id") or "").strip():
+                self.driver_ids[abbr] = (r["ergast_driver_id"].strip(), (r.get("driver_name") or "").strip())
+        for r in read_csv(maps_dir / "constructors_abbr_to_ergast.csv"):
+            abbr = (r.get("abbr") or "").strip().upper()
+            if abbr and (r.get("ergast_constructor_id") or "").strip():
+                self.constructor_by_abbr[abbr] = (r["ergast_constructor_id"].strip(), (r.get("constructor_name") or "").strip())
+
+        # Official rows override the hand-maintained mappings.
+        for name in ("f1_official_driver_standings.csv", "f1_official_driver_race_points.csv"):
+            for r in read_csv(raw / name):
+                abbr = (r.get("driverAbbr") or r.get("driverCode") or "").strip().upper()
+                eid = (r.get("ergast_driver_id") or "").strip()
+                if not abbr or not eid:
+                    continue
+                full = f"{r.get('driver_givenName') or ''} {r.get('driver_familyName') or ''}".strip()
+                self.driver_ids[abbr] = (eid, full)
+                if name == "f1_official_driver_race_points.csv":
+                    self.driver_rows[(int(r["round"]), abbr)] = r
+
+        self.constructor_names: dict[str, str] = {}
+        for r in read_csv(raw / "f1_official_constructor_race_points.csv"):
+            code = (r.get("constructorCode") or "").strip()
+            self.constructor_rows[(int(r["round"]), code)] = r
+            self.constructor_names[code] = (r.get("constructor_name") or "").strip()
+            abbr = (r.get("constructorAbbr") or "").strip().upper()
+            if abbr and code:
+                self.constructor_by_abbr[abbr] = (code, self.constructor_names[code])
+
+    def driver(self, rnd: int, abbr: str) -> tuple[str, str, dict | None]:
+        """Return (ergast_driver_id, name, official race row or None)."""
+        row = self.driver_rows.get((self.race_rounds.get(rnd, rnd), abbr))
+        eid, name = self.driver_ids.get(abbr, ("", ""))
+        return eid, name, row
+
+    def constructor(self, rnd: int, abbr: str, driver_abbrs: list[str]) -> tuple[str, str, dict | None]:
+        """Return (ergast_constructor_id, name, official race row or None)."""
+        ergast_round = self.race_rounds.get(rnd, rnd)
+        code = ""
+        if abbr in self.constructor_by_abbr:
+            code = self.constructor_by_abbr[abbr][0]
+        if not code or (ergast_round, code) not in self.constructor_rows:
+            # Renamed teams: follow this team's drivers to the constructor they raced for.
+            for d in driver_abbrs:
+                row = self.driver_rows.get((ergast_round, d))
+                if row and (row.get("constructorCode") or "").strip():
+                    code = row["constructorCode"].strip()
+                    break
+        name = self.constructor_names.get(code) or self.constructor_by_abbr.get(abbr, ("", ""))[1]
+        return code, name, self.constructor_rows.get((ergast_round, code))
+
+
+def _round_digest(parts: list) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, separators=(",", ":"), default=json_default).encode("utf-8")).hexdigest()
+
+
+def _num(v) -> str:
+    return "" if v in (None, "", "$undefined") else v
+
+
+def build_round(season: int, rnd: int, index: IdIndex, prices: dict[str, list[dict]], points: dict[str, list[dict]]) -> list[dict]:
+    ergast_round = index.race_rounds.get(rnd, rnd)
+    out: list[dict] = []
+
+    team_drivers: dict[str, list[str]] = defaultdict(list)
+    for p in prices["driver"]:
+        team_drivers[p["id"].split("_", 1)[0]].append((p.get("abbr") or "").strip().upper())
+
+    for asset_type in ("driver", "constructor"):
+        pts = {r["id"]: r for r in points[asset_type]}
+        for p in sorted(prices[asset_type], key=lambda r: r["id"]):
+            aid = p["id"]
+            abbr = (p.get("abbr") or "").strip().upper()
+            if asset_type == "driver":
+                team = aid.split("_", 1)[0]
+                eid, name, off = index.driver(rnd, abbr)
+            else:
+                team = aid
+                eid, name, off = index.constructor(rnd, abbr, team_drivers.get(aid, []))
+            pt = pts.get(aid) or {}
+            out.append(
+                {
+                    "season": season,
+                    "round": rnd,
+                    "season_round": f"{season}-R{rnd:02d}",
+                    "asset_type": asset_type,
+                    "asset_id": aid,
+                    "abbr": abbr,
+                    "team_abbr": team,
+                    "ergast_id": eid,
+                    "name": name,
+                    "price": _num(p.get("price")),
+                    "priceChange": _num(p.get("priceChange")),
+                    "percentOwned": _num(p.get("percentOwned")),
+                    "x2PercentOwned": _num(p.get("x2PercentOwned")),
+                    "totalPoints": _num(pt.get("totalPoints")),
+                    "nnTotalPoints": _num(pt.get("nnTotalPoints")),
+                    "ergast_round": ergast_round if off else "",
+                    "raceName": (off or {}).get("raceName") or "",
+                    "official_position": (off or {}).get("position") or "",
+                    "official_points": (off or {}).get("points") or "",
+                }
+            )
+    return out
+
+
+def _load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != MANIFEST_VERSION or data.get("fields") != FIELDS:
+        return {}
+    return data
+
+
+def build_season(season: int, *, force: bool = False) -> Path:
+    raw = ROOT / "data" / "seasons" / str(season) / "raw"
+    derived = ROOT / "data" / "seasons" / str(season) / "derived"
+    maps_dir = ROOT / "mappings"
+    out_path = derived / FACT_NAME
+    manifest_path = derived / MANIFEST_NAME
+
+    prices = {
+        "driver": _by_round(read_csv(raw / "f1fantasytools_prices_drivers_long.csv")),
+        "constructor": _by_round(read_csv(raw / "f1fantasytools_prices_constructors_long.csv")),
+    }
+    points = {
+        "driver": _by_round(read_csv(raw / "f1fantasytools_points_drivers_long.csv")),
+        "constructor": _by_round(read_csv(raw / "f1fantasytools_points_constructors_long.csv")),
+    }
+    rounds = sorted(set(prices["driver"]) | set(prices["constructor"]))
+    official_rounds = [int(r["round"]) for r in read_csv(raw / "dim_round_dates.csv")]
+    race_rounds = align_rounds(rounds, official_rounds or rounds)
+    index = IdIndex(raw, maps_dir, race_rounds)
+
+    # Everything a round's rows depend on goes into its digest.
+    maps_digest = _round_digest([read_csv(maps_dir / n) for n in ("drivers_abbr_to_ergast.csv", "constructors_abbr_to_ergast.csv")])
+    digests: dict[str, str] = {}
+    for rnd in rounds:
+        er = race_rounds.get(rnd, rnd)
+        digests[str(rnd)] = _round_digest(
+            [
+                maps_digest,
+                er,
+                sorted(index.driver_ids.items()),
+                {t: prices[t].get(rnd, []) for t in prices},
+                {t: points[t].get(rnd, []) for t in points},
+                [r for (k, _), r in sorted(index.driver_rows.items()) if k == er],
+                [r for (k, _), r in sorted(index.constructor_rows.items()) if k == er],
+            ]
+        )
+
+    manifest = {} if force else _load_manifest(manifest_path)
+    old_digests: dict[str, str] = manifest.get("rounds") or {}
+    old_rows: dict[int, list[dict]] = {}
+    if old_digests and out_path.exists():
+        with out_path.open("r", encoding="utf-8", newline="") as f:
+            old_rows = _by_round(list(csv.DictReader(f)))
+
+    changed = [r for r in rounds if old_digests.get(str(r)) != digests[str(r)] or r not in old_rows]
+    old_keys, cur_keys = list(old_digests), [str(r) for r in rounds]
+    if old_rows and not changed and old_keys == cur_keys:
+        print(f"{out_path}: up to date ({len(rounds)} rounds)")
+        return out_path
+    appendable = (
+        bool(old_rows)
+        and len(old_keys) < len(cur_keys)
+        and cur_keys[: len(old_keys)] == old_keys
+        and all(str(r) not in old_digests for r in changed)
+    )
+
+    derived.mkdir(parents=True, exist_ok=True)
+    if appendable:
+        with out_path.open("a", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDS)
+            for rnd in changed:
+                w.writerows(build_round(season, rnd, index, {t: prices[t].get(rnd, []) for t in prices}, {t: points[t].get(rnd, []) for t in points}))
+        print(f"{out_path}: appended {len(changed)} new round(s)")
+    else:
+        tmp = out_path.with_name(out_path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDS)
+            w.writeheader()
+            for rnd in rounds:
+                if rnd in changed:
+                    w.writerows(build_round(season, rnd, index, {t: prices[t].get(rnd, []) for t in prices}, {t: points[t].get(rnd, []) for t in points}))
+                else:
+                    w.writerows(old_rows[rnd])
+        os.replace(tmp, out_path)
+        print(f"{out_path}: rebuilt {len(changed)} round(s), reused {len(rounds) - len(changed)}")
+
+    manifest_path.write_text(
+        json.dumps({"version": MANIFEST_VERSION, "fields": FIELDS, "rounds": digests}, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    return out_path
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, action="append", help="Season to build (repeatable, default 2025)")
+    ap.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild every round")
+    args = ap.parse_args()
+
+    for season in args.season or [2025]:
+        build_season(season, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
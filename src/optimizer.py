@@ -0,0 +1,811 @@
+"""Team optimizer: best 5 drivers + 2 constructors under the budget cap.
+
+Inputs are the f1fantasytools long tables in data/seasons/<season>/raw/.
+Prices are converted to integer tenths of a million (the game moves prices in
+0.1M steps), so budget checks are exact.
+
+Projection (expected points for round R):
+- rolling: mean `totalPoints` over the previous `window` rounds the asset appeared in
+  (assets without history fall back to their price in millions, i.e. rank by price)
+- actual:  the real `totalPoints` of round R (hindsight; useful for backtests)
+
+Search:
+- All 5-driver and 2-constructor combinations are enumerated once per pool
+  (`ComboIndex`, ~26k x 45 for a 22-driver grid) with their summed prices.
+- For every driver combination, the best constructor pair that fits the remaining
+  budget is found with a prefix-max over price-sorted pairs + searchsorted, so a full
+  solve is a handful of NumPy passes rather than a loop over ~1M teams.
+- The DRS boost is part of each driver set's score (`--boost`, default 2x): the boosted
+  driver is the set's best projected one, so the boosted score is one more reduction
+  (max / top-2) over the same gathered driver points, not a second search. With the
+  3x chip the best driver is tripled and the second best gets the 2x boost.
+- Starting from a current team (`--current-drivers/--current-constructors`, `--lock`,
+  `--exclude`, `--max-transfers` or `--constraints FILE.json`), only the combinations
+  that satisfy the constraints are enumerated (`ConstrainedIndex`), with a
+  constructor table per number of transfers left.
+- `--risk mean|variance|cvar` scores teams over a scenario x asset points matrix
+  instead of the point projection (src/risk.py).
+- `--time-budget-ms` switches to the anytime planner (src/anytime.py): a plan over
+  `--horizon` rounds with DRS boosts and transfer penalties, the best found within
+  the budget, and its gap to an upper bound.
+- `--sensitivity` writes each asset's projection / price breakpoints for the best team
+  without the DRS boost (src/sensitivity.py) instead of the recommendations; the
+  breakpoints are exact only for unboosted scores, so that run leaves
+  team_recommendations.csv alone.
+
+Output:
+- data/seasons/<season>/derived/team_recommendations.csv
+- data/seasons/<season>/derived/team_sensitivity.csv (with --sensitivity, instead of the above)
+- data/seasons/<season>/derived/team_plan.csv (with --time-budget-ms)
+
+Usage:
+  python -m src.optimizer --season 2025 --round 10
+  python -m src.optimizer --season 2025 --round 10 --budget 98 --top 10
+  python -m src.optimizer --season 2025 --round 10 --warm --set-price VER=28.9 --verify
+  python -m src.optimizer --season 2025 --round 10 --risk cvar --alpha 0.1
+  python -m src.optimizer --season 2025 --round 10 --current-drivers NOR,PIA,VER,LEC,HAM \
+      --current-constructors MCL,FER --lock NOR --exclude STR --max-transfers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from .dimensions import read_csv, write_csv
+from .records import NULL, Table
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+BUDGET = 1000  # 100.0M in tenths
+N_DRIVERS = 5
+N_CONSTRUCTORS = 2
+
+# Extra multiples of a driver's points, best driver of the team first: the DRS boost
+# doubles one driver; the 3x chip triples one and the DRS boost still doubles another.
+BOOSTS = {"none": (), "2x": (1.0,), "3x": (2.0, 1.0)}
+
+RECOMMENDATION_FIELDS = [
+    "season",
+    "round",
+    "team_name",
+    "drivers",
+    "constructors",
+    "total_price",
+    "expected_points",
+    "drs_boost",
+    "chip_suggestion",
+    "notes",
+]
+
+
+def to_tenths(price) -> int:
+    return int(round(float(price) * 10))
+
+
+def _float_or_nan(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+@dataclass
+class SeasonData:
+    """Dense (round x asset) matrices for one season."""
+
+    season: int
+    rounds: list[int]
+    ids: list[str]
+    abbr: list[str]
+    is_driver: np.ndarray  # bool [A]
+    price: np.ndarray  # int32 [R, A], tenths; -1 if the asset was not priced that round
+    points: np.ndarray  # float64 [R, A]; nan if missing
+
+    def round_index(self, rnd: int) -> int:
+        try:
+            return self.rounds.index(rnd)
+        except ValueError:
+            raise SystemExit(f"Season {self.season} has no round {rnd} (rounds: {self.rounds[0]}..{self.rounds[-1]})")
+
+
+def _floats(table: Table, name: str) -> np.ndarray:
+    """A column as float64 (blank / missing / not a number = nan), zero-copy from the table cache."""
+    if name not in table.positions:
+        return np.full(len(table), np.nan)
+    num = table.numeric(name)
+    if num is not None:
+        return np.frombuffer(num, dtype=np.float64)
+    return np.array([_float_or_nan(v) for v in table.column(name)], dtype=np.float64)
+
+
+def _lookup(table: Table, name: str, mapping: dict[str, int]) -> np.ndarray:
+    """mapping[value] per row (-1 if absent), through the column's codes instead of its strings."""
+    codes, values = table.codes(name)
+    lut = np.array([mapping.get(v, -1) for v in values] + [-1], dtype=np.int64)
+    codes = np.frombuffer(codes, dtype=np.uint32).astype(np.int64)
+    return lut[np.where(codes == NULL, len(values), codes)]
+
+
+def load_season(season: int, root: Path = ROOT) -> SeasonData:
+    raw = root / "data" / "seasons" / str(season) / "raw"
+    tables = [
+        (read_csv(raw / f"f1fantasytools_prices_{kind}_long.csv"), read_csv(raw / f"f1fantasytools_points_{kind}_long.csv"), is_driver)
+        for kind, is_driver in (("drivers", True), ("constructors", False))
+    ]
+    if not any(prices for prices, _, _ in tables):
+        raise SystemExit(f"No f1fantasytools price tables in {raw}")
+
+    # Numeric columns come straight off the mapped table cache; only the asset
+    # ids / abbreviations are decoded, once per distinct asset.
+    assets: dict[str, tuple[str, bool]] = {}
+    round_set: set[int] = set()
+    for prices, _, is_driver in tables:
+        if not prices:
+            continue
+        round_set.update(_floats(prices, "round").astype(np.int64).tolist())
+        codes, values = prices.codes("id")
+        abbr_codes, abbr_values = prices.codes("abbr") if "abbr" in prices.positions else ([NULL] * len(prices), [])
+        _, first = np.unique(np.frombuffer(codes, dtype=np.uint32), return_index=True)
+        for i in np.sort(first).tolist():
+            if codes[i] != NULL:
+                abbr = abbr_values[abbr_codes[i]] if abbr_codes[i] != NULL else ""
+                assets.setdefault(values[codes[i]], (abbr.strip().upper(), is_driver))
+    rounds = sorted(round_set)
+    ids = sorted(assets, key=lambda a: (not assets[a][1], a))
+
+    ri = {r: i for i, r in enumerate(rounds)}
+    ai = {a: i for i, a in enumerate(ids)}
+    price = np.full((len(rounds), len(ids)), -1, dtype=np.int32)
+    pts = np.full((len(rounds), len(ids)), np.nan)
+    for prices, points, _ in tables:
+        if prices:
+            row_round = np.searchsorted(rounds, _floats(prices, "round").astype(np.int64))
+            col = _lookup(prices, "id", ai)
+            p = _floats(prices, "price")
+            ok = (col >= 0) & ~np.isnan(p)
+            price[row_round[ok], col[ok]] = np.round(p[ok] * 10).astype(np.int32)
+        if points:
+            rnd = _floats(points, "round").astype(np.int64)
+            col = _lookup(points, "id", ai)
+            ok = (col >= 0) & np.isin(rnd, rounds)
+            pts[[ri[r] for r in rnd[ok].tolist()], col[ok]] = _floats(points, "totalPoints")[ok]
+
+    return SeasonData(
+        season=season,
+        rounds=rounds,
+        ids=ids,
+        abbr=[assets[a][0] for a in ids],
+        is_driver=np.array([assets[a][1] for a in ids]),
+        price=price,
+        points=pts,
+    )
+
+
+def project(data: SeasonData, rnd: int, *, window: int = 3, mode: str = "rolling") -> np.ndarray:
+    """Expected points for every asset in `data.ids` at round `rnd`."""
+    i = data.round_index(rnd)
+    if mode == "actual":
+        return np.nan_to_num(data.points[i], nan=0.0)
+
+    hist = data.points[:i]
+    out = np.full(len(data.ids), np.nan)
+    if len(hist):
+        # Last `window` rounds each asset actually appeared in.
+        seen = ~np.isnan(hist)
+        rank_from_end = np.cumsum(seen[::-1], axis=0)[::-1]
+        recent = seen & (rank_from_end <= window)
+        n = recent.sum(axis=0)
+        total = np.where(recent, hist, 0.0).sum(axis=0)
+        out = np.divide(total, n, out=out, where=n > 0)
+    fallback = np.maximum(data.price[i], 0) / 10.0
+    return np.where(np.isnan(out), fallback, out)
+
+
+@dataclass
+class Pool:
+    """Assets available in one round with their (integer) prices and projections."""
+
+    ids: list[str]
+    abbr: list[str]
+    is_driver: np.ndarray
+    price: np.ndarray  # int32 tenths
+    points: np.ndarray  # float64
+
+    @property
+    def drivers(self) -> np.ndarray:
+        return np.flatnonzero(self.is_driver)
+
+    @property
+    def constructors(self) -> np.ndarray:
+        return np.flatnonzero(~self.is_driver)
+
+
+def round_pool(data: SeasonData, rnd: int, *, window: int = 3, mode: str = "rolling") -> Pool:
+    i = data.round_index(rnd)
+    avail = np.flatnonzero(data.price[i] >= 0)
+    proj = project(data, rnd, window=window, mode=mode)
+    return Pool(
+        ids=[data.ids[a] for a in avail],
+        abbr=[data.abbr[a] for a in avail],
+        is_driver=data.is_driver[avail],
+        price=data.price[i, avail].astype(np.int32),
+        points=proj[avail].astype(np.float64),
+    )
+
+
+@dataclass
+class ComboIndex:
+    """All driver 5-sets and constructor pairs of a pool, with summed prices.
+
+    Combinations index into the pool's asset arrays. Points are summed on demand
+    (`driver_points` / `constructor_points`) so one index serves any projection.
+    """
+
+    d_combo: np.ndarray  # int [Nd, 5]
+    d_price: np.ndarray  # int [Nd]
+    c_combo: np.ndarray  # int [Nc, 2]
+    c_price: np.ndarray  # int [Nc]
+
+    @classmethod
+    def build(cls, pool: Pool) -> "ComboIndex":
+        d = pool.drivers
+        c = pool.constructors
+        if len(d) < N_DRIVERS or len(c) < N_CONSTRUCTORS:
+            raise SystemExit(f"Not enough assets priced ({len(d)} drivers, {len(c)} constructors)")
+        d_combo = np.array(list(itertools.combinations(d, N_DRIVERS)), dtype=np.int32)
+        c_combo = np.array(list(itertools.combinations(c, N_CONSTRUCTORS)), dtype=np.int32)
+        return cls(
+            d_combo=d_combo,
+            d_price=pool.price[d_combo].sum(axis=1),
+            c_combo=c_combo,
+            c_price=pool.price[c_combo].sum(axis=1),
+        )
+
+    def driver_points(self, points: np.ndarray, boost: tuple[float, ...] = ()) -> np.ndarray:
+        return combo_points(points, self.d_combo, boost)
+
+    def constructor_points(self, points: np.ndarray) -> np.ndarray:
+        return points[self.c_combo].sum(axis=1)
+
+
+def combo_points(points: np.ndarray, combo: np.ndarray, boost: tuple[float, ...] = ()) -> np.ndarray:
+    """Summed points per combination, plus the boost on its best members (see BOOSTS)."""
+    p = points[combo]
+    out = p.sum(axis=1)
+    if len(boost) == 1:
+        out += boost[0] * p.max(axis=1)
+    elif boost:
+        k = len(boost)
+        top = -np.sort(-np.partition(p, p.shape[1] - k, axis=1)[:, -k:], axis=1)
+        out += top @ np.asarray(boost)
+    return out
+
+
+def boosted(pool: Pool, drivers: list[int], boost: tuple[float, ...]) -> list[str]:
+    """The drivers that get the boost multiples, in `boost` order (best projection first)."""
+    best = sorted(drivers, key=lambda a: -pool.points[a])
+    return [pool.ids[a] for a in best[: len(boost)]]
+
+
+@dataclass
+class Team:
+    drivers: list[str]
+    constructors: list[str]
+    price: int  # tenths
+    points: float  # boost included
+    notes: list[str] = field(default_factory=list)
+    boost: list[str] = field(default_factory=list)  # boosted drivers, in BOOSTS order
+
+    @property
+    def price_m(self) -> float:
+        return self.price / 10.0
+
+
+def best_constructors_under(c_price: np.ndarray, c_points: np.ndarray):
+    """Return (sorted_prices, best_points_prefix, best_pair_prefix) for budget lookups.
+
+    `best_points_prefix[k]` is the best constructor-pair score among the k+1 cheapest pairs,
+    so the best pair under a remaining budget `b` is at `searchsorted(sorted_prices, b, 'right') - 1`.
+    """
+    order = np.argsort(c_price, kind="stable")
+    sp = c_price[order]
+    pts = c_points[order]
+    best = np.maximum.accumulate(pts)
+    # Index (into the sorted order) of the running maximum.
+    is_new_max = np.concatenate(([True], pts[1:] > best[:-1]))
+    arg = np.maximum.accumulate(np.where(is_new_max, np.arange(len(pts)), 0))
+    return sp, best, order[arg]
+
+
+def top_rows(total: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the `n` best finite scores, best first (ties: lowest index first)."""
+    n = min(n, int(np.isfinite(total).sum()))
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.argsort(-total, kind="stable")[:n]
+
+
+def teams_for_rows(
+    pool: Pool,
+    index: ComboIndex,
+    rows: np.ndarray,
+    total: np.ndarray,
+    c_points: np.ndarray,
+    budget: int,
+    boost: tuple[float, ...] = (),
+) -> list[Team]:
+    """Materialize teams for the given driver sets (pairing each with its best affordable constructors)."""
+    sp, _, pair = best_constructors_under(index.c_price, c_points)
+    k = np.searchsorted(sp, budget - index.d_price[rows], side="right") - 1
+    teams = []
+    for di, ki in zip(rows, k):
+        ci = pair[ki]
+        teams.append(
+            Team(
+                drivers=[pool.ids[a] for a in index.d_combo[di]],
+                constructors=[pool.ids[a] for a in index.c_combo[ci]],
+                price=int(index.d_price[di] + index.c_price[ci]),
+                points=float(total[di]),
+                boost=boosted(pool, index.d_combo[di].tolist(), boost),
+            )
+        )
+    return teams
+
+
+def score_driver_sets(index: ComboIndex, d_points: np.ndarray, c_points: np.ndarray, budget: int, rows=None) -> np.ndarray:
+    """Best score (driver set + best affordable constructor pair) per driver set; -inf if none fits."""
+    rows = np.arange(len(d_points)) if rows is None else rows
+    sp, best, _ = best_constructors_under(index.c_price, c_points)
+    k = np.searchsorted(sp, budget - index.d_price[rows], side="right") - 1
+    out = np.full(len(rows), -np.inf)
+    ok = k >= 0
+    out[ok] = d_points[rows[ok]] + best[k[ok]]
+    return out
+
+
+def solve_index(
+    pool: Pool,
+    index: ComboIndex,
+    budget: int = BUDGET,
+    *,
+    top: int = 1,
+    d_points: np.ndarray | None = None,
+    c_points: np.ndarray | None = None,
+    boost: tuple[float, ...] = (),
+) -> list[Team]:
+    """Best `top` teams (distinct driver sets) under `budget` tenths.
+
+    `d_points`, if given, must already include `boost`.
+    """
+    if d_points is None:
+        d_points = index.driver_points(pool.points, boost)
+    if c_points is None:
+        c_points = index.constructor_points(pool.points)
+    total = score_driver_sets(index, d_points, c_points, budget)
+    return teams_for_rows(pool, index, top_rows(total, top), total, c_points, budget, boost)
+
+
+def solve(pool: Pool, budget: int = BUDGET, *, top: int = 1, boost: tuple[float, ...] = ()) -> list[Team]:
+    return solve_index(pool, ComboIndex.build(pool), budget, top=top, boost=boost)
+
+
+def _asset_lookup(pool: Pool) -> dict[str, int]:
+    lookup: dict[str, int] = {}
+    for i, (aid, ab) in enumerate(zip(pool.ids, pool.abbr)):
+        lookup[aid] = i
+        lookup.setdefault(ab, i)
+    return lookup
+
+
+def score_team(pool: Pool, drivers: list[str], constructors: list[str], boost: tuple[float, ...] = ()) -> Team:
+    """Price and expected points (boost included) of a given team (ids or 3-letter codes).
+
+    Raises ValueError unless it is 5 distinct drivers and 2 distinct constructors, all
+    priced this round.
+    """
+    lookup = _asset_lookup(pool)
+    try:
+        d = [lookup[x.strip().upper()] for x in drivers]
+        c = [lookup[x.strip().upper()] for x in constructors]
+    except KeyError as e:
+        raise ValueError(f"Unknown asset {e.args[0]!r} for this round") from None
+    if any(not pool.is_driver[i] for i in d) or any(pool.is_driver[i] for i in c):
+        raise ValueError("drivers/constructors mixed up")
+    if len(set(d)) != N_DRIVERS or len(d) != N_DRIVERS or len(set(c)) != N_CONSTRUCTORS or len(c) != N_CONSTRUCTORS:
+        raise ValueError(f"A team is {N_DRIVERS} distinct drivers and {N_CONSTRUCTORS} distinct constructors")
+    idx = d + c
+    return Team(
+        drivers=[pool.ids[i] for i in d],
+        constructors=[pool.ids[i] for i in c],
+        price=int(pool.price[idx].sum()),
+        points=float(combo_points(pool.points, np.array([d]), boost)[0] + pool.points[c].sum()),
+        boost=boosted(pool, d, boost),
+    )
+
+
+@dataclass
+class Constraints:
+    """Start from a current team: locked assets, excluded assets and a transfer cap.
+
+    Assets are ids or 3-letter codes. A transfer is a current asset that is dropped;
+    current assets that are not priced this round are gone anyway and cost nothing.
+    """
+
+    drivers: list[str] = field(default_factory=list)  # current team
+    constructors: list[str] = field(default_factory=list)
+    lock: list[str] = field(default_factory=list)
+    exclude: list[str] = field(default_factory=list)
+    max_transfers: int | None = None
+
+    @property
+    def empty(self) -> bool:
+        return not (self.lock or self.exclude or self.max_transfers is not None)
+
+    @classmethod
+    def from_json(cls, path: Path) -> "Constraints":
+        """`{"drivers": [...], "constructors": [...], "lock": [...], "exclude": [...], "max_transfers": 2}`"""
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        unknown = set(raw) - {f.name for f in dataclasses.fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown constraint keys in {path}: {', '.join(sorted(unknown))}")
+        return cls(**raw)
+
+
+@dataclass
+class ConstrainedIndex:
+    """Only the combinations that satisfy the constraints, with their transfer counts."""
+
+    index: ComboIndex
+    d_transfers: np.ndarray  # int [Nd]: current drivers dropped
+    c_transfers: np.ndarray  # int [Nc]
+    max_transfers: int | None
+    held: list[int]  # pool positions of the current team that are priced this round
+
+    @classmethod
+    def build(cls, pool: Pool, constraints: Constraints) -> "ConstrainedIndex":
+        lookup = _asset_lookup(pool)
+
+        def positions(keys: list[str], what: str | None = None) -> set[int]:
+            out = set()
+            for k in keys:
+                i = lookup.get(k.strip().upper())
+                if i is None and what:
+                    raise ValueError(f"{what} asset {k!r} is not priced this round")
+                if i is not None:
+                    out.add(i)
+            return out
+
+        lock = positions(constraints.lock, "Locked")
+        exclude = positions(constraints.exclude)
+        if lock & exclude:
+            raise ValueError("Assets both locked and excluded: " + ", ".join(pool.ids[i] for i in sorted(lock & exclude)))
+        current = positions(constraints.drivers + constraints.constructors)
+        t_max = constraints.max_transfers
+
+        def combos(members: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+            members = set(members.tolist())
+            locked = sorted(lock & members)
+            if len(locked) > k:
+                raise ValueError(f"{len(locked)} assets locked but a team has only {k} of that kind")
+            free = members - lock - exclude
+            keep_pool = sorted(free & current)
+            new_pool = sorted(free - current)
+            need = k - len(locked)
+            # Picking j new assets keeps (need - j) free current ones; prune on transfers while enumerating.
+            held_free = len(current & members) - len(current & set(locked))
+            rows, transfers = [], []
+            for j in range(need + 1):
+                dropped = held_free - (need - j)
+                if dropped < 0 or (t_max is not None and dropped > t_max):
+                    continue
+                for new in itertools.combinations(new_pool, j):
+                    for kept in itertools.combinations(keep_pool, need - j):
+                        rows.append(sorted(locked + list(new) + list(kept)))
+                        transfers.append(dropped)
+            if not rows:
+                return np.zeros((0, k), dtype=np.int32), np.zeros(0, dtype=np.int32)
+            combo = np.array(rows, dtype=np.int32)
+            # Same order as itertools.combinations over the pool, so ties break like an unconstrained solve.
+            order = np.lexsort(combo.T[::-1])
+            return combo[order], np.array(transfers, dtype=np.int32)[order]
+
+        d_combo, d_transfers = combos(pool.drivers, N_DRIVERS)
+        c_combo, c_transfers = combos(pool.constructors, N_CONSTRUCTORS)
+        index = ComboIndex(
+            d_combo=d_combo,
+            d_price=pool.price[d_combo].sum(axis=1),
+            c_combo=c_combo,
+            c_price=pool.price[c_combo].sum(axis=1),
+        )
+        return cls(index=index, d_transfers=d_transfers, c_transfers=c_transfers, max_transfers=t_max, held=sorted(current))
+
+    def levels(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """(driver rows, mask of the constructor pairs those rows can still afford in transfers)."""
+        if self.max_transfers is None:
+            return [(np.arange(len(self.d_transfers)), np.ones(len(self.c_transfers), dtype=bool))]
+        left = self.max_transfers - self.d_transfers
+        return [(np.flatnonzero(left == m), self.c_transfers <= m) for m in np.unique(left)]
+
+
+def solve_constrained(
+    pool: Pool, constraints: Constraints, budget: int = BUDGET, *, top: int = 1, boost: tuple[float, ...] = ()
+) -> list[Team]:
+    """Best `top` teams that respect the locks, exclusions and transfer cap.
+
+    Constraints shrink the combination index itself (nothing is filtered after
+    scoring), so the more constrained the query, the less there is to score.
+    """
+    ci = ConstrainedIndex.build(pool, constraints)
+    index = ci.index
+    d_points = index.driver_points(pool.points, boost)
+    c_points = index.constructor_points(pool.points)
+    total = np.full(len(d_points), -np.inf)
+    levels = []
+    for rows, ok in ci.levels():
+        if not ok.any():
+            continue
+        sub = ComboIndex(d_combo=index.d_combo, d_price=index.d_price, c_combo=index.c_combo[ok], c_price=index.c_price[ok])
+        total[rows] = score_driver_sets(sub, d_points, c_points[ok], budget, rows)
+        levels.append((rows, sub, c_points[ok]))
+
+    best = top_rows(total, top)
+    found = []
+    for rows, sub, cp in levels:
+        mine = best[np.isin(best, rows)]
+        found += zip(mine.tolist(), teams_for_rows(pool, sub, mine, total, cp, budget, boost))
+    teams = [t for _, t in sorted(found, key=lambda rt: (-rt[1].points, rt[0]))]
+
+    if ci.held:
+        held = [pool.ids[i] for i in ci.held]
+        for t in teams:
+            out = [a for a in held if a not in t.drivers and a not in t.constructors]
+            new = [a for a in t.drivers + t.constructors if a not in held]
+            t.notes.append(f"transfers: {len(out)}" + (f" (out: {' '.join(out)}; in: {' '.join(new)})" if out else ""))
+    return teams
+
+
+def frontier(pool: Pool, budgets: list[int], index: ComboIndex | None = None) -> list[tuple[int, Team | None]]:
+    """Best team at each budget (tenths)."""
+    index = index or ComboIndex.build(pool)
+    d_points = index.driver_points(pool.points)
+    c_points = index.constructor_points(pool.points)
+    out = []
+    for b in budgets:
+        teams = solve_index(pool, index, b, d_points=d_points, c_points=c_points)
+        out.append((b, teams[0] if teams else None))
+    return out
+
+
+def recommendation_rows(season: int, rnd: int, teams: list[Team]) -> list[dict]:
+    return [
+        {
+            "season": season,
+            "round": rnd,
+            "team_name": f"Team {i}",
+            "drivers": "|".join(t.drivers),
+            "constructors": "|".join(t.constructors),
+            "total_price": f"{t.price_m:.1f}",
+            "expected_points": f"{t.points:.2f}",
+            "drs_boost": t.boost[-1] if t.boost else "",
+            "chip_suggestion": f"3x boost: {t.boost[0]}" if len(t.boost) > 1 else "",
+            "notes": "; ".join(t.notes),
+        }
+        for i, t in enumerate(teams, start=1)
+    ]
+
+
+def _asset_position(pool: Pool, key: str) -> int:
+    key = key.strip().upper()
+    for i, (aid, ab) in enumerate(zip(pool.ids, pool.abbr)):
+        if key in (aid, ab):
+            return i
+    raise SystemExit(f"Unknown asset {key!r} for this round")
+
+
+def apply_overrides(pool: Pool, prices: list[str], points: list[str]) -> Pool:
+    """What-if edits: `ID=VALUE` pairs for price (millions) and projected points."""
+    for spec in prices:
+        key, _, value = spec.partition("=")
+        pool.price[_asset_position(pool, key)] = to_tenths(value)
+    for spec in points:
+        key, _, value = spec.partition("=")
+        pool.points[_asset_position(pool, key)] = float(value)
+    return pool
+
+
+def _split(values: list[str]) -> list[str]:
+    return [x.strip() for v in values for x in v.split(",") if x.strip()]
+
+
+def parse_constraints(args: argparse.Namespace) -> Constraints:
+    c = Constraints.from_json(Path(args.constraints)) if args.constraints else Constraints()
+    c.drivers = _split(c.drivers + [args.current_drivers])
+    c.constructors = _split(c.constructors + [args.current_constructors])
+    c.lock = _split(c.lock + args.lock)
+    c.exclude = _split(c.exclude + args.exclude)
+    if args.max_transfers is not None:
+        c.max_transfers = args.max_transfers
+    return c
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, default=2025)
+    ap.add_argument("--round", type=int, required=True)
+    ap.add_argument("--budget", type=float, default=BUDGET / 10, help="Budget cap in millions (default 100)")
+    ap.add_argument("--window", type=int, default=3, help="Rounds in the rolling projection")
+    ap.add_argument("--projection", choices=["rolling", "actual"], default="rolling")
+    ap.add_argument("--top", type=int, default=5, help="Number of teams to write")
+    ap.add_argument(
+        "--boost",
+        choices=list(BOOSTS),
+        help="DRS boost chosen with the team: 2x (default), 3x = the 3x chip plus the 2x boost, none",
+    )
+    ap.add_argument("--set-price", action="append", default=[], metavar="ID=M", help="What-if price override (repeatable)")
+    ap.add_argument("--set-points", action="append", default=[], metavar="ID=PTS", help="What-if projection override (repeatable)")
+    ap.add_argument("--current-drivers", default="", help="Current team drivers (comma-separated ids or codes)")
+    ap.add_argument("--current-constructors", default="", help="Current team constructors (comma-separated)")
+    ap.add_argument("--lock", action="append", default=[], metavar="ID[,ID]", help="Assets the team must keep (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], metavar="ID[,ID]", help="Assets never to pick (repeatable)")
+    ap.add_argument("--max-transfers", type=int, default=None, help="At most this many current assets dropped")
+    ap.add_argument("--constraints", help="JSON file with drivers/constructors/lock/exclude/max_transfers (flags add to it)")
+    ap.add_argument("--risk", choices=["mean", "variance", "cvar"], help="Score teams over a scenario matrix (see src/risk.py)")
+    ap.add_argument("--alpha", type=float, default=0.1, help="With --risk: CVaR tail share")
+    ap.add_argument("--risk-aversion", type=float, default=0.01, help="With --risk variance: penalty per unit of variance")
+    ap.add_argument("--scenarios", type=int, default=2000, help="With --risk: bootstrap scenarios to draw")
+    ap.add_argument("--lookback", type=int, default=8, help="With --risk: past rounds to resample")
+    ap.add_argument("--scenario-file", help="With --risk: scenario x asset CSV instead of the bootstrap")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--time-budget-ms", type=int, help="Anytime multi-round planner with this time budget (see src/anytime.py)")
+    ap.add_argument("--horizon", type=int, default=1, help="With --time-budget-ms: rounds to plan")
+    ap.add_argument("--free-transfers", type=int, default=2, help="With --time-budget-ms: free transfers per round")
+    ap.add_argument("--penalty", type=float, default=10.0, help="With --time-budget-ms: points per extra transfer")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="With --time-budget-ms: worker processes")
+    ap.add_argument("--sensitivity", action="store_true", help="Also write per-asset breakpoints (see src/sensitivity.py)")
+    ap.add_argument("--warm", action="store_true", help="Re-solve from the saved state for this round (see src/warmstart.py)")
+    ap.add_argument("--verify", action="store_true", help="With --warm: also run a full solve and check both agree")
+    args = ap.parse_args()
+
+    data = load_season(args.season)
+    pool = round_pool(data, args.round, window=args.window, mode=args.projection)
+    apply_overrides(pool, args.set_price, args.set_points)
+    budget = to_tenths(args.budget)
+    constraints = parse_constraints(args)
+    if constraints.max_transfers is not None and not (constraints.drivers or constraints.constructors):
+        raise SystemExit("--max-transfers needs the current team (--current-drivers / --current-constructors)")
+
+    if args.sensitivity and (args.risk or args.warm or not constraints.empty):
+        raise SystemExit("--sensitivity applies to the plain best team (no --risk, --warm or constraints)")
+    if args.boost not in (None, "none") and (args.risk or args.sensitivity):
+        raise SystemExit("--risk and --sensitivity score teams without the DRS boost (use --boost none)")
+    if args.boost not in (None, "2x") and args.time_budget_ms is not None:
+        raise SystemExit("The anytime planner always plays the 2x boost")
+    boost = BOOSTS[args.boost or ("none" if args.risk or args.sensitivity else "2x")]
+
+    derived = ROOT / "data" / "seasons" / str(args.season) / "derived"
+    if args.time_budget_ms is not None:
+        from . import anytime
+
+        if args.risk or args.warm or args.sensitivity:
+            raise SystemExit("--time-budget-ms does not combine with --risk, --warm or --sensitivity")
+        try:
+            problem = anytime.PlanProblem.build(
+                data,
+                args.round,
+                horizon=args.horizon,
+                window=args.window,
+                mode=args.projection,
+                budget=budget,
+                constraints=constraints,
+                free_transfers=args.free_transfers,
+                penalty=args.penalty,
+            )
+            result = anytime.solve_anytime(problem, time_budget_ms=args.time_budget_ms, workers=args.workers, seed=args.seed)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        rows = anytime.plan_rows(problem, result)
+        gap = f"gap {result.gap:.2f} ({result.gap / result.bound * 100 if result.bound else 0:.2f}%)"
+        print(
+            f"anytime: {result.score:.2f} pts over {problem.horizon} round(s), bound {result.bound:.2f}, {gap}; "
+            f"{result.iterations} moves on {result.workers} worker(s) in {result.elapsed_ms:.0f} ms"
+        )
+        for r in rows:
+            print(
+                f"  R{r['round']:<3} {r['expected_points']:>7}  {r['total_price']:>5}M  transfers {r['transfers']} "
+                f"(-{r['penalty_points']})  {r['drivers'].replace('|', ' ')} | {r['constructors'].replace('|', ' ')}  x2 {r['drs_boost']}"
+            )
+        first = rows[0]
+        team = Team(
+            drivers=first["drivers"].split("|"),
+            constructors=first["constructors"].split("|"),
+            price=to_tenths(first["total_price"]),
+            points=float(first["expected_points"]),
+            notes=[f"anytime plan: {result.score:.2f} over {problem.horizon} round(s), bound {result.bound:.2f}, {gap}"],
+        )
+        recs = recommendation_rows(args.season, args.round, [team])
+        recs[0]["drs_boost"] = first["drs_boost"]
+        out = derived / "team_recommendations.csv"
+        write_csv(out, recs, RECOMMENDATION_FIELDS)
+        write_csv(derived / "team_plan.csv", rows, anytime.PLAN_FIELDS)
+        print("Wrote", out, "and", derived / "team_plan.csv")
+        return 0
+
+    if args.sensitivity:
+        from . import sensitivity
+
+        # Unboosted breakpoints describe the unboosted best team, so they get their own
+        # output and the (boosted) recommendations of a normal run are not replaced.
+        t0 = time.perf_counter()
+        best, margins = sensitivity.breakpoints(pool, budget)
+        if best is None:
+            raise SystemExit("No team fits the budget")
+        rows = sensitivity.sensitivity_rows(args.season, args.round, pool, margins)
+        out = derived / "team_sensitivity.csv"
+        write_csv(out, rows, sensitivity.SENSITIVITY_FIELDS)
+        print(f"{best.points:8.2f}  {best.price_m:5.1f}M  {' '.join(best.drivers)} | {' '.join(best.constructors)}  (no boost)")
+        print(f"Breakpoints for {len(rows)} assets in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        print("Wrote", out)
+        return 0
+
+    if args.risk:
+        from . import risk
+
+        if args.warm or not constraints.empty:
+            raise SystemExit("--risk does not combine with --warm or constraints")
+        t0 = time.perf_counter()
+        if args.scenario_file:
+            scenarios = risk.load_scenarios(Path(args.scenario_file), pool)
+        else:
+            scenarios = risk.bootstrap_scenarios(data, args.round, pool, n=args.scenarios, lookback=args.lookback, seed=args.seed)
+        teams, stats = risk.solve_risk(
+            pool, scenarios, budget, objective=args.risk, alpha=args.alpha, risk_aversion=args.risk_aversion, top=args.top
+        )
+        print(f"{args.risk} solve in {(time.perf_counter() - t0) * 1000:.1f} ms: {stats}")
+    elif not constraints.empty:
+        if args.warm:
+            raise SystemExit("--warm does not support locks / exclusions / transfer limits")
+        try:
+            teams = solve_constrained(pool, constraints, budget, top=args.top, boost=boost)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        if not teams:
+            raise SystemExit("No team satisfies the constraints under this budget")
+    elif args.warm:
+        from .warmstart import warm_solve
+
+        t0 = time.perf_counter()
+        teams, stats = warm_solve(args.season, args.round, pool, budget, top=args.top, boost=boost)
+        print(f"{stats['mode']} solve in {(time.perf_counter() - t0) * 1000:.1f} ms: {stats}")
+        if args.verify:
+            t0 = time.perf_counter()
+            full = solve(pool, budget, top=args.top, boost=boost)
+            print(f"full solve in {(time.perf_counter() - t0) * 1000:.1f} ms")
+            got = [(t.drivers, t.constructors, t.price, t.points, t.boost) for t in teams]
+            want = [(t.drivers, t.constructors, t.price, t.points, t.boost) for t in full]
+            if got != want:
+                raise SystemExit("Warm-started result differs from a full solve")
+            print("verify: warm-started result matches a full solve")
+    else:
+        teams = solve(pool, budget, top=args.top, boost=boost)
+
+    out = derived / "team_recommendations.csv"
+    write_csv(out, recommendation_rows(args.season, args.round, teams), RECOMMENDATION_FIELDS)
+    for t in teams:
+        x = "".join(f"  x{len(t.boost) + 1 - i} {a}" for i, a in enumerate(t.boost))
+        print(f"{t.points:8.2f}  {t.price_m:5.1f}M  {' '.join(t.drivers)} | {' '.join(t.constructors)}{x}")
+    print("Wrote", out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+"""Write season tables as one CSV per (season, round) for Power BI incremental refresh.
+
+The raw outputs are one file per season (or one combined file under mycsv/), so
+Power BI reloads everything on every refresh. This writes each table as
+round partitions plus a manifest, and only rewrites partitions whose content
+changed:
+
+  outputs/partitions/<table>/<season>/<table>_<season>_R<round>.csv
+  outputs/partitions/_manifest.csv
+
+Manifest columns:
+- table, season, round, season_round, path (relative to outputs/partitions/)
+- rows, sha256, raceDate (from dim_round_dates.csv, used as the refresh-range key)
+- updated_at (UTC, only bumped when the partition content changed; raceDate and
+  season_round are refreshed on every run)
+
+See `powerbi/incremental_refresh.md` for the Power Query folder-source pattern.
+
+Usage:
+  python -m src.partitions --season 2025
+  python -m src.partitions --season 2023 --season 2024 --season 2025
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .fact_table import align_rounds
+
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "outputs" / "partitions"
+MANIFEST = OUT / "_manifest.csv"
+
+MANIFEST_FIELDS = ["table", "season", "round", "season_round", "path", "rows", "sha256", "raceDate", "updated_at"]
+
+# Round-grained tables (file stem under data/seasons/<season>/raw or derived/).
+TABLES = [
+    ("raw", "f1fantasytools_prices_drivers_long"),
+    ("raw", "f1fantasytools_prices_constructors_long"),
+    ("raw", "f1fantasytools_points_drivers_long"),
+    ("raw", "f1fantasytools_points_constructors_long"),
+    ("raw", "f1_official_driver_race_points"),
+    ("raw", "f1_official_constructor_race_points"),
+    ("raw", "f1_official_driver_standings"),
+    ("raw", "f1_official_constructor_standings"),
+    ("derived", "fact_asset_round"),
+]
+
+
+def _read_table(path: Path) -> tuple[list[str], dict[int, list[list[str]]]]:
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        by_round: dict[int, list[list[str]]] = defaultdict(list)
+        if "round" not in header:
+            # Empty / header-only export (e.g. a season without sprint results): no rounds.
+            return header, by_round
+        idx = header.index("round")
+        for row in reader:
+            if row:
+                by_round[int(row[idx])].append(row)
+    return header, by_round
+
+
+def _render(header: list[str], rows: list[list[str]]) -> bytes:
+    buf = io.StringIO(newline="")
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(header)
+    w.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def load_manifest() -> dict[tuple[str, str, str], dict]:
+    if not MANIFEST.exists():
+        return {}
+    with MANIFEST.open("r", encoding="utf-8", newline="") as f:
+        return {(r["table"], r["season"], r["round"]): r for r in csv.DictReader(f)}
+
+
+def write_manifest(entries: dict[tuple[str, str, str], dict]) -> None:
+    OUT.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST.with_name(MANIFEST.name + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS, lineterminator="\n")
+        w.writeheader()
+        for key in sorted(entries, key=lambda k: (k[0], int(k[1]), int(k[2]))):
+            w.writerow(entries[key])
+    os.replace(tmp, MANIFEST)
+
+
+def _race_dates(season: int) -> dict[int, str]:
+    path = ROOT / "data" / "seasons" / str(season) / "raw" / "dim_round_dates.csv"
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        return {int(r["round"]): r.get("raceDate") or "" for r in csv.DictReader(f)}
+
+
+def partition_season(season: int, manifest: dict[tuple[str, str, str], dict]) -> tuple[int, int, int]:
+    """Update partitions for one season in place. Returns (written, unchanged, removed)."""
+    base = ROOT / "data" / "seasons" / str(season)
+    dates = _race_dates(season)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    written = unchanged = removed = 0
+
+    for folder, table in TABLES:
+        src = base / folder / f"{table}.csv"
+        if not src.exists():
+            continue
+        header, by_round = _read_table(src)
+        if table.startswith("f1fantasytools_") or table == "fact_asset_round":
+            # f1fantasytools numbering can differ from Ergast's (cancelled races).
+            aligned = align_rounds(list(by_round), list(dates) or list(by_round))
+            round_dates = {r: dates.get(er, "") for r, er in aligned.items()}
+        else:
+            round_dates = dates
+
+        for rnd, rows in sorted(by_round.items()):
+            rel = f"{table}/{season}/{table}_{season}_R{rnd:02d}.csv"
+            data = _render(header, rows)
+            digest = hashlib.sha256(data).hexdigest()
+            key = (table, str(season), str(rnd))
+            prev = manifest.get(key)
+            path = OUT / rel
+            if prev and prev["sha256"] == digest and path.exists():
+                # The data file is current, but the dates may have been fetched / corrected since.
+                prev["season_round"] = f"{season}-R{rnd:02d}"
+                prev["raceDate"] = round_dates.get(rnd, "")
+                unchanged += 1
+                continue
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            manifest[key] = {
+                "table": table,
+                "season": season,
+                "round": rnd,
+                "season_round": f"{season}-R{rnd:02d}",
+                "path": rel,
+                "rows": len(rows),
+                "sha256": digest,
+                "raceDate": round_dates.get(rnd, ""),
+                "updated_at": now,
+            }
+            written += 1
+
+        # Rounds that disappeared from the source table.
+        for key in [k for k in manifest if k[0] == table and k[1] == str(season) and int(k[2]) not in by_round]:
+            (OUT / manifest.pop(key)["path"]).unlink(missing_ok=True)
+            removed += 1
+
+    return written, unchanged, removed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, action="append", help="Season to partition (repeatable, default 2025)")
+    args = ap.parse_args()
+
+    manifest = load_manifest()
+    for season in args.season or [2025]:
+        written, unchanged, removed = partition_season(season, manifest)
+        print(f"Season {season}: wrote {written} partitions, {unchanged} unchanged, {removed} removed")
+    write_manifest(manifest)
+    print("Manifest:", MANIFEST)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
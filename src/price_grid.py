@@ -0,0 +1,259 @@
+"""Integer price-grid knapsack index: best team at every budget for one round.
+
+Prices move in 0.1M steps, so with integer tenths the budget axis is a small grid
+(0 .. ~2000). For each pool (drivers, constructors) a cardinality-constrained 0/1
+knapsack DP gives the best k-set at every *exact* cost; a running maximum turns
+that into "best k-set costing at most b". The best team under budget X is then
+
+  max over b of  best_drivers[b] + best_constructors[X - b]
+
+a single O(X) pass, instead of a search over all driver sets. The DP keeps the
+per-item "take" decisions so the chosen sets can be read back.
+
+Indexes are stored per (season, round, projection) next to the derived CSVs:
+
+  data/seasons/<season>/derived/price_grid/R<round>_<projection>.npz
+
+and rebuilt only when the round's prices (or the projection feeding them) change
+(a digest of ids, prices and points is kept in the file).
+
+Usage:
+  python -m src.price_grid --season 2025 --round 10 --min 90 --max 102 --step 0.5
+  python -m src.price_grid --season 2025 --all-rounds --verify   # build every round, check vs the optimizer
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from . import optimizer as opt
+
+
+ROOT = Path(__file__).resolve().parents[1]
+GRID_VERSION = 1
+
+
+def grid_path(season: int, rnd: int, window: int, mode: str, root: Path = ROOT) -> Path:
+    name = f"R{rnd:02d}_{mode}{window}.npz" if mode == "rolling" else f"R{rnd:02d}_{mode}.npz"
+    return root / "data" / "seasons" / str(season) / "derived" / "price_grid" / name
+
+
+def pool_digest(pool: opt.Pool) -> str:
+    h = hashlib.sha256()
+    h.update("\0".join(pool.ids).encode("utf-8"))
+    h.update(np.ascontiguousarray(pool.is_driver, dtype=np.bool_).tobytes())
+    h.update(np.ascontiguousarray(pool.price, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(pool.points, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+@dataclass
+class KnapsackTable:
+    """Best k-subset of items by cost: `best[b]` = max points with total price <= b (tenths)."""
+
+    items: np.ndarray  # pool positions of the items
+    price: np.ndarray  # int [n]
+    take: np.ndarray  # bool [n, k + 1, C + 1]: item i taken in the optimum for (count, exact cost)
+    best: np.ndarray  # float [C + 1]; -inf if no k-set fits
+    cost: np.ndarray  # int [C + 1]: exact cost of that k-set (-1 if none)
+
+    @classmethod
+    def build(cls, items: np.ndarray, price: np.ndarray, points: np.ndarray, k: int) -> "KnapsackTable":
+        n = len(items)
+        cap = int(np.sort(price)[::-1][:k].sum()) if n >= k else 0
+        dp = np.full((k + 1, cap + 1), -np.inf)
+        dp[0, 0] = 0.0
+        take = np.zeros((n, k + 1, cap + 1), dtype=bool)
+        for i in range(n):
+            p, v = int(price[i]), float(points[i])
+            cand = dp[:-1, : cap + 1 - p] + v
+            improve = cand > dp[1:, p:]  # strict: earlier items win ties
+            dp[1:, p:][improve] = cand[improve]
+            take[i, 1:, p:] = improve
+        exact = dp[k]
+        best = np.maximum.accumulate(exact)
+        is_new_max = np.concatenate(([True], exact[1:] > best[:-1]))
+        cost = np.maximum.accumulate(np.where(is_new_max, np.arange(cap + 1), 0))
+        cost[~np.isfinite(best)] = -1
+        return cls(items=np.asarray(items, dtype=np.int32), price=np.asarray(price, dtype=np.int32), take=take, best=best, cost=cost)
+
+    @property
+    def cap(self) -> int:
+        return len(self.best) - 1
+
+    def lookup(self, budget: int) -> tuple[float, int]:
+        """(best points, exact cost) of the best k-set costing at most `budget`."""
+        b = min(max(budget, -1), self.cap)
+        if b < 0:
+            return -np.inf, -1
+        return float(self.best[b]), int(self.cost[b])
+
+    def members(self, cost: int) -> list[int]:
+        """Pool positions of the optimal k-set with exactly `cost`."""
+        k = self.take.shape[1] - 1
+        out = []
+        for i in range(len(self.items) - 1, -1, -1):
+            if k and self.take[i, k, cost]:
+                out.append(int(self.items[i]))
+                cost -= int(self.price[i])
+                k -= 1
+        return out[::-1]
+
+
+@dataclass
+class PriceGrid:
+    digest: str
+    ids: list[str]
+    price: np.ndarray
+    points: np.ndarray
+    drivers: KnapsackTable
+    constructors: KnapsackTable
+
+    @classmethod
+    def build(cls, pool: opt.Pool) -> "PriceGrid":
+        d, c = pool.drivers, pool.constructors
+        if len(d) < opt.N_DRIVERS or len(c) < opt.N_CONSTRUCTORS:
+            raise SystemExit(f"Not enough assets priced ({len(d)} drivers, {len(c)} constructors)")
+        return cls(
+            digest=pool_digest(pool),
+            ids=list(pool.ids),
+            price=pool.price.copy(),
+            points=pool.points.copy(),
+            drivers=KnapsackTable.build(d, pool.price[d], pool.points[d], opt.N_DRIVERS),
+            constructors=KnapsackTable.build(c, pool.price[c], pool.points[c], opt.N_CONSTRUCTORS),
+        )
+
+    def best_scores(self, budget: int) -> np.ndarray:
+        """Team score for every split b (drivers <= b, constructors <= budget - b), b = 0..min(budget, cap)."""
+        top = min(budget, self.drivers.cap)
+        if top < 0:
+            return np.zeros(0)
+        b = np.arange(top + 1)
+        rest = np.minimum(budget - b, self.constructors.cap)
+        return self.drivers.best[b] + self.constructors.best[rest]
+
+    def best_team(self, budget: int) -> opt.Team | None:
+        scores = self.best_scores(budget)
+        if not len(scores) or not np.isfinite(scores).any():
+            return None
+        b = int(np.argmax(scores))
+        _, d_cost = self.drivers.lookup(b)
+        _, c_cost = self.constructors.lookup(budget - b)
+        d = self.drivers.members(d_cost)
+        c = self.constructors.members(c_cost)
+        return opt.Team(
+            drivers=[self.ids[i] for i in d],
+            constructors=[self.ids[i] for i in c],
+            price=d_cost + c_cost,
+            points=float(self.points[d].sum() + self.points[c].sum()),
+        )
+
+    def frontier(self, budgets: list[int]) -> list[tuple[int, opt.Team | None]]:
+        return [(b, self.best_team(b)) for b in budgets]
+
+    # --- persistence ---
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp.npz")
+        arrays = {}
+        for name, t in (("d", self.drivers), ("c", self.constructors)):
+            arrays.update({f"{name}_{f}": getattr(t, f) for f in ("items", "price", "take", "best", "cost")})
+        np.savez(
+            tmp,
+            version=GRID_VERSION,
+            digest=self.digest,
+            ids=np.array(self.ids),
+            price=self.price,
+            points=self.points,
+            **arrays,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "PriceGrid | None":
+        if not path.exists():
+            return None
+        with np.load(path) as z:
+            if int(z["version"]) != GRID_VERSION:
+                return None
+            tables = {
+                name: KnapsackTable(**{f: z[f"{name}_{f}"] for f in ("items", "price", "take", "best", "cost")})
+                for name in ("d", "c")
+            }
+            return cls(
+                digest=str(z["digest"]),
+                ids=[str(x) for x in z["ids"]],
+                price=z["price"],
+                points=z["points"],
+                drivers=tables["d"],
+                constructors=tables["c"],
+            )
+
+
+def load_or_build(season: int, rnd: int, pool: opt.Pool, *, window: int = 3, mode: str = "rolling") -> tuple[PriceGrid, bool]:
+    """The stored index for this round if it matches `pool`, else a fresh one (saved). Returns (grid, rebuilt)."""
+    path = grid_path(season, rnd, window, mode)
+    grid = PriceGrid.load(path)
+    if grid is not None and grid.digest == pool_digest(pool):
+        return grid, False
+    grid = PriceGrid.build(pool)
+    grid.save(path)
+    return grid, True
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, default=2025)
+    ap.add_argument("--round", type=int, help="Round to index (default: with --all-rounds, every round)")
+    ap.add_argument("--all-rounds", action="store_true")
+    ap.add_argument("--window", type=int, default=3)
+    ap.add_argument("--projection", choices=["rolling", "actual"], default="rolling")
+    ap.add_argument("--min", type=float, default=opt.BUDGET / 10, help="Lowest budget to print (millions)")
+    ap.add_argument("--max", type=float, default=opt.BUDGET / 10, help="Highest budget to print (millions)")
+    ap.add_argument("--step", type=float, default=0.5)
+    ap.add_argument("--verify", action="store_true", help="Check the best score per budget against optimizer.solve")
+    args = ap.parse_args()
+    if args.round is None and not args.all_rounds:
+        raise SystemExit("Pass --round N or --all-rounds")
+
+    data = opt.load_season(args.season)
+    rounds = data.rounds if args.all_rounds else [args.round]
+    budgets = list(range(opt.to_tenths(args.min), opt.to_tenths(args.max) + 1, max(1, opt.to_tenths(args.step))))
+    for rnd in rounds:
+        pool = opt.round_pool(data, rnd, window=args.window, mode=args.projection)
+        t0 = time.perf_counter()
+        grid, rebuilt = load_or_build(args.season, rnd, pool, window=args.window, mode=args.projection)
+        took = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        points = grid.frontier(budgets)
+        per = (time.perf_counter() - t0) * 1000 / max(len(budgets), 1)
+        print(f"R{rnd:02d}: index {'built' if rebuilt else 'loaded'} in {took:.1f} ms, {per:.2f} ms per budget lookup")
+        if not args.all_rounds:
+            for b, t in points:
+                if t is None:
+                    print(f"  {b / 10:5.1f}M  (nothing fits)")
+                else:
+                    print(f"  {b / 10:5.1f}M  {t.points:8.2f}  {t.price_m:5.1f}M  {' '.join(t.drivers)} | {' '.join(t.constructors)}")
+        if args.verify:
+            index = opt.ComboIndex.build(pool)
+            for b, t in points:
+                want = opt.solve_index(pool, index, b)
+                got = t.points if t else None
+                exp = want[0].points if want else None
+                if (got is None) != (exp is None) or (got is not None and not np.isclose(got, exp)):
+                    raise SystemExit(f"R{rnd}: budget {b / 10}M: index gives {got}, optimizer {exp}")
+    if args.verify:
+        print(f"verify: index matches the optimizer on {len(rounds)} round(s) x {len(budgets)} budget(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,428 @@
+"""Compact in-memory tables for the long CSVs.
+
+Rows used to be `list[dict]`: every row carries its own dict with the same string
+keys, and every repeated value ("2025", "RED", "0.0") is a separate string object.
+`Table` stores one list per column instead (struct-of-arrays) and interns values
+per table, so a repeated id / round / price is stored once.
+
+Rows are exposed as `Row` views (`__slots__`, read-only `Mapping`), so code written
+against dict rows (`r["id"]`, `r.get("abbr")`, `csv.DictWriter.writerow(r)`)
+keeps working. `Table.column(name)` gives the raw column list for vectorized use.
+
+Binary cache: `Table.read_csv` keeps a parsed copy next to every CSV
+(`<name>.csv.tbl`, gitignored) and memory-maps it on later loads instead of
+re-parsing the text:
+- one fixed-width uint32 code column per field into an interned string table, so
+  values come back as the exact strings of the CSV
+- a float64 column per field whose values are all numeric (blank = nan), for
+  vectorized readers (`Table.numeric`)
+- the source file's size and sha256, and the payload length (a truncated or
+  half-written cache is rejected); a cache that does not match is rebuilt
+Columns are decoded on first use only, and the mapping is read-only. Loaders that
+read numbers and ids through `Table.numeric` / `Table.codes` (e.g.
+`optimizer.load_season`) use those mapped pages directly, so parallel workers share
+the page cache rather than each holding a parsed copy. Set F1_TABLE_CACHE=0 to
+bypass it.
+
+Benchmarks on a synthetic multi-season dataset (retained memory with tracemalloc,
+then load time: parsing the CSVs vs mapping the cache):
+
+  python -m src.records --seasons 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+
+CACHE_SUFFIX = ".tbl"
+CACHE_MAGIC = b"F1TBL\0\0\2"
+CACHE_PREFIX = struct.Struct("<IQ")  # header length, payload length (blocks + padding)
+CACHE_VERSION = 2
+NULL = 0xFFFFFFFF  # code of a missing trailing value (None, as with DictReader)
+
+
+def _cache_enabled() -> bool:
+    return os.environ.get("F1_TABLE_CACHE", "1") != "0"
+
+
+class Row(Mapping):
+    """Read-only view of one table row."""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: "Table", i: int):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, key: str):
+        return self._table.columns[self._table.positions[key]][self._i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.fields)
+
+    def __len__(self) -> int:
+        return len(self._table.fields)
+
+    def __repr__(self) -> str:
+        return f"Row({dict(self)!r})"
+
+
+class _MappedColumn:
+    """Placeholder for a cached column: decodes itself into the table on first use."""
+
+    __slots__ = ("table", "pos", "codes")
+
+    def __init__(self, table: "Table", pos: int, codes: memoryview):
+        self.table, self.pos, self.codes = table, pos, codes
+
+    def decode(self) -> list:
+        values = self.table._values
+        col = [None if c == NULL else values[c] for c in self.codes]
+        self.table.columns[self.pos] = col
+        return col
+
+    def __getitem__(self, i):
+        return self.decode()[i]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.decode())
+
+
+class Table:
+    """Column-oriented rows with per-table interned string values."""
+
+    __slots__ = ("fields", "positions", "columns", "_strings", "_values", "_numeric", "_map")
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = list(fields)
+        self.positions = {f: i for i, f in enumerate(self.fields)}
+        self.columns: list[list] = [[] for _ in self.fields]
+        self._strings: dict[str, str] = {}
+        self._values: list[str] = []  # cached tables: code -> value
+        self._numeric: dict[str, memoryview] = {}
+        self._map: mmap.mmap | None = None
+
+    def _intern(self, v):
+        if type(v) is str:
+            return self._strings.setdefault(v, v)
+        return v
+
+    def _writable(self) -> None:
+        if self._map is not None:
+            for name in self.fields:
+                self.column(name)
+            self._map = None
+
+    def append(self, row: Mapping) -> None:
+        self._writable()
+        for col, f in zip(self.columns, self.fields):
+            col.append(self._intern(row.get(f, "")))
+
+    def append_values(self, values: Iterable) -> None:
+        """Append one row given in `fields` order; missing trailing values are None, as with DictReader."""
+        self._writable()
+        n = 0
+        for col, v in zip(self.columns, values):
+            col.append(self._intern(v))
+            n += 1
+        for col in self.columns[n:]:
+            col.append(None)
+
+    def column(self, name: str) -> list:
+        col = self.columns[self.positions[name]]
+        return col.decode() if isinstance(col, _MappedColumn) else col
+
+    def numeric(self, name: str) -> memoryview | array | None:
+        """Float64 values of an all-numeric column (blank = nan), else None.
+
+        Zero-copy from the mapped cache when there is one (`np.frombuffer` takes either).
+        """
+        if name in self._numeric:
+            return self._numeric[name]
+        return _as_numeric(self.column(name))
+
+    def codes(self, name: str) -> tuple[memoryview | array, list[str]]:
+        """(uint32 code per row, code -> value) of a column; missing values get NULL.
+
+        Zero-copy from the mapped cache when there is one; loaders that only group or
+        look up by a column (asset ids) never need its decoded strings.
+        """
+        col = self.columns[self.positions[name]]
+        if isinstance(col, _MappedColumn):
+            return col.codes, self._values
+        lookup: dict[str, int] = {}
+        codes = array("I", [NULL if v is None else lookup.setdefault(v, len(lookup)) for v in col])
+        return codes, list(lookup)
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, i: int) -> Row:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return Row(self, i % len(self))
+
+    def __iter__(self) -> Iterator[Row]:
+        return (Row(self, i) for i in range(len(self)))
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    @classmethod
+    def read_csv(cls, path: Path, *, cache: bool = True) -> "Table":
+        """Load a CSV (BOM-tolerant); a missing file gives an empty table.
+
+        With `cache`, a valid `<path>.tbl` is memory-mapped instead of parsing the text,
+        and a missing / stale one is (re)written after parsing.
+        """
+        if not path.exists():
+            return cls([])
+        data = path.read_bytes()
+        cache = cache and _cache_enabled()
+        digest = hashlib.sha256(data).hexdigest()
+        cache_path = path.with_name(path.name + CACHE_SUFFIX)
+        if cache:
+            table = cls.load_cache(cache_path, len(data), digest)
+            if table is not None:
+                return table
+        reader = csv.reader(io.StringIO(data.decode("utf-8-sig"), newline=""))
+        table = cls(next(reader, []))
+        for values in reader:
+            if values:
+                table.append_values(values)
+        if cache:
+            try:
+                table.write_cache(cache_path, len(data), digest)
+            except OSError:
+                pass  # read-only checkout: just parse every time
+        return table
+
+    # --- binary cache ---
+
+    def write_cache(self, path: Path, size: int, digest: str) -> None:
+        """Codes + numeric columns + string table, written atomically."""
+        codes: dict[str, int] = {}
+        blocks: list[bytes] = []
+        columns = []
+        for name in self.fields:
+            col = self.column(name)
+            blocks.append(array("I", [NULL if v is None else codes.setdefault(v, len(codes)) for v in col]).tobytes())
+            num = _as_numeric(col)
+            if num is not None:
+                blocks.append(num.tobytes())
+            columns.append({"name": name, "numeric": num is not None})
+        strings = [v.encode("utf-8") for v in codes]
+        offsets = array("I", [0])
+        for b in strings:
+            offsets.append(offsets[-1] + len(b))
+        blocks += [offsets.tobytes(), b"".join(strings)]
+
+        header = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "byteorder": sys.byteorder,
+                "source_size": size,
+                "source_sha256": digest,
+                "rows": len(self),
+                "strings": len(strings),
+                "columns": columns,
+                "blocks": [len(b) for b in blocks],
+            }
+        ).encode("utf-8")
+        start = len(CACHE_MAGIC) + CACHE_PREFIX.size + len(header)
+        end = start
+        for b in blocks:
+            end += -end % 8 + len(b)
+        # Unique tmp name: concurrent loaders of the same CSV must not share one.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(CACHE_MAGIC + CACHE_PREFIX.pack(len(header), end - start) + header)
+                for b in blocks:
+                    f.write(b"\0" * (-f.tell() % 8))  # keep every block 8-byte aligned
+                    f.write(b)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load_cache(cls, path: Path, size: int, digest: str) -> "Table | None":
+        """Memory-map a cache written for this exact source; None if missing or stale."""
+        try:
+            with path.open("rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # missing, or empty (mmap refuses length 0)
+            return None
+        try:
+            if mm[: len(CACHE_MAGIC)] != CACHE_MAGIC:
+                return None
+            n, payload = CACHE_PREFIX.unpack_from(mm, len(CACHE_MAGIC))
+            start = len(CACHE_MAGIC) + CACHE_PREFIX.size
+            if len(mm) != start + n + payload:
+                return None  # truncated (or trailing garbage)
+            header = json.loads(mm[start : start + n].decode("utf-8"))
+            if (
+                header.get("version") != CACHE_VERSION
+                or header.get("byteorder") != sys.byteorder
+                or header.get("source_size") != size
+                or header.get("source_sha256") != digest
+            ):
+                return None
+        except (struct.error, ValueError):
+            return None
+
+        view = memoryview(mm)
+        pos = start + n
+        blocks = []
+        for length in header["blocks"]:
+            pos += -pos % 8
+            blocks.append(view[pos : pos + length])
+            pos += length
+        rows = header["rows"]
+        table = cls(c["name"] for c in header["columns"])
+        table._map = mm
+        it = iter(blocks)
+        for i, c in enumerate(header["columns"]):
+            table.columns[i] = _MappedColumn(table, i, next(it).cast("I"))
+            if c["numeric"]:
+                table._numeric[c["name"]] = next(it).cast("d")
+        offsets, strings = next(it).cast("I"), bytes(next(it))
+        table._values = [strings[offsets[k] : offsets[k + 1]].decode("utf-8") for k in range(header["strings"])]
+        table._strings = {v: v for v in table._values}
+        if rows == 0:
+            table.columns = [[] for _ in table.fields]
+        return table
+
+
+def _as_numeric(col: list) -> array | None:
+    """Float64 column if every value is a number or blank (nan); None otherwise."""
+    out = array("d")
+    try:
+        for v in col:
+            out.append(math.nan if v == "" else float(v))
+    except (TypeError, ValueError):
+        return None
+    return out
+
+
+def json_default(obj):
+    """`json.dumps(..., default=json_default)` serializes tables / rows like the lists / dicts they replace."""
+    if isinstance(obj, Table):
+        return list(obj)
+    if isinstance(obj, Row):
+        return dict(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+# --- benchmark ---
+
+PRICE_FIELDS = ["season", "round", "id", "abbr", "price", "priceChange", "percentOwned", "x2PercentOwned"]
+POINT_FIELDS = ["season", "round", "id", "abbr", "type", "totalPoints", "nnTotalPoints"]
+
+
+def write_synthetic(outdir: Path, seasons: int, rounds: int = 24, seed: int = 0) -> list[Path]:
+    """Season-shaped long tables (22 drivers + 10 constructors per round) for `seasons` seasons."""
+    rng = random.Random(seed)
+    teams = ["ALP", "AST", "FER", "HAA", "KCK", "MCL", "MER", "RED", "VRB", "WIL"]
+    drivers = [f"{t}_{chr(65 + i)}{chr(65 + j)}{chr(65 + (i + j) % 26)}" for i, t in enumerate(teams) for j in range(2)]
+    drivers += ["RES_AAA", "RES_BBB"]
+    paths = []
+    for kind, assets in (("drivers", drivers), ("constructors", teams)):
+        prices = outdir / f"prices_{kind}_long.csv"
+        points = outdir / f"points_{kind}_long.csv"
+        with prices.open("w", encoding="utf-8", newline="") as fp, points.open("w", encoding="utf-8", newline="") as fq:
+            wp, wq = csv.writer(fp), csv.writer(fq)
+            wp.writerow(PRICE_FIELDS)
+            wq.writerow(POINT_FIELDS)
+            for season in range(2026 - seasons, 2026):
+                price = {a: rng.randint(45, 300) / 10 for a in assets}
+                for rnd in range(1, rounds + 1):
+                    for a in assets:
+                        change = rng.choice([-0.3, -0.1, 0.0, 0.1, 0.3])
+                        price[a] = round(max(4.5, price[a] + change), 1)
+                        abbr = a.split("_")[-1]
+                        pts = rng.randint(-10, 60)
+                        wp.writerow([season, rnd, a, abbr, price[a], change, rng.randint(0, 60), rng.randint(0, 20)])
+                        wq.writerow([season, rnd, a, abbr, kind[:-1], pts, pts - rng.randint(0, 8)])
+        paths += [prices, points]
+    return paths
+
+
+def _retained(load) -> tuple[object, int]:
+    tracemalloc.start()
+    obj = load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def _load_time(paths: list[Path], cache: bool, repeat: int = 5) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in paths:
+            Table.read_csv(p, cache=cache)
+    return (time.perf_counter() - t0) / repeat
+
+
+def benchmark(seasons: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_synthetic(Path(tmp), seasons)
+
+        def load_dicts():
+            out = []
+            for p in paths:
+                with p.open("r", encoding="utf-8-sig", newline="") as f:
+                    out.append(list(csv.DictReader(f)))
+            return out
+
+        dicts, dict_bytes = _retained(load_dicts)
+        tables, table_bytes = _retained(lambda: [Table.read_csv(p, cache=False) for p in paths])
+
+        parse = _load_time(paths, cache=False)
+        cached = [Table.read_csv(p) for p in paths]  # writes the caches
+        mapped = _load_time(paths, cache=True)
+        cached = [Table.read_csv(p) for p in paths]
+
+    rows = sum(len(d) for d in dicts)
+    assert rows == sum(len(t) for t in tables)
+    assert all(dict(r) == d for t, ds in zip(tables, dicts) for r, d in zip(t, ds))
+    assert all(dict(r) == d for t, ds in zip(cached, dicts) for r, d in zip(t, ds))
+    print(f"{seasons} synthetic seasons, {len(paths)} tables, {rows} rows")
+    print(f"  list[dict]: {dict_bytes / 1e6:8.2f} MB  ({dict_bytes / rows:6.0f} B/row)")
+    print(f"  Table:      {table_bytes / 1e6:8.2f} MB  ({table_bytes / rows:6.0f} B/row)")
+    print(f"  reduction:  {dict_bytes / max(table_bytes, 1):.1f}x")
+    print(f"  load, parsing the CSVs: {parse * 1000:8.1f} ms")
+    print(f"  load, mapped cache:     {mapped * 1000:8.1f} ms  ({parse / max(mapped, 1e-9):.1f}x faster)")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seasons", type=int, default=10, help="Synthetic seasons to generate for the benchmark")
+    args = ap.parse_args()
+    benchmark(args.seasons)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
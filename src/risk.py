@@ -0,0 +1,180 @@
+"""Risk-aware team selection over a scenario x asset points matrix.
+
+Scenarios:
+- bootstrap (default): each scenario replays one of the last `lookback` rounds for
+  every asset at once (keeps teammates / team-level correlation). Assets missing
+  from that round draw one of their own past results instead; assets without any
+  history score their projection in every scenario.
+- file: a CSV with one column per asset (ids or 3-letter codes) and one row per
+  scenario (`--scenario-file`); assets not in the file score their projection.
+
+Objectives (higher is better):
+- mean:      average points over the scenarios
+- variance:  mean - risk_aversion * variance
+- cvar:      CVaR at `alpha`, the average of the worst alpha share of scenarios
+
+Everything is scored with matrix products over asset incidence matrices, never
+per team: mean and variance come from the scenario means and covariance
+(team variance = x' S x for the 0/1 team vector x, split into driver-set,
+constructor-pair and cross terms). CVaR is not decomposable, so teams are scored
+in chunks (incidence @ scenarios') in order of decreasing mean; since
+CVaR <= mean, the search stops once no remaining team's mean can beat the
+incumbent's CVaR, which is exact.
+
+Usage:
+  python -m src.optimizer --season 2025 --round 10 --risk cvar --alpha 0.1 --scenarios 5000
+  python -m src.optimizer --season 2025 --round 10 --risk variance --risk-aversion 0.01
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import numpy as np
+
+from . import optimizer as opt
+
+
+OBJECTIVES = ("mean", "variance", "cvar")
+CHUNK = 4096
+
+
+def bootstrap_scenarios(
+    data: opt.SeasonData, rnd: int, pool: opt.Pool, *, n: int = 2000, lookback: int = 8, seed: int = 0
+) -> np.ndarray:
+    """[n, len(pool.ids)] points matrix resampled from the rounds before `rnd`."""
+    i = data.round_index(rnd)
+    cols = [data.ids.index(a) for a in pool.ids]
+    hist = data.points[max(0, i - lookback) : i][:, cols]  # [L, A]
+    rng = np.random.default_rng(seed)
+    out = np.tile(pool.points, (n, 1))
+    if not len(hist):
+        return out
+
+    out = hist[rng.integers(0, len(hist), n)]
+    # Fill gaps with a draw from the asset's own history (valid values moved to the top).
+    valid = ~np.isnan(hist)
+    counts = valid.sum(axis=0)
+    order = np.argsort(~valid, axis=0, kind="stable")
+    packed = np.take_along_axis(hist, order, axis=0)
+    pick = (rng.random(out.shape) * np.maximum(counts, 1)).astype(np.int64)
+    out = np.where(np.isnan(out), np.take_along_axis(packed, pick, axis=0), out)
+    return np.where(np.isnan(out), pool.points, out)
+
+
+def load_scenarios(path: Path, pool: opt.Pool) -> np.ndarray:
+    """Scenario CSV (header = asset ids or codes) aligned to the pool."""
+    lookup = opt._asset_lookup(pool)
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [r for r in reader if r]
+    if not rows:
+        raise SystemExit(f"No scenarios in {path}")
+    out = np.tile(pool.points, (len(rows), 1))
+    values = np.array([[float(v) if v.strip() else np.nan for v in r] for r in rows])
+    for j, key in enumerate(header):
+        a = lookup.get(key.strip().upper())
+        if a is not None:
+            col = values[:, j]
+            out[:, a] = np.where(np.isnan(col), pool.points[a], col)
+    return out
+
+
+def _incidence(combo: np.ndarray, n_assets: int) -> np.ndarray:
+    x = np.zeros((len(combo), n_assets))
+    np.put_along_axis(x, combo.astype(np.int64), 1.0, axis=1)
+    return x
+
+
+def cvar(team_scenarios: np.ndarray, alpha: float) -> np.ndarray:
+    """Mean of the worst ceil(alpha * S) scenarios, per row."""
+    k = max(1, int(np.ceil(alpha * team_scenarios.shape[1])))
+    return np.partition(team_scenarios, k - 1, axis=1)[:, :k].mean(axis=1)
+
+
+def _best_per_driver_set(score: np.ndarray, top: int) -> tuple[np.ndarray, np.ndarray]:
+    """(driver rows, constructor columns) of the best `top` driver sets, each with its best pair."""
+    best_c = np.argmax(score, axis=1)
+    best = score[np.arange(len(score)), best_c]
+    rows = opt.top_rows(best, top)
+    return rows, best_c[rows]
+
+
+def _cvar_search(
+    index: opt.ComboIndex, xd: np.ndarray, xc: np.ndarray, scen_t: np.ndarray, mean: np.ndarray, alpha: float, top: int
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Exact best-CVaR teams: score in order of decreasing mean, stop when mean < the top-th best CVaR."""
+    flat = np.flatnonzero(np.isfinite(mean).ravel())
+    order = flat[np.argsort(-mean.ravel()[flat], kind="stable")]
+    n_c = mean.shape[1]
+    best = np.full(len(index.d_combo), -np.inf)
+    best_c = np.zeros(len(index.d_combo), dtype=np.int64)
+    scored = 0
+    for start in range(0, len(order), CHUNK):
+        chunk = order[start : start + CHUNK]
+        found = best[np.isfinite(best)]
+        if len(found) >= top:
+            bound = np.partition(found, len(found) - top)[len(found) - top]
+            chunk = chunk[mean.ravel()[chunk] >= bound]
+            if not len(chunk):
+                break
+        d, c = np.divmod(chunk, n_c)
+        values = cvar((xd[d] + xc[c]) @ scen_t, alpha)
+        scored += len(chunk)
+        # Best pair per driver set within the chunk (first in mean order on ties), then merge.
+        by = np.lexsort((-values, d))
+        first = by[np.unique(d[by], return_index=True)[1]]
+        better = values[first] > best[d[first]]
+        best[d[first[better]]] = values[first[better]]
+        best_c[d[first[better]]] = c[first[better]]
+    rows = opt.top_rows(best, top)
+    return rows, best_c[rows], scored
+
+
+def solve_risk(
+    pool: opt.Pool,
+    scenarios: np.ndarray,
+    budget: int = opt.BUDGET,
+    *,
+    objective: str = "cvar",
+    alpha: float = 0.1,
+    risk_aversion: float = 0.01,
+    top: int = 1,
+) -> tuple[list[opt.Team], dict]:
+    """Best `top` teams (distinct driver sets) under `budget` by the risk objective."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}")
+    index = opt.ComboIndex.build(pool)
+    n = len(pool.ids)
+    xd, xc = _incidence(index.d_combo, n), _incidence(index.c_combo, n)
+    mu = scenarios.mean(axis=0)
+    mean = (xd @ mu)[:, None] + (xc @ mu)[None, :]
+    mean[index.d_price[:, None] + index.c_price[None, :] > budget] = -np.inf
+    stats = {"scenarios": len(scenarios), "teams": int(np.isfinite(mean).sum()), "scored": int(np.isfinite(mean).sum())}
+
+    if objective == "mean":
+        rows, cols = _best_per_driver_set(mean, top)
+    elif objective == "variance":
+        cov = np.cov(scenarios, rowvar=False, bias=True).reshape(n, n)
+        xd_cov = xd @ cov
+        var = (xd_cov * xd).sum(axis=1)[:, None] + ((xc @ cov) * xc).sum(axis=1)[None, :] + 2 * (xd_cov @ xc.T)
+        rows, cols = _best_per_driver_set(mean - risk_aversion * var, top)
+    else:
+        rows, cols, stats["scored"] = _cvar_search(index, xd, xc, np.ascontiguousarray(scenarios.T), mean, alpha, top)
+
+    teams = []
+    if len(rows):
+        team_scen = (xd[rows] + xc[cols]) @ scenarios.T
+        tail = cvar(team_scen, alpha)
+        for di, ci, ts, tv in zip(rows, cols, team_scen, tail):
+            t = opt.Team(
+                drivers=[pool.ids[a] for a in index.d_combo[di]],
+                constructors=[pool.ids[a] for a in index.c_combo[ci]],
+                price=int(index.d_price[di] + index.c_price[ci]),
+                points=float(ts.mean()),
+            )
+            t.notes.append(f"{objective}: sd {ts.std():.1f}, CVaR{alpha * 100:g} {tv:.1f}, p10 {np.percentile(ts, 10):.1f}")
+            teams.append(t)
+    return teams, stats
@@ -0,0 +1,385 @@
+"""Rival-field simulation: how a team ranks against the managers it plays against.
+
+The field is sampled from the game's ownership numbers for the round
+(`percentOwned` / `x2PercentOwned` in the f1fantasytools price tables):
+- each rival is one of the valid teams under `--field-budget` (5 drivers, 2
+  constructors), drawn with probability proportional to the product of per-asset
+  weights. The weights are calibrated (iterative scaling against the exact
+  sampled ownership) so the field's ownership matches the published one as far
+  as the budget allows.
+- one of the rival's drivers carries the DRS boost (2x), weighted by x2PercentOwned.
+
+Our candidates are the optimizer's top `--candidates` teams, boosting their
+best-projected driver. Rivals and candidates are scored against the same outcome
+scenarios (`risk.bootstrap_scenarios`), so a round in which a template pick blanks
+hurts everyone who owns it.
+
+The field is never sorted: worker processes each sample and score a slice of it
+(incidence @ scenarios') and return a (scenario x score) histogram; the summed
+histogram gives every candidate's rank in every scenario by lookup.
+
+Output:
+- data/seasons/<season>/derived/rival_field.csv, one row per candidate:
+  expected_percentile  mean share of the field beaten (ties count half)
+  percentile_p10       10th percentile of that share over the scenarios
+  p_top10              share of scenarios finishing in the field's top 10%
+  gain_vs_field        expected points over the average rival
+  differentials        picks the simulated field owns less than `--differential`,
+                       with their expected edge (points x (multiplier - field ownership))
+
+Usage:
+  python -m src.rivals --season 2025 --round 10
+  python -m src.rivals --season 2025 --round 10 --rivals 100000 --candidates 50 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from . import optimizer as opt
+from . import risk
+from .dimensions import read_csv, write_csv
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CHUNK = 8192  # rivals scored per matrix product
+JOB = 20000  # rivals per worker task (fixed, so results do not depend on --workers)
+CALIBRATION_STEPS = 30
+MIN_SHARE = 0.001  # assets nobody (publicly) owns still turn up now and then
+
+RIVAL_FIELDS = [
+    "season",
+    "round",
+    "team_name",
+    "drivers",
+    "constructors",
+    "drs_boost",
+    "total_price",
+    "expected_points",
+    "gain_vs_field",
+    "expected_percentile",
+    "percentile_p10",
+    "p_top10",
+    "differentials",
+]
+
+
+def load_ownership(season: int, rnd: int, pool: opt.Pool, root: Path = ROOT) -> tuple[np.ndarray, np.ndarray]:
+    """(percentOwned, x2PercentOwned) per pool asset as shares of managers; nan where not published."""
+    raw = root / "data" / "seasons" / str(season) / "raw"
+    pos = {a: i for i, a in enumerate(pool.ids)}
+    owned = np.full(len(pool.ids), np.nan)
+    boosted = np.full(len(pool.ids), np.nan)
+    for kind in ("drivers", "constructors"):
+        prices = read_csv(raw / f"f1fantasytools_prices_{kind}_long.csv")
+        if not prices:
+            continue
+        col = opt._lookup(prices, "id", pos)
+        ok = (col >= 0) & (opt._floats(prices, "round") == rnd)
+        owned[col[ok]] = opt._floats(prices, "percentOwned")[ok] / 100
+        boosted[col[ok]] = opt._floats(prices, "x2PercentOwned")[ok] / 100
+    return owned, boosted
+
+
+def _targets(shares: np.ndarray, k: int) -> np.ndarray:
+    """Inclusion probabilities for a k-of-n pick: published shares rescaled to sum to k."""
+    if np.isnan(shares).all():
+        return np.full(len(shares), k / len(shares))
+    t = np.maximum(np.nan_to_num(shares, nan=0.0), MIN_SHARE)
+    return np.minimum(t * (k / t.sum()), 1 - MIN_SHARE)
+
+
+@dataclass
+class FieldModel:
+    """Rival teams drawn from every valid team with probability proportional to
+    the product of their assets' weights (so the budget is exact, no rejection).
+
+    Per driver set the affordable constructor pairs are a prefix of the
+    price-sorted pairs, so sampling is two searchsorted passes: a driver set by
+    its weight x affordable pair weight, then a pair from that prefix.
+    """
+
+    d_combo: np.ndarray  # pool positions [Nd, 5]
+    c_combo: np.ndarray  # [Nc, 2]
+    d_cum: np.ndarray  # cumulative driver-set sampling mass
+    d_limit: np.ndarray  # affordable pairs per driver set
+    c_order: np.ndarray  # pairs by price
+    c_cum: np.ndarray  # cumulative pair weight in that order
+    drivers: np.ndarray  # pool positions
+    log_boost: np.ndarray  # per driver
+    n_assets: int
+    scen_t: np.ndarray  # float32 [A, S]
+    lo: float  # histogram origin
+    res: float  # histogram bin width
+    width: int  # bins per scenario
+
+    @classmethod
+    def build(
+        cls, pool: opt.Pool, owned: np.ndarray, boosted: np.ndarray, scenarios: np.ndarray, budget: int
+    ) -> "FieldModel":
+        index = opt.ComboIndex.build(pool)
+        c_order = np.argsort(index.c_price, kind="stable")
+        d_limit = np.searchsorted(index.c_price[c_order], budget - index.d_price, side="right")
+        if not d_limit.any():
+            raise ValueError(f"No team fits a {budget / 10:.1f}M field budget")
+        d_combo, c_combo = index.d_combo[d_limit > 0], index.c_combo[c_order]
+        d_limit = d_limit[d_limit > 0]
+
+        target = np.zeros(len(pool.ids))
+        target[pool.drivers] = _targets(owned[pool.drivers], opt.N_DRIVERS)
+        target[pool.constructors] = _targets(owned[pool.constructors], opt.N_CONSTRUCTORS)
+        log_w = _calibrate(d_combo, c_combo, d_limit, target)
+        wd = np.exp(log_w[d_combo].sum(axis=1))
+        c_cum = np.cumsum(np.exp(log_w[c_combo].sum(axis=1)))
+
+        drivers = pool.drivers
+        xb = np.nan_to_num(boosted, nan=0.0)
+        log_boost = np.log(np.maximum(xb, MIN_SHARE)) if xb[drivers].any() else np.zeros(len(pool.ids))
+
+        # Score range of any valid team in any scenario: the histogram must cover it.
+        ds, cs = np.sort(scenarios[:, drivers], axis=1), np.sort(scenarios[:, pool.constructors], axis=1)
+        low = ds[:, : opt.N_DRIVERS].sum(axis=1) + np.minimum(ds[:, 0], 0) + cs[:, : opt.N_CONSTRUCTORS].sum(axis=1)
+        high = ds[:, -opt.N_DRIVERS :].sum(axis=1) + np.maximum(ds[:, -1], 0) + cs[:, -opt.N_CONSTRUCTORS :].sum(axis=1)
+        res = 1.0 if np.array_equal(scenarios, np.round(scenarios)) else 0.1
+        lo = np.floor(low.min() / res) * res
+
+        return cls(
+            d_combo=d_combo,
+            c_combo=c_combo,
+            d_cum=np.cumsum(wd * c_cum[d_limit - 1]),
+            d_limit=d_limit,
+            c_order=c_order,
+            c_cum=c_cum,
+            drivers=drivers,
+            log_boost=log_boost,
+            n_assets=len(pool.ids),
+            scen_t=np.ascontiguousarray(scenarios.T, dtype=np.float32),
+            lo=float(lo),
+            res=res,
+            width=int(np.ceil((high.max() - lo) / res)) + 1,
+        )
+
+    def draw(self, n: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """[n] driver-set rows and [n] pair rows (into d_combo / c_combo) of valid teams."""
+        d = np.searchsorted(self.d_cum, rng.random(n) * self.d_cum[-1], side="right")
+        d = np.minimum(d, len(self.d_cum) - 1)
+        mass = self.c_cum[self.d_limit[d] - 1]
+        c = np.minimum(np.searchsorted(self.c_cum, rng.random(n) * mass, side="right"), self.d_limit[d] - 1)
+        return d, c
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """[n, A] float32 multipliers (1 per pick, 2 on the boosted driver)."""
+        d, c = self.draw(n, rng)
+        picks = self.d_combo[d]
+        boost = np.argmax(self.log_boost[picks] + rng.gumbel(size=picks.shape), axis=1)
+        mult = np.zeros((n, self.n_assets), dtype=np.float32)
+        np.put_along_axis(mult, picks.astype(np.int64), 1.0, axis=1)
+        np.put_along_axis(mult, self.c_combo[c].astype(np.int64), 1.0, axis=1)
+        mult[np.arange(n), picks[np.arange(n), boost]] = 2.0
+        return mult
+
+    def bins(self, scores: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((scores - self.lo) / self.res), 0, self.width - 1).astype(np.int64)
+
+
+def _marginals(d_combo: np.ndarray, c_combo: np.ndarray, d_limit: np.ndarray, log_w: np.ndarray) -> np.ndarray:
+    """Exact share of sampled teams holding each asset."""
+    wd = np.exp(log_w[d_combo].sum(axis=1))
+    wc = np.exp(log_w[c_combo].sum(axis=1))
+    c_cum = np.cumsum(wc)
+    d_mass = wd * c_cum[d_limit - 1]
+    # Pair j is affordable for every driver set with d_limit > j.
+    by_limit = np.bincount(d_limit - 1, weights=wd, minlength=len(wc))
+    c_mass = wc * np.cumsum(by_limit[::-1])[::-1]
+    out = np.bincount(d_combo.ravel(), weights=np.repeat(d_mass, d_combo.shape[1]), minlength=len(log_w))
+    out += np.bincount(c_combo.ravel(), weights=np.repeat(c_mass, c_combo.shape[1]), minlength=len(log_w))
+    return out / d_mass.sum()
+
+
+def _calibrate(d_combo: np.ndarray, c_combo: np.ndarray, d_limit: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Asset log-weights whose sampled ownership matches `target` as far as the budget allows."""
+    log_w = np.log(target)
+    for _ in range(CALIBRATION_STEPS):
+        seen = _marginals(d_combo, c_combo, d_limit, log_w)
+        log_w += 0.7 * (np.log(target) - np.log(np.maximum(seen, 1e-12)))
+        log_w -= log_w.max()  # keep the products in range
+    return log_w
+
+
+_MODEL: list[FieldModel] = []
+
+
+def _init_worker(model: FieldModel) -> None:
+    _MODEL[:] = [model]
+
+
+def _field_job(seed: np.random.SeedSequence, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """(scenario x score bin counts, summed [multipliers, picks]) for `n` sampled rivals."""
+    model = _MODEL[0]
+    rng = np.random.default_rng(seed)
+    n_scen = model.scen_t.shape[1]
+    offsets = np.arange(n_scen, dtype=np.int64) * model.width
+    counts = np.zeros(n_scen * model.width, dtype=np.int64)
+    field = np.zeros((2, model.n_assets))
+    for start in range(0, n, CHUNK):
+        mult = model.sample(min(CHUNK, n - start), rng)
+        field += mult.sum(axis=0), (mult > 0).sum(axis=0)
+        counts += np.bincount((model.bins(mult @ model.scen_t) + offsets).ravel(), minlength=len(counts))
+    return counts.reshape(n_scen, model.width), field
+
+
+def simulate_field(model: FieldModel, n: int, *, seed: int = 0, workers: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """Histogram of rival scores per scenario and the field's [mean multiplier, ownership] per asset."""
+    sizes = [min(JOB, n - s) for s in range(0, n, JOB)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), initializer=_init_worker, initargs=(model,)) as ex:
+            results = list(ex.map(_field_job, seeds, sizes))
+    else:
+        _init_worker(model)
+        results = [_field_job(s, k) for s, k in zip(seeds, sizes)]
+    counts = sum(r[0] for r in results)
+    field = sum(r[1] for r in results)
+    return counts, field / n
+
+
+def rank_candidates(model: FieldModel, counts: np.ndarray, mult: np.ndarray) -> np.ndarray:
+    """[C, S] share of the field each candidate beats in each scenario (ties count half)."""
+    keys = model.bins(mult @ model.scen_t)
+    cum = np.cumsum(counts, axis=1)
+    s = np.arange(counts.shape[0])
+    ties = counts[s, keys]
+    below = cum[s, keys] - ties
+    return (below + 0.5 * ties) / cum[:, -1]
+
+
+def candidate_multipliers(pool: opt.Pool, teams: list[opt.Team]) -> tuple[np.ndarray, list[str]]:
+    """[C, A] multipliers for our teams, boosting each team's best-projected driver."""
+    pos = {a: i for i, a in enumerate(pool.ids)}
+    mult = np.zeros((len(teams), len(pool.ids)), dtype=np.float32)
+    boost = []
+    for row, t in zip(mult, teams):
+        for a in t.drivers + t.constructors:
+            row[pos[a]] = 1.0
+        best = t.boost[0] if t.boost else max(t.drivers, key=lambda a: pool.points[pos[a]])
+        row[pos[best]] = 2.0
+        boost.append(best)
+    return mult, boost
+
+
+def rival_rows(
+    season: int,
+    rnd: int,
+    pool: opt.Pool,
+    teams: list[opt.Team],
+    boost: list[str],
+    mult: np.ndarray,
+    percentile: np.ndarray,
+    field: np.ndarray,
+    mu: np.ndarray,
+    differential: float,
+) -> list[dict]:
+    field_mult, field_owned = field
+    field_points = float(field_mult @ mu)
+    rows = []
+    for i, (t, b, m, p) in enumerate(zip(teams, boost, mult, percentile), start=1):
+        edge = [
+            (pool.ids[a], mu[a] * (m[a] - field_mult[a]))
+            for a in np.flatnonzero(m)
+            if field_owned[a] < differential
+        ]
+        rows.append(
+            {
+                "season": season,
+                "round": rnd,
+                "team_name": f"Team {i}",
+                "drivers": "|".join(t.drivers),
+                "constructors": "|".join(t.constructors),
+                "drs_boost": b,
+                "total_price": f"{t.price_m:.1f}",
+                "expected_points": f"{float(m @ mu):.2f}",
+                "gain_vs_field": f"{float(m @ mu) - field_points:.2f}",
+                "expected_percentile": f"{p.mean():.4f}",
+                "percentile_p10": f"{np.percentile(p, 10):.4f}",
+                "p_top10": f"{(p >= 0.9).mean():.4f}",
+                "differentials": "|".join(f"{a} {e:+.1f}" for a, e in sorted(edge, key=lambda x: -x[1])),
+            }
+        )
+    rows.sort(key=lambda r: float(r["expected_percentile"]), reverse=True)
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, default=2025)
+    ap.add_argument("--round", type=int, required=True)
+    ap.add_argument("--budget", type=float, default=opt.BUDGET / 10, help="Our budget cap in millions (default 100)")
+    ap.add_argument("--field-budget", type=float, default=opt.BUDGET / 10, help="Rivals' budget cap in millions")
+    ap.add_argument("--window", type=int, default=3, help="Rounds in the rolling projection")
+    ap.add_argument("--candidates", type=int, default=50, help="Optimizer teams to evaluate")
+    ap.add_argument("--rivals", type=int, default=100000, help="Size of the simulated field")
+    ap.add_argument("--scenarios", type=int, default=1000, help="Bootstrap outcome scenarios")
+    ap.add_argument("--lookback", type=int, default=8, help="Past rounds to resample")
+    ap.add_argument("--scenario-file", help="Scenario x asset CSV instead of the bootstrap")
+    ap.add_argument("--differential", type=float, default=0.1, help="Field ownership below which a pick counts as a differential")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    data = opt.load_season(args.season)
+    pool = opt.round_pool(data, args.round, window=args.window)
+    owned, boosted = load_ownership(args.season, args.round, pool)
+    if np.isnan(owned).all():
+        print(f"No ownership published for round {args.round}; sampling the field uniformly")
+    if args.scenario_file:
+        scenarios = risk.load_scenarios(Path(args.scenario_file), pool)
+    else:
+        scenarios = risk.bootstrap_scenarios(data, args.round, pool, n=args.scenarios, lookback=args.lookback, seed=args.seed)
+    try:
+        model = FieldModel.build(pool, owned, boosted, scenarios, opt.to_tenths(args.field_budget))
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    # Candidates are picked with the boost they are scored with (2x on the best-projected driver).
+    teams = opt.solve(pool, opt.to_tenths(args.budget), top=args.candidates, boost=opt.BOOSTS["2x"])
+    if not teams:
+        raise SystemExit("No team fits the budget")
+    t1 = time.perf_counter()
+    counts, field = simulate_field(model, args.rivals, seed=args.seed, workers=args.workers)
+    t2 = time.perf_counter()
+    mult, boost = candidate_multipliers(pool, teams)
+    percentile = rank_candidates(model, counts, mult)
+    rows = rival_rows(
+        args.season, args.round, pool, teams, boost, mult, percentile, field, scenarios.mean(axis=0), args.differential
+    )
+    print(
+        f"{args.rivals} rivals x {len(scenarios)} scenarios on {args.workers} workers in {(t2 - t1):.2f}s "
+        f"(setup {(t1 - t0):.2f}s, ranking {(time.perf_counter() - t2) * 1000:.0f} ms)"
+    )
+
+    print("Ownership  published  simulated")
+    for a in np.argsort(-np.nan_to_num(owned))[:8]:
+        print(f"  {pool.ids[a]:<10} {owned[a] * 100:8.1f}% {field[1, a] * 100:9.1f}%")
+
+    out = ROOT / "data" / "seasons" / str(args.season) / "derived" / "rival_field.csv"
+    write_csv(out, rows, RIVAL_FIELDS)
+    for r in rows[:10]:
+        print(
+            f"{float(r['expected_percentile']) * 100:6.1f}%  top10 {float(r['p_top10']) * 100:5.1f}%  "
+            f"{r['expected_points']:>7}  {r['drivers'].replace('|', ' ')} | {r['constructors'].replace('|', ' ')}"
+        )
+    print("Wrote", out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
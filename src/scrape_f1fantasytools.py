@@ -3,7 +3,18 @@
 Preferred method: call the public JSON endpoint:
 - https://f1fantasytools.com/api/statistics/<season>
 
-Fallback: the site also embeds a big JSON blob into the HTML via Next.js flight data.
+The response body is parsed incrementally and rows are written to the four CSVs as
+they arrive (no full `r.json()` copy). `--seasons 2023-2025` fetches several seasons
+concurrently over one pooled session, so a multi-season pull takes about as long as
+the slowest single request.
+
+Fallback: the site also embeds a big JSON blob into the HTML via Next.js flight data
+(<base>/statistics/<season>, or a saved page with `--source html --html page.html`).
+The page is streamed the same way: flight-data pushes are decoded and parsed
+incrementally (src/season_stream.py), so memory stays flat however large the page is.
+
+The host can be overridden with `--base-url` or F1FANTASYTOOLS_BASE_URL (e.g. to point
+at the local record/replay stand-in, see src/standin.py).
 
 Outputs:
 - data/seasons/<season>/raw/f1fantasytools_points_drivers_long.csv
@@ -18,146 +29,195 @@ from __future__ import annotations
 
 import argparse
 import csv
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import requests
+import requests.adapters
+
+from .season_stream import ROOT_MARKER, iter_flight_text, scan_season
 
 
 ROOT = Path(__file__).resolve().parents[1]
 
+BASE_URL = os.environ.get("F1FANTASYTOOLS_BASE_URL", "https://f1fantasytools.com")
+
+
+POINTS_FIELDS = ["season", "round", "id", "abbr", "type", "totalPoints", "nnTotalPoints"]
+PRICES_FIELDS = ["season", "round", "id", "abbr", "price", "priceChange", "percentOwned", "x2PercentOwned"]
+
+
+def _clean(v):
+    """Drop Next.js placeholders (e.g. `$undefined`) so they end up as blank cells."""
+    if v == "$undefined":
+        return None
+    return v
+
+
+def points_row(season: int, rnd: int, rec: dict) -> dict:
+    return {
+        "season": season,
+        "round": rnd,
+        "id": rec.get("id"),
+        "abbr": rec.get("abbreviation"),
+        "type": rec.get("type"),
+        "totalPoints": rec.get("totalPoints"),
+        "nnTotalPoints": rec.get("nnTotalPoints"),
+    }
+
+
+def prices_row(season: int, rnd: int, rec: dict) -> dict:
+    return {
+        "season": season,
+        "round": rnd,
+        "id": rec.get("id"),
+        "abbr": rec.get("abbreviation"),
+        "price": rec.get("price"),
+        "priceChange": rec.get("priceChange"),
+        "percentOwned": rec.get("percentOwned"),
+        "x2PercentOwned": rec.get("x2PercentOwned"),
+    }
+
+
+class SeasonTables:
+    """The four long CSVs of one season, written row by row as records arrive.
+
+    Files are written to `.tmp` siblings and moved into place on a clean exit, so a
+    failed scrape leaves the previous tables untouched.
+    """
+
+    def __init__(self, outdir: Path, season: int):
+        self.outdir = outdir
+        self.season = season
+        self.paths: dict[tuple[str, str], Path] = {}
+        self._files = []
+        self._writers = {}
+        for table, fields in (("points", POINTS_FIELDS), ("prices", PRICES_FIELDS)):
+            for kind in ("drivers", "constructors"):
+                path = outdir / f"f1fantasytools_{table}_{kind}_long.csv"
+                tmp = path.with_name(path.name + ".tmp")
+                f = tmp.open("w", encoding="utf-8", newline="")
+                w = csv.DictWriter(f, fieldnames=fields)
+                w.writeheader()
+                self.paths[(table, kind)] = path
+                self._files.append((f, tmp, path))
+                self._writers[(table, kind)] = w
+
+    def __enter__(self) -> "SeasonTables":
+        return self
+
+    def add(self, kind: str, rnd: int, rec: dict) -> None:
+        for table, make in (("points", points_row), ("prices", prices_row)):
+            row = make(self.season, rnd, rec)
+            self._writers[(table, kind)].writerow({k: _clean(v) for k, v in row.items()})
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        for f, tmp, path in self._files:
+            f.close()
+            if exc_type is None:
+                os.replace(tmp, path)
+            else:
+                tmp.unlink(missing_ok=True)
+
+
+def _iter_text(source: str, session: requests.Session, chunk_size: int = 1 << 16):
+    """Decoded text chunks of a URL or saved file (streamed, never fully in memory)."""
+    if source.startswith(("http://", "https://")):
+        with session.get(source, headers={"User-Agent": "Mozilla/5.0"}, timeout=60, stream=True) as r:
+            r.raise_for_status()
+            r.encoding = r.encoding or "utf-8"
+            yield from r.iter_content(chunk_size=chunk_size, decode_unicode=True)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+def _scrape(pieces, season: int, *, marker: str) -> tuple[Path, int]:
+    outdir = ROOT / "data" / "seasons" / str(season) / "raw"
+    outdir.mkdir(parents=True, exist_ok=True)
+    with SeasonTables(outdir, season) as tables:
+        scanner = scan_season(pieces, tables.add, marker)
+        if scanner.season is not None and scanner.season != season:
+            raise RuntimeError(f"Payload holds season {scanner.season}, expected {season}")
+    return outdir, scanner.records
 
-def _extract_season_blob(html: str) -> dict:
-    # Find the embedded chunk containing seasonResult and raceResults
-    chunks = re.findall(r'self\.__next_f\.push\(\[1,"(.*?)"\]\)\s*;?', html, flags=re.S)
-    big = None
-    for c in chunks:
-        if "seasonResult" in c and "raceResults" in c:
-            big = c
-            break
-    if not big:
-        raise RuntimeError("Could not find embedded seasonResult blob")
 
-    # Unescape JS string escapes (\" etc)
-    raw = big.encode("utf-8").decode("unicode_escape")
+def scrape_api(url: str, season: int, session: requests.Session) -> tuple[Path, int]:
+    """Stream the API body: records are parsed and written as the response arrives."""
+    return _scrape(_iter_text(url, session), season, marker="{")
 
-    # raw looks like: 5:["$","$L..",null,{"seasonResult":{...}}]
-    start = raw.find('{"seasonResult"')
-    end = raw.rfind("}")
-    if start < 0 or end < 0:
-        raise RuntimeError("Could not locate JSON object in blob")
 
-    import json
+def scrape_html(source: str, season: int, session: requests.Session) -> tuple[Path, int]:
+    """Fallback: stream the Next.js flight data of the statistics page into the CSVs."""
+    return _scrape(iter_flight_text(_iter_text(source, session)), season, marker=ROOT_MARKER)
 
-    obj = json.loads(raw[start : end + 1])
-    return obj
 
+def scrape_season(season: int, *, base: str, source: str, html: str | None, session: requests.Session) -> str:
+    if source != "html":
+        # Prefer the public API.
+        try:
+            outdir, records = scrape_api(f"{base}/api/statistics/{season}", season, session)
+            return f"Wrote f1fantasytools tables to {outdir} ({records} records)"
+        except (requests.RequestException, ValueError, RuntimeError) as e:
+            if source == "api":
+                raise
+            print(f"{season}: API failed ({e}); falling back to the statistics page")
 
-def _write_csv(path: Path, fieldnames: list[str], rows: list[dict]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+    outdir, records = scrape_html(html or f"{base}/statistics/{season}", season, session)
+    return f"Wrote f1fantasytools tables to {outdir} ({records} records, from page data)"
+
+
+def parse_seasons(spec: str) -> list[int]:
+    """`2023-2025` or `2023,2025` (or a mix) -> sorted season list."""
+    seasons: set[int] = set()
+    for part in spec.split(","):
+        lo, _, hi = part.strip().partition("-")
+        seasons.update(range(int(lo), int(hi or lo) + 1))
+    return sorted(seasons)
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--season", type=int, default=2025)
-    args = ap.parse_args()
-
-    # Prefer the public API.
-    api_url = f"https://f1fantasytools.com/api/statistics/{args.season}"
-    r = requests.get(api_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=60)
-    r.raise_for_status()
-    blob = r.json()
-
-    sr = blob.get("seasonResult") or {}
-    season = int(sr.get("season") or args.season)
-    race_results = (sr.get("raceResults") or {})
-
-    drivers_points = []
-    drivers_prices = []
-    constructors_points = []
-    constructors_prices = []
-
-    for round_str, rr in race_results.items():
-        rnd = int(round_str)
-        for d in rr.get("drivers") or []:
-            drivers_points.append(
-                {
-                    "season": season,
-                    "round": rnd,
-                    "id": d.get("id"),
-                    "abbr": d.get("abbreviation"),
-                    "type": d.get("type"),
-                    "totalPoints": d.get("totalPoints"),
-                    "nnTotalPoints": d.get("nnTotalPoints"),
-                }
-            )
-            drivers_prices.append(
-                {
-                    "season": season,
-                    "round": rnd,
-                    "id": d.get("id"),
-                    "abbr": d.get("abbreviation"),
-                    "price": d.get("price"),
-                    "priceChange": d.get("priceChange"),
-                    "percentOwned": d.get("percentOwned"),
-                    "x2PercentOwned": d.get("x2PercentOwned"),
-                }
-            )
-
-        for c in rr.get("constructors") or []:
-            constructors_points.append(
-                {
-                    "season": season,
-                    "round": rnd,
-                    "id": c.get("id"),
-                    "abbr": c.get("abbreviation"),
-                    "type": c.get("type"),
-                    "totalPoints": c.get("totalPoints"),
-                    "nnTotalPoints": c.get("nnTotalPoints"),
-                }
-            )
-            constructors_prices.append(
-                {
-                    "season": season,
-                    "round": rnd,
-                    "id": c.get("id"),
-                    "abbr": c.get("abbreviation"),
-                    "price": c.get("price"),
-                    "priceChange": c.get("priceChange"),
-                    "percentOwned": c.get("percentOwned"),
-                    "x2PercentOwned": c.get("x2PercentOwned"),
-                }
-            )
-
-    outdir = ROOT / "data" / "seasons" / str(season) / "raw"
-    _write_csv(
-        outdir / "f1fantasytools_points_drivers_long.csv",
-        ["season", "round", "id", "abbr", "type", "totalPoints", "nnTotalPoints"],
-        drivers_points,
-    )
-    _write_csv(
-        outdir / "f1fantasytools_points_constructors_long.csv",
-        ["season", "round", "id", "abbr", "type", "totalPoints", "nnTotalPoints"],
-        constructors_points,
-    )
-    _write_csv(
-        outdir / "f1fantasytools_prices_drivers_long.csv",
-        ["season", "round", "id", "abbr", "price", "priceChange", "percentOwned", "x2PercentOwned"],
-        drivers_prices,
-    )
-    _write_csv(
-        outdir / "f1fantasytools_prices_constructors_long.csv",
-        ["season", "round", "id", "abbr", "price", "priceChange", "percentOwned", "x2PercentOwned"],
-        constructors_prices,
+    ap.add_argument("--seasons", help="Several seasons, fetched concurrently (e.g. 2023-2025 or 2023,2025)")
+    ap.add_argument("--base-url", default=BASE_URL, help="f1fantasytools host (default: %(default)s)")
+    ap.add_argument(
+        "--source",
+        choices=["auto", "api", "html"],
+        default="auto",
+        help="auto = API, falling back to the statistics page if the API fails",
     )
+    ap.add_argument("--html", help="Saved statistics page (file or URL) for --source html")
+    args = ap.parse_args()
 
-    print(f"Wrote f1fantasytools tables to {outdir}")
-    return 0
+    seasons = parse_seasons(args.seasons) if args.seasons else [args.season]
+    if args.html and len(seasons) > 1:
+        raise SystemExit("--html takes a single season")
+    base = args.base_url.rstrip("/")
+
+    # One pooled session; each season streams over its own keep-alive connection.
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(len(seasons), 1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    failed = 0
+    with session, ThreadPoolExecutor(max_workers=len(seasons)) as ex:
+        futures = {
+            ex.submit(scrape_season, s, base=base, source=args.source, html=args.html, session=session): s
+            for s in seasons
+        }
+        for fut in as_completed(futures):
+            try:
+                print(fut.result())
+            except Exception as e:
+                if len(seasons) == 1:
+                    raise
+                failed += 1
+                print(f"{futures[fut]}: failed: {e}")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
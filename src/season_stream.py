@@ -0,0 +1,247 @@
+"""Incremental parsing of f1fantasytools season payloads.
+
+The season payload looks like
+
+  {"seasonResult": {"season": 2025, "raceResults": {"1": {"drivers": [...], "constructors": [...]}, ...}}}
+
+and arrives either as the JSON API body (scanned straight off the response stream) or embedded in the statistics HTML page as
+Next.js flight data (`self.__next_f.push([1,"<JS string>"])` script pushes).
+
+Both are consumed chunk by chunk here:
+- `iter_flight_text` finds the pushes in a stream of HTML chunks and decodes the JS
+  string escapes on the fly (including `\\uXXXX` surrogate pairs split across chunks).
+- `SeasonScanner` tokenizes the JSON incrementally, starting at `{"seasonResult"`
+  and stopping at its matching brace, and hands every driver / constructor record
+  to a callback as soon as its closing brace is seen.
+
+Only the record currently being read (a few hundred bytes) and an unconsumed token
+tail are buffered, so memory stays flat regardless of page size.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+
+
+PUSH_MARKER = 'self.__next_f.push([1,"'
+ROOT_MARKER = '{"seasonResult"'
+RECORD_KINDS = ("drivers", "constructors")
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v", "0": "\0"}
+_PLAIN = re.compile(r'[^"\\]+')
+
+
+def _fix_surrogates(s: str) -> str:
+    return s.encode("utf-16", "surrogatepass").decode("utf-16")
+
+
+def iter_flight_text(chunks: Iterable[str]) -> Iterator[str]:
+    """Decoded contents of the flight-data pushes in an HTML stream, piece by piece.
+
+    Consecutive pushes are yielded back to back (Next.js may split one row across pushes).
+    """
+    buf = ""
+    inside = False
+    pending_high = ""  # a high surrogate waiting for its pair in the next piece
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while True:
+            if not inside:
+                i = buf.find(PUSH_MARKER, pos)
+                if i < 0:
+                    # Keep a tail in case the marker straddles chunks.
+                    pos = max(pos, len(buf) - len(PUSH_MARKER) + 1)
+                    break
+                pos = i + len(PUSH_MARKER)
+                inside = True
+
+            out: list[str] = []
+            while pos < len(buf):
+                m = _PLAIN.match(buf, pos)
+                if m:
+                    out.append(m.group())
+                    pos = m.end()
+                    continue
+                if buf[pos] == '"':
+                    pos += 1
+                    inside = False
+                    break
+                # Backslash escape; wait for more data if it is incomplete.
+                if pos + 1 >= len(buf):
+                    break
+                c = buf[pos + 1]
+                if c == "u":
+                    if pos + 6 > len(buf):
+                        break
+                    out.append(chr(int(buf[pos + 2 : pos + 6], 16)))
+                    pos += 6
+                elif c == "x":
+                    if pos + 4 > len(buf):
+                        break
+                    out.append(chr(int(buf[pos + 2 : pos + 4], 16)))
+                    pos += 4
+                else:
+                    out.append(_ESCAPES.get(c, c))
+                    pos += 2
+
+            text = pending_high + "".join(out)
+            pending_high = ""
+            if text and "\ud800" <= text[-1] <= "\udbff":
+                text, pending_high = text[:-1], text[-1]
+            if text:
+                yield _fix_surrogates(text)
+            if inside:
+                break
+        buf = buf[pos:]
+    if pending_high:
+        yield pending_high
+
+
+_TOKEN = re.compile(r'\s*(?:([{}\[\],:"])|([^{}\[\],:"\s]+))')
+_STRING_REST = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+
+Record = Callable[[str, int, dict], None]
+
+
+class SeasonScanner:
+    """Incremental JSON scanner for the season payload.
+
+    `feed()` text pieces in order; `on_record(kind, round, obj)` is called for every
+    element of `seasonResult.raceResults.<round>.drivers|constructors`. After the
+    root object closes, `done` is set and further input is ignored.
+
+    Scanning starts at `marker`: `{"seasonResult"` inside page data, `{` for an API body.
+    """
+
+    def __init__(self, on_record: Record, marker: str = ROOT_MARKER):
+        self.on_record = on_record
+        self.marker = marker
+        self.season: int | None = None
+        self.records = 0
+        self.started = False
+        self.done = False
+        self._buf = ""
+        self._pos = 0  # scan offset into _buf
+        # One entry per open container: [kind ('{' or '['), name in parent, current key].
+        self._stack: list[list] = []
+        self._expect_key = False
+        self._capture_from: int | None = None  # buffer offset of the record being read
+        self._capture_depth = 0
+
+    # --- helpers ---
+
+    def _names(self) -> list:
+        return [entry[1] for entry in self._stack]
+
+    def _record_slot(self) -> tuple[str, int] | None:
+        """(kind, round) if the innermost container is a watched record array."""
+        if len(self._stack) != 5 or self._stack[-1][0] != "[":
+            return None
+        _, top, races, rnd, kind = self._names()
+        if top == "seasonResult" and races == "raceResults" and kind in RECORD_KINDS:
+            return kind, int(rnd)
+        return None
+
+    def _value_name(self):
+        parent = self._stack[-1] if self._stack else None
+        return parent[2] if parent and parent[0] == "{" else None
+
+    def _scalar(self, raw: str) -> None:
+        names = self._names()
+        if names == [None, "seasonResult"] and self._value_name() == "season":
+            try:
+                self.season = int(json.loads(raw))
+            except (TypeError, ValueError):
+                pass
+
+    # --- feeding ---
+
+    def feed(self, text: str) -> None:
+        if self.done:
+            return
+        if not self.started:
+            text = self._buf + text
+            i = text.find(self.marker)
+            if i < 0:
+                self._buf = text[max(0, len(text) - len(self.marker) + 1) :]
+                return
+            self.started = True
+            self._buf = text[i:]
+        else:
+            self._buf += text
+        self._scan()
+
+    def _scan(self) -> None:
+        buf = self._buf
+        pos = self._pos
+        while not self.done:
+            m = _TOKEN.match(buf, pos)
+            if not m or m.end() == len(buf) and m.group(2):
+                break  # need more input (a scalar may continue in the next piece)
+            start = m.start(1) if m.group(1) else m.start(2)
+            tok = m.group(1)
+            capturing = self._capture_from is not None
+
+            if tok == '"':
+                s = _STRING_REST.match(buf, m.end())
+                if not s:
+                    break
+                pos = s.end()
+                if capturing:
+                    continue
+                if self._expect_key:
+                    self._stack[-1][2] = json.loads(buf[start:pos])
+                    self._expect_key = False
+                elif self._record_slot():
+                    pass  # stray string in a record array
+                else:
+                    self._scalar(buf[start:pos])
+                continue
+
+            pos = m.end()
+            if tok is None:  # number / true / false / null
+                if not capturing:
+                    self._scalar(m.group(2))
+                continue
+
+            if tok in "{[":
+                if not capturing and self._record_slot():
+                    self._capture_from, self._capture_depth = start, len(self._stack)
+                name = self._value_name() if self._stack and self._stack[-1][0] == "{" else None
+                self._stack.append([tok, name, None])
+                self._expect_key = tok == "{"
+            elif tok in "}]":
+                self._stack.pop()
+                if capturing and len(self._stack) == self._capture_depth:
+                    slot = self._record_slot()
+                    if slot:
+                        self.on_record(slot[0], slot[1], json.loads(buf[self._capture_from : pos]))
+                        self.records += 1
+                    self._capture_from = None
+                if not self._stack:
+                    self.done = True
+            elif tok == ",":
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == "{" and not capturing
+
+        # Drop consumed input; keep the record being read.
+        keep = pos if self._capture_from is None else self._capture_from
+        if self._capture_from is not None:
+            self._capture_from -= keep
+        self._buf = buf[keep:]
+        self._pos = pos - keep
+
+
+def scan_season(pieces: Iterable[str], on_record: Record, marker: str = ROOT_MARKER) -> SeasonScanner:
+    scanner = SeasonScanner(on_record, marker)
+    for piece in pieces:
+        scanner.feed(piece)
+        if scanner.done:
+            break
+    if not scanner.started:
+        raise RuntimeError(f"Could not find {marker!r} in the season payload")
+    if not scanner.done:
+        raise RuntimeError("seasonResult blob ended before its closing brace")
+    return scanner
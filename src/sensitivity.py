@@ -0,0 +1,158 @@
+"""Breakpoints of the recommended team: how far each asset's projection or price can
+move (one asset at a time) before a better team exists.
+
+For the best team T* (score S*, price P*) under budget B and an asset a:
+- points, a in T*:      lowering a by d lowers every team holding a by d, T* included,
+                        so T* is overtaken at d = S* - (best affordable team without a)
+- points, a not in T*:  raising a by d only lifts teams holding a,
+                        so d = S* - (best affordable team with a)
+- price, a in T*:       raising it only hurts teams holding a; T* stays best while it fits
+                        (up to B - P* more)
+- price, any a:         lowering it by d makes a team T holding a with score > S*
+                        affordable once price(T) - d <= B; the cheapest such T decides
+
+All of these are per-asset maxima / minima over the driver-set x constructor-pair grid.
+They come from the solver's prefix tables (best pair under a driver set's remaining
+budget and, mirrored, best driver set under a pair's) plus one more pair of tables
+(cheapest pair / driver set above a points threshold), so every asset is covered in
+one pass instead of a re-solve per asset and per delta.
+
+Output:
+- data/seasons/<season>/derived/team_sensitivity.csv: one row per asset with the
+  projection range (exclusive) and price range (inclusive, millions) over which the
+  recommended team stays optimal; blank = unbounded. At the edges an equally good
+  team exists, and the solver's tie-break may already list that one first.
+
+Usage:
+  python -m src.optimizer --season 2025 --round 10 --sensitivity
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from . import optimizer as opt
+
+
+EPS = 1e-9  # equal scores (up to summation order) are ties, not better teams
+
+SENSITIVITY_FIELDS = [
+    "season",
+    "round",
+    "id",
+    "abbr",
+    "kind",
+    "in_team",
+    "price",
+    "projected_points",
+    "points_low",
+    "points_high",
+    "price_low",
+    "price_high",
+]
+
+
+def cheapest_above(points: np.ndarray, price: np.ndarray):
+    """Return (points_desc, cheapest_prefix) for threshold lookups.
+
+    `cheapest_prefix[k]` is the lowest price among the k+1 highest-scoring items, so the
+    cheapest item scoring more than `t` is at `searchsorted(-points_desc, -t, 'left') - 1`.
+    """
+    order = np.argsort(-points, kind="stable")
+    return points[order], np.minimum.accumulate(price[order])
+
+
+def _cheapest_better(points: np.ndarray, price: np.ndarray, other_points: np.ndarray, threshold: float) -> np.ndarray:
+    """Per item of the other side: lowest price of a partner lifting the pair above `threshold`."""
+    desc, cheapest = cheapest_above(points, price)
+    k = np.searchsorted(-desc, -(threshold - other_points), side="left") - 1
+    return np.where(k >= 0, cheapest[np.maximum(k, 0)], np.inf)
+
+
+def _incidence(combo: np.ndarray, n_assets: int) -> np.ndarray:
+    x = np.zeros((len(combo), n_assets), dtype=bool)
+    np.put_along_axis(x, combo.astype(np.int64), True, axis=1)
+    return x
+
+
+def _masked(values: np.ndarray, mask: np.ndarray, fill: float, reduce) -> np.ndarray:
+    """Per asset column: reduce(values) over the rows where mask is set."""
+    return reduce(np.where(mask, values[:, None], fill), axis=0)
+
+
+def breakpoints(pool: opt.Pool, budget: int = opt.BUDGET, index: opt.ComboIndex | None = None):
+    """(best team, per-asset dict of margins) for the unconstrained best team under `budget`.
+
+    Margins are in points / tenths and inf when unbounded: `points_down`, `points_up`,
+    `price_down` (the team changes at that reduction) and `price_up` (still best at it).
+    """
+    index = index or opt.ComboIndex.build(pool)
+    d_points = index.driver_points(pool.points)
+    c_points = index.constructor_points(pool.points)
+    d_price, c_price = index.d_price.astype(np.int64), index.c_price.astype(np.int64)
+
+    # Best affordable team per driver set (the solver's table) and per pair (its mirror).
+    row_best = opt.score_driver_sets(index, d_points, c_points, budget)
+    sp, best, _ = opt.best_constructors_under(d_price, d_points)
+    k = np.searchsorted(sp, budget - c_price, side="right") - 1
+    col_best = np.where(k >= 0, best[np.maximum(k, 0)] + c_points, -np.inf)
+    if not np.isfinite(row_best).any():
+        return None, {}
+    top = opt.top_rows(row_best, 1)
+    team = opt.teams_for_rows(pool, index, top, row_best, c_points, budget)[0]
+    score = float(row_best[top[0]])
+
+    n = len(pool.ids)
+    d_inc, c_inc = _incidence(index.d_combo, n), _incidence(index.c_combo, n)
+    with_a = np.maximum(_masked(row_best, d_inc, -np.inf, np.max), _masked(col_best, c_inc, -np.inf, np.max))
+    without_a = np.where(
+        pool.is_driver, _masked(row_best, ~d_inc, -np.inf, np.max), _masked(col_best, ~c_inc, -np.inf, np.max)
+    )
+
+    # Cheapest team holding a that beats the incumbent (unaffordable now, by optimality).
+    target = score + EPS
+    d_cheapest = d_price + _cheapest_better(c_points, c_price, d_points, target)
+    c_cheapest = c_price + _cheapest_better(d_points, d_price, c_points, target)
+    better = np.minimum(_masked(d_cheapest, d_inc, np.inf, np.min), _masked(c_cheapest, c_inc, np.inf, np.min))
+
+    held = {pool.ids.index(a) for a in team.drivers + team.constructors}
+    out = {}
+    for a in range(n):
+        inside = a in held
+        out[pool.ids[a]] = {
+            "in_team": inside,
+            "points_down": score - without_a[a] if inside else np.inf,
+            "points_up": np.inf if inside else score - with_a[a],
+            "price_down": better[a] - budget,
+            "price_up": budget - team.price if inside else np.inf,
+        }
+    return team, out
+
+
+def _fmt(value: float, digits: int) -> str:
+    return "" if not np.isfinite(value) else f"{value:.{digits}f}"
+
+
+def sensitivity_rows(season: int, rnd: int, pool: opt.Pool, margins: dict) -> list[dict]:
+    rows = []
+    for a, (aid, abbr) in enumerate(zip(pool.ids, pool.abbr)):
+        m = margins[aid]
+        price, points = int(pool.price[a]), float(pool.points[a])
+        low = price - m["price_down"] + 1  # one step before the better team fits
+        rows.append(
+            {
+                "season": season,
+                "round": rnd,
+                "id": aid,
+                "abbr": abbr,
+                "kind": "driver" if pool.is_driver[a] else "constructor",
+                "in_team": int(m["in_team"]),
+                "price": f"{price / 10:.1f}",
+                "projected_points": f"{points:.2f}",
+                "points_low": _fmt(points - m["points_down"], 2),
+                "points_high": _fmt(points + m["points_up"], 2),
+                "price_low": _fmt(low / 10, 1) if low > 0 else "",
+                "price_high": _fmt((price + m["price_up"]) / 10, 1),
+            }
+        )
+    return rows
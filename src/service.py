@@ -0,0 +1,401 @@
+"""Local HTTP query service for optimizer / what-if requests.
+
+Every question ("best team at 98M", "what does this team score") used to mean
+re-running a CLI that re-parses the season CSVs. This keeps the parsed season
+tables in memory and answers queries over HTTP:
+
+  GET /health
+  GET /optimize?season=2025&round=10&budget=98&top=5&window=3&projection=rolling
+  GET /optimize?season=2025&round=10&current_drivers=COL,STR,HUL,PIA,HAD&current_constructors=MCL,WIL
+      &lock=PIA&exclude=SAI&max_transfers=2
+  GET /score?season=2025&round=10&drivers=NOR,PIA,VER,LEC,HAM&constructors=MCL,FER
+  GET /frontier?season=2025&round=10&min=80&max=110&step=0.5
+  GET /optimize?season=2025&round=10&boost=3x          (boost: none / 2x / 3x, default 2x)
+  POST /reload
+
+(POST with a JSON body works for every endpoint too; body keys override query params.)
+
+Design:
+- asyncio server, stdlib only (no web framework).
+- Combination indexes are built once per (season, round, window, projection) and kept
+  in memory by each worker process; solves run in a process pool so the event loop
+  stays responsive. `--workers 0` solves in-process (handy for debugging).
+- `/optimize` and `/score` play the DRS boost (`boost`, default 2x) like the optimizer
+  CLI; each team lists its boosted driver(s).
+- `/frontier` answers from the per-budget knapsack index (src/price_grid.py, kept
+  under derived/price_grid/), one O(budget) merge per point. The knapsack cannot
+  price a boost that depends on the chosen team, so its teams are unboosted
+  (`boost` must be omitted or `none`).
+- Hot reload: the raw CSVs of loaded seasons are stat()ed every `--poll` seconds;
+  a change bumps that season's version, which invalidates the cached tables and
+  indexes (workers compare versions on each request). `POST /reload` (optionally
+  `?season=N`) bumps the version's generation counter, forcing a reload even when
+  the files look unchanged.
+- `--preload` loads seasons into every worker process as it starts (the workers are
+  started up front), so the first queries do not pay for the load.
+- Request bodies over 1 MiB are answered with 413 and the connection is closed; a body
+  that is not a JSON object, or a /score team that is not 5 distinct drivers + 2
+  distinct constructors priced that round, is a 400.
+
+Usage:
+  python -m src.service --port 8765 --preload 2025
+  curl 'http://127.0.0.1:8765/optimize?season=2025&round=10&budget=98'
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from . import optimizer as opt
+from . import price_grid
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MAX_BODY = 1 << 20
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def season_signature(season: int, root: Path = ROOT) -> tuple:
+    """Cheap change detector for a season's raw tables (size + mtime of each CSV)."""
+    raw = root / "data" / "seasons" / str(season) / "raw"
+    sig = []
+    for p in sorted(raw.glob("f1fantasytools_*_long.csv")):
+        st = p.stat()
+        sig.append((p.name, st.st_size, st.st_mtime_ns))
+    return tuple(sig)
+
+
+# --- per-process caches (used by the main process and by pool workers) ---
+
+_seasons: dict[int, tuple[tuple, opt.SeasonData]] = {}
+_pools: dict[tuple, opt.Pool] = {}
+_indexes: dict[tuple, tuple[opt.Pool, opt.ComboIndex]] = {}
+_grids: dict[tuple, price_grid.PriceGrid] = {}
+
+
+def _season(season: int, version: tuple) -> opt.SeasonData:
+    hit = _seasons.get(season)
+    if hit is None or hit[0] != version:
+        _seasons[season] = (version, opt.load_season(season))
+        for cache in (_pools, _indexes, _grids):
+            for k in [k for k in cache if k[0] == season]:
+                del cache[k]
+    return _seasons[season][1]
+
+
+def _pool(season: int, version: tuple, rnd: int, window: int, mode: str) -> opt.Pool:
+    """The round's pool alone (scoring and the knapsack grid do not need the combination index)."""
+    data = _season(season, version)
+    key = (season, rnd, window, mode)
+    if key not in _pools:
+        _pools[key] = opt.round_pool(data, rnd, window=window, mode=mode)
+    return _pools[key]
+
+
+def _pool_and_index(season: int, version: tuple, rnd: int, window: int, mode: str) -> tuple[opt.Pool, opt.ComboIndex]:
+    pool = _pool(season, version, rnd, window, mode)
+    key = (season, rnd, window, mode)
+    if key not in _indexes:
+        _indexes[key] = (pool, opt.ComboIndex.build(pool))
+    return _indexes[key]
+
+
+def _grid(season: int, version: tuple, rnd: int, window: int, mode: str) -> price_grid.PriceGrid:
+    """Per-budget knapsack index for the round (loaded from derived/price_grid/ if still current)."""
+    key = (season, rnd, window, mode)
+    if key not in _grids:
+        pool = _pool(season, version, rnd, window, mode)  # opt.round_pool only: the grid needs no ComboIndex
+        _grids[key], _ = price_grid.load_or_build(season, rnd, pool, window=window, mode=mode)
+    return _grids[key]
+
+
+def team_json(t: opt.Team | None) -> dict | None:
+    if t is None:
+        return None
+    return {
+        "drivers": t.drivers,
+        "constructors": t.constructors,
+        "price": t.price_m,
+        "expected_points": round(t.points, 4),
+        "boost": t.boost,
+        "notes": t.notes,
+    }
+
+
+def job_optimize(version: tuple, q: dict) -> dict:
+    pool, index = _pool_and_index(q["season"], version, q["round"], q["window"], q["projection"])
+    constraints = opt.Constraints(
+        drivers=q["current_drivers"],
+        constructors=q["current_constructors"],
+        lock=q["lock"],
+        exclude=q["exclude"],
+        max_transfers=q["max_transfers"],
+    )
+    boost = opt.BOOSTS[q["boost"] or "2x"]
+    if constraints.empty:
+        teams = opt.solve_index(pool, index, opt.to_tenths(q["budget"]), top=q["top"], boost=boost)
+    else:
+        teams = opt.solve_constrained(pool, constraints, opt.to_tenths(q["budget"]), top=q["top"], boost=boost)
+    return {"teams": [team_json(t) for t in teams]}
+
+
+def job_frontier(version: tuple, q: dict) -> dict:
+    if q["boost"] not in (None, "none"):
+        raise BadRequest("/frontier teams are unboosted (omit boost or pass boost=none)")
+    grid = _grid(q["season"], version, q["round"], q["window"], q["projection"])
+    lo, hi, step = opt.to_tenths(q["min"]), opt.to_tenths(q["max"]), max(1, opt.to_tenths(q["step"]))
+    points = grid.frontier(list(range(lo, hi + 1, step)))
+    return {"frontier": [{"budget": b / 10, "team": team_json(t)} for b, t in points]}
+
+
+def job_score(version: tuple, q: dict) -> dict:
+    pool = _pool(q["season"], version, q["round"], q["window"], q["projection"])
+    try:
+        team = opt.score_team(pool, q["drivers"], q["constructors"], opt.BOOSTS[q["boost"] or "2x"])
+    except ValueError as e:
+        raise BadRequest(str(e)) from None
+    return {"team": team_json(team)}
+
+
+# --- request parsing ---
+
+
+def _int(q: dict, key: str, default: int | None = None) -> int:
+    v = q.get(key, default)
+    if v is None:
+        raise BadRequest(f"missing parameter: {key}")
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{key} must be an integer") from None
+
+
+def _float(q: dict, key: str, default: float) -> float:
+    try:
+        return float(q.get(key, default))
+    except (TypeError, ValueError):
+        raise BadRequest(f"{key} must be a number") from None
+
+
+def _list(q: dict, key: str) -> list[str]:
+    v = q.get(key) or []
+    if isinstance(v, str):
+        v = [x for x in v.split(",") if x.strip()]
+    return [str(x).strip() for x in v]
+
+
+def normalize_query(q: dict) -> dict:
+    projection = q.get("projection", "rolling")
+    if projection not in ("rolling", "actual"):
+        raise BadRequest("projection must be rolling or actual")
+    boost = q.get("boost") or None
+    if boost is not None and boost not in opt.BOOSTS:
+        raise BadRequest("boost must be one of " + ", ".join(opt.BOOSTS))
+    return {
+        "season": _int(q, "season", 2025),
+        "round": _int(q, "round"),
+        "window": _int(q, "window", 3),
+        "projection": projection,
+        "budget": _float(q, "budget", opt.BUDGET / 10),
+        "top": max(1, min(_int(q, "top", 1), 100)),
+        "min": _float(q, "min", 80.0),
+        "max": _float(q, "max", 110.0),
+        "step": _float(q, "step", 0.5),
+        "drivers": _list(q, "drivers"),
+        "constructors": _list(q, "constructors"),
+        "current_drivers": _list(q, "current_drivers"),
+        "current_constructors": _list(q, "current_constructors"),
+        "lock": _list(q, "lock"),
+        "exclude": _list(q, "exclude"),
+        "max_transfers": _int(q, "max_transfers") if q.get("max_transfers") not in (None, "") else None,
+        "boost": boost,  # None: the endpoint's default
+    }
+
+
+class QueryService:
+    def __init__(self, executor: Executor | None, poll_seconds: float):
+        self.executor = executor
+        self.poll_seconds = poll_seconds
+        self.versions: dict[int, tuple] = {}  # season -> (generation, file signature)
+        self.generations: dict[int, int] = {}
+
+    def version(self, season: int) -> tuple:
+        if season not in self.versions:
+            sig = season_signature(season)
+            if not sig:
+                raise BadRequest(f"no raw tables for season {season}")
+            self.versions[season] = (self.generations.get(season, 0), sig)
+        return self.versions[season]
+
+    def reload(self, seasons: list[int]) -> None:
+        """New generation: every process reloads these seasons on its next request."""
+        for season in seasons:
+            self.generations[season] = self.generations.get(season, 0) + 1
+            self.versions.pop(season, None)
+
+    async def run_job(self, fn, version: tuple, q: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, version, q))
+
+    async def handle(self, method: str, path: str, q: dict) -> tuple[int, dict]:
+        if path == "/health":
+            return 200, {"ok": True, "seasons": sorted(self.versions)}
+        if path == "/reload":
+            seasons = [_int(q, "season")] if q.get("season") not in (None, "") else sorted(self.versions)
+            self.reload(seasons)
+            return 200, {"ok": True, "reloaded": seasons}
+
+        jobs = {"/optimize": job_optimize, "/frontier": job_frontier, "/score": job_score}
+        fn = jobs.get(path)
+        if fn is None:
+            return 404, {"error": f"unknown endpoint {path}"}
+
+        nq = normalize_query(q)
+        version = self.version(nq["season"])
+        t0 = time.perf_counter()
+        # Even /score can mean loading a season, so every job runs off the event loop.
+        result = await self.run_job(fn, version, nq)
+        result["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return 200, result
+
+    async def watch(self) -> None:
+        """Hot reload: bump a season's version when its raw CSVs change."""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            for season, (generation, old) in list(self.versions.items()):
+                new = season_signature(season)
+                if new != old:
+                    self.versions[season] = (generation, new)
+                    print(f"Season {season} changed on disk; reloading")
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, _ = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    # Unread, the body would be parsed as the next request: refuse and hang up.
+                    data = json.dumps({"error": f"body over {MAX_BODY} bytes"}).encode("utf-8")
+                    writer.write(
+                        "HTTP/1.1 413 Payload Too Large\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        "Connection: close\r\n\r\n".encode("latin-1")
+                        + data
+                    )
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length > 0 else b""
+
+                url = urlsplit(target)
+                q = dict(parse_qsl(url.query))
+                status, payload = 200, {}
+                try:
+                    if body:
+                        try:
+                            body_q = json.loads(body)
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            raise BadRequest("body is not valid JSON") from None
+                        if not isinstance(body_q, dict):
+                            raise BadRequest("body must be a JSON object")
+                        q.update(body_q)
+                    status, payload = await self.handle(method, url.path, q)
+                except (BadRequest, ValueError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except SystemExit as e:
+                    status, payload = 404, {"error": str(e)}
+                except Exception as e:  # keep serving
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+def _warm(versions: dict[int, tuple]) -> None:
+    """Worker initializer: load the preloaded seasons into this process's cache."""
+    for season, version in versions.items():
+        _season(season, version)
+
+
+async def serve(host: str, port: int, workers: int, poll_seconds: float, preload: list[int]) -> None:
+    svc = QueryService(None, poll_seconds)
+    versions = {season: svc.version(season) for season in preload}
+    if workers > 0:
+        # Every worker loads the seasons as it starts; start them all now rather than
+        # on the first requests, so preloading really takes the load off the first queries.
+        svc.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm, initargs=(versions,))
+        if versions:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(svc.executor, time.sleep, 0.05) for _ in range(workers)))
+    else:
+        svc.executor = ThreadPoolExecutor(max_workers=1)
+        _warm(versions)
+    executor = svc.executor
+
+    server = await asyncio.start_server(svc.serve_client, host, port)
+    watcher = asyncio.create_task(svc.watch())
+    print(f"Serving on http://{host}:{port} ({workers or 'in-process'} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        executor.shutdown(cancel_futures=True)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Solver processes (0 = in-process)")
+    ap.add_argument("--poll", type=float, default=2.0, help="Seconds between checks for changed raw CSVs")
+    ap.add_argument("--preload", type=int, action="append", default=[], help="Season to load into every worker at startup (repeatable)")
+    args = ap.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.poll, args.preload))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,307 @@
+"""Local stand-in for f1fantasytools and Ergast/Jolpica with record/replay.
+
+The fetchers (`scrape_f1fantasytools`, `ergast_points`, `ergast_schedule`) talk to
+public APIs, which makes offline runs, load tests and benchmarks impossible. This
+serves recorded responses from a local HTTP server instead, with optional latency,
+injected errors and rate limits so concurrency / retry / caching behaviour can be
+measured reproducibly.
+
+Upstreams are mounted under a path prefix:
+
+  /f1fantasytools/...  -> https://f1fantasytools.com/...
+  /ergast/...          -> https://api.jolpi.ca/ergast/...
+
+Modes:
+- record: requests without a fixture are forwarded upstream and the response is saved
+- replay: fixtures only (404 for anything not recorded)
+
+Fixtures (one pair per request, keyed on method + path + sorted query):
+- fixtures/http/<upstream>/<key hash>.json   (request key, url, status, content type)
+- fixtures/http/<upstream>/<key hash>.body
+
+Faults (applied in both modes, seeded with --seed):
+- --latency-ms / --jitter-ms: delay before every response
+- --error-rate: share of requests answered with --error-status (default 503)
+- --rate-limit / --burst: token bucket per client address; over the limit -> 429 + Retry-After
+
+GET /_standin/stats returns request / hit / miss / fault counters and the peak number
+of requests in flight; POST /_standin/reset clears them.
+
+Usage:
+  # record once (needs network)
+  python -m src.standin --mode record --port 8766 &
+  F1FANTASYTOOLS_BASE_URL=http://127.0.0.1:8766/f1fantasytools python -m src.scrape_f1fantasytools --season 2025
+  ERGAST_BASE_URLS=http://127.0.0.1:8766/ergast python -m src.ergast_points --season 2025
+
+  # replay offline with 80+-40 ms latency, 5% errors and 10 req/s per client
+  python -m src.standin --latency-ms 80 --jitter-ms 40 --error-rate 0.05 --rate-limit 10 --seed 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = ROOT / "fixtures" / "http"
+
+UPSTREAMS = {
+    "f1fantasytools": "https://f1fantasytools.com",
+    "ergast": "https://api.jolpi.ca/ergast",
+}
+
+MAX_BODY = 1 << 20
+
+
+def request_key(method: str, path: str, query: str) -> str:
+    """Stable fixture key: query parameters are sorted so `?a=1&b=2` == `?b=2&a=1`."""
+    q = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return f"{method.upper()} {path}" + (f"?{q}" if q else "")
+
+
+def _fixture_paths(fixtures: Path, upstream: str, key: str) -> tuple[Path, Path]:
+    h = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+    base = fixtures / upstream / h
+    return base.with_suffix(".json"), base.with_suffix(".body")
+
+
+@dataclass
+class Fixture:
+    status: int
+    content_type: str
+    body: bytes
+
+
+def load_fixture(fixtures: Path, upstream: str, key: str) -> Fixture | None:
+    meta_path, body_path = _fixture_paths(fixtures, upstream, key)
+    if not meta_path.exists() or not body_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    return Fixture(int(meta["status"]), meta.get("content_type") or "application/octet-stream", body_path.read_bytes())
+
+
+def save_fixture(fixtures: Path, upstream: str, key: str, url: str, fx: Fixture) -> None:
+    meta_path, body_path = _fixture_paths(fixtures, upstream, key)
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    body_path.write_bytes(fx.body)
+    meta = {
+        "key": key,
+        "url": url,
+        "status": fx.status,
+        "content_type": fx.content_type,
+        "bytes": len(fx.body),
+        "sha256": hashlib.sha256(fx.body).hexdigest(),
+        "recorded_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+
+
+def fetch_upstream(url: str) -> Fixture:
+    r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=60)
+    return Fixture(r.status_code, r.headers.get("content-type", "application/octet-stream"), r.content)
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_limit: float = 0.0  # requests per second per client; 0 = unlimited
+    burst: int = 1
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float = field(default_factory=time.monotonic)
+
+    def take(self) -> float:
+        """Consume a token; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class StandIn:
+    def __init__(self, mode: str, fixtures: Path, faults: Faults, seed: int | None):
+        self.mode = mode
+        self.fixtures = fixtures
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.buckets: dict[str, TokenBucket] = {}
+        self.inflight = 0
+        self.stats: dict[str, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.stats = dict.fromkeys(
+            ["requests", "hits", "misses", "recorded", "injected_errors", "rate_limited", "peak_inflight"], 0
+        )
+
+    def _limited(self, client: str) -> float:
+        if self.faults.rate_limit <= 0:
+            return 0.0
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            cap = max(1, self.faults.burst)
+            bucket = self.buckets[client] = TokenBucket(self.faults.rate_limit, cap, cap)
+        return bucket.take()
+
+    async def handle(self, method: str, target: str, client: str) -> tuple[int, dict[str, str], bytes]:
+        url = urlsplit(target)
+        if url.path == "/_standin/stats":
+            return 200, {}, json.dumps({"mode": self.mode, "inflight": self.inflight, **self.stats}).encode()
+        if url.path == "/_standin/reset":
+            self.reset()
+            return 200, {}, b'{"ok": true}'
+
+        self.stats["requests"] += 1
+        wait = self._limited(client)
+        if wait:
+            self.stats["rate_limited"] += 1
+            return 429, {"Retry-After": str(max(1, round(wait)))}, b'{"error": "rate limited"}'
+
+        delay = self.faults.latency_ms + self.rng.uniform(-1, 1) * self.faults.jitter_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.faults.error_rate and self.rng.random() < self.faults.error_rate:
+            self.stats["injected_errors"] += 1
+            return self.faults.error_status, {}, b'{"error": "injected"}'
+
+        upstream, _, rest = url.path.lstrip("/").partition("/")
+        if upstream not in UPSTREAMS:
+            return 404, {}, json.dumps({"error": f"unknown upstream {upstream!r}", "upstreams": sorted(UPSTREAMS)}).encode()
+        key = request_key(method, "/" + rest, url.query)
+
+        fx = load_fixture(self.fixtures, upstream, key)
+        if fx is not None:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            if self.mode != "record":
+                return 404, {}, json.dumps({"error": "no fixture", "upstream": upstream, "key": key}).encode()
+            real = UPSTREAMS[upstream] + "/" + rest + (f"?{url.query}" if url.query else "")
+            fx = await asyncio.get_running_loop().run_in_executor(None, fetch_upstream, real)
+            save_fixture(self.fixtures, upstream, key, real, fx)
+            self.stats["recorded"] += 1
+        return fx.status, {"Content-Type": fx.content_type}, fx.body
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = (writer.get_extra_info("peername") or ("?",))[0]
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, _ = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    # Unread, the body would be parsed as the next request: refuse and hang up.
+                    body = json.dumps({"error": f"body over {MAX_BODY} bytes"}).encode()
+                    writer.write(
+                        "HTTP/1.1 413 Payload Too Large\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        "Connection: close\r\n\r\n".encode("latin-1")
+                        + body
+                    )
+                    await writer.drain()
+                    break
+                if length > 0:
+                    await reader.readexactly(length)
+
+                self.inflight += 1
+                self.stats["peak_inflight"] = max(self.stats["peak_inflight"], self.inflight)
+                try:
+                    status, extra, body = await self.handle(method, target, client)
+                except Exception as e:  # keep serving
+                    status, extra, body = 502, {}, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+                finally:
+                    self.inflight -= 1
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                out = {"Content-Type": "application/json", **extra, "Content-Length": str(len(body))}
+                out["Connection"] = "keep-alive" if keep_alive else "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n".encode("latin-1")
+                    + "".join(f"{k}: {v}\r\n" for k, v in out.items()).encode("latin-1")
+                    + b"\r\n"
+                    + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int, standin: StandIn) -> None:
+    server = await asyncio.start_server(standin.serve_client, host, port)
+    print(f"Stand-in ({standin.mode}) on http://{host}:{port}, fixtures in {standin.fixtures}")
+    for name in UPSTREAMS:
+        print(f"  http://{host}:{port}/{name} -> {UPSTREAMS[name]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["replay", "record"], default="replay")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--fixtures", default=str(FIXTURES))
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with --error-status")
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second per client (0 = unlimited)")
+    ap.add_argument("--burst", type=int, default=1, help="Token bucket size for --rate-limit")
+    ap.add_argument("--seed", type=int, default=None, help="Seed for latency jitter and injected errors")
+    args = ap.parse_args()
+
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    standin = StandIn(args.mode, Path(args.fixtures), faults, args.seed)
+    try:
+        asyncio.run(serve(args.host, args.port, standin))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+"""Parameter sweep: run many backtest strategies in parallel and rank them.
+
+Each configuration (a `backtest.Strategy`) is replayed over the selected seasons;
+configurations are spread over worker processes, and every worker keeps its own
+season indexes, so the season tables are parsed once per worker rather than once
+per configuration.
+
+Results stream into a CSV as configurations finish. Re-running the same command
+skips configurations already in the file (keyed on the strategy parameters and
+seasons), so an interrupted sweep resumes where it stopped. A partially written
+last line is dropped on resume.
+
+Search:
+- grid:   every combination of the `--grid name=v1,v2,...` values
+- random: `--random N` draws N distinct configurations from that grid (`--seed`)
+
+Parameter names are the `Strategy` fields (window, projection, transfers,
+extra_transfers, penalty, budget); `budget` is given in millions.
+
+Outputs:
+- outputs/sweep/sweep_results.csv (one row per configuration; best settings printed at the end)
+
+Usage:
+  python -m src.sweep --grid window=1,2,3,4,5,6 --grid transfers=1,2 --grid extra_transfers=0,1
+  python -m src.sweep --grid window=2,3,4,5,6,8 --grid penalty=0,5,10 --random 10 --seed 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import dataclasses
+import itertools
+import json
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import backtest as bt
+from . import optimizer as opt
+
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT = ROOT / "outputs" / "sweep" / "sweep_results.csv"
+
+PARAMS = [f.name for f in dataclasses.fields(bt.Strategy)]
+RESULT_FIELDS = [
+    "key",
+    *PARAMS,
+    "strategy",
+    "seasons",
+    "total_points",
+    "points_by_season",
+    "avg_points",
+    "transfers_made",
+    "penalty_points",
+    "elapsed_ms",
+    "finished_at",
+]
+
+
+def parse_value(name: str, raw: str):
+    raw = raw.strip()
+    if name == "budget":
+        return opt.to_tenths(raw)
+    kind = {f.name: f.type for f in dataclasses.fields(bt.Strategy)}[name]
+    if kind == "int":
+        return int(raw)
+    if kind == "float":
+        return float(raw)
+    return raw
+
+
+def parse_grid(specs: list[str]) -> dict[str, list]:
+    grid: dict[str, list] = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip().replace("-", "_")
+        if name not in PARAMS:
+            raise SystemExit(f"Unknown parameter {name!r} (choose from: {', '.join(PARAMS)})")
+        grid[name] = [parse_value(name, v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def configurations(grid: dict[str, list], samples: int | None, seed: int) -> list[bt.Strategy]:
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return [bt.Strategy(**c) for c in combos]
+
+
+def config_key(strategy: bt.Strategy, seasons: list[int]) -> str:
+    return json.dumps({"seasons": seasons, **dataclasses.asdict(strategy)}, sort_keys=True, separators=(",", ":"))
+
+
+# --- worker side (each process keeps its own indexes) ---
+
+_indexes: dict[int, bt.SeasonIndex] = {}
+
+
+def _index(season: int) -> bt.SeasonIndex:
+    if season not in _indexes:
+        _indexes[season] = bt.SeasonIndex.build(opt.load_season(season))
+    return _indexes[season]
+
+
+def run_config(strategy: bt.Strategy, seasons: list[int]) -> dict:
+    results = [bt.run_backtest(_index(s), strategy) for s in seasons]
+    total = sum(r.total_points for r in results)
+    rounds = sum(len(r.rounds) for r in results)
+    return {
+        "key": config_key(strategy, seasons),
+        **{p: getattr(strategy, p) for p in PARAMS},
+        "budget": f"{strategy.budget / 10:g}",
+        "strategy": strategy.name,
+        "seasons": "|".join(str(s) for s in seasons),
+        "total_points": f"{total:g}",
+        "points_by_season": "|".join(f"{r.season}:{r.total_points:g}" for r in results),
+        "avg_points": f"{total / max(rounds, 1):.2f}",
+        "transfers_made": sum(r.transfers for r in results),
+        "penalty_points": f"{sum(x.penalty_points for r in results for x in r.rounds):g}",
+        "elapsed_ms": f"{sum(r.elapsed_ms for r in results):.1f}",
+        "finished_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+# --- results file ---
+
+
+def load_results(path: Path) -> list[dict]:
+    """Finished rows; drops a truncated last line and upgrades an older header in place."""
+    if not path.exists():
+        return []
+    data = path.read_bytes()
+    if data and not data.endswith(b"\n"):
+        data = data[: data.rfind(b"\n") + 1]
+        path.write_bytes(data)
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = [r for r in reader if r.get("key") and r.get("finished_at")]
+        header = reader.fieldnames or []
+    if header != RESULT_FIELDS:
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            w.writeheader()
+            w.writerows(rows)
+        os.replace(tmp, path)
+    return rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, action="append", help="Season to replay (repeatable, default 2023-2025)")
+    ap.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2", help="Values to sweep (repeatable)")
+    ap.add_argument("--random", type=int, default=None, metavar="N", help="Sample N configurations instead of the full grid")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    ap.add_argument("--out", default=str(OUT))
+    ap.add_argument("--best", type=int, default=10, help="Number of best configurations to print")
+    args = ap.parse_args()
+
+    seasons = sorted(args.season or [2023, 2024, 2025])
+    grid = parse_grid(args.grid or ["window=1,2,3,4,5"])
+    configs = configurations(grid, args.random, args.seed)
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    done = load_results(out)
+    finished = {r["key"] for r in done}
+    todo = [c for c in configs if config_key(c, seasons) not in finished]
+    print(f"{len(configs)} configurations, {len(configs) - len(todo)} already done, {len(todo)} to run on {args.workers} workers")
+
+    new_file = not out.exists()
+    with out.open("a", encoding="utf-8", newline="") as f, ProcessPoolExecutor(max_workers=args.workers) as ex:
+        w = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file:
+            w.writeheader()
+        pending = {ex.submit(run_config, c, seasons) for c in todo}
+        try:
+            while pending:
+                finished_now, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished_now:
+                    row = fut.result()
+                    w.writerow(row)
+                    f.flush()
+                    done.append(row)
+                    print(f"{row['total_points']:>8}  {row['strategy']}")
+        except KeyboardInterrupt:
+            for fut in pending:
+                fut.cancel()
+            print("Interrupted; finished configurations are saved, re-run to resume")
+            return 130
+
+    wanted = {config_key(c, seasons) for c in configs}
+    ranked = sorted((r for r in done if r["key"] in wanted), key=lambda r: float(r["total_points"]), reverse=True)
+    print(f"\nBest {min(args.best, len(ranked))} of {len(ranked)} ({', '.join(str(s) for s in seasons)}):")
+    for r in ranked[: args.best]:
+        print(f"{r['total_points']:>8}  {r['strategy']:<24} {r['points_by_season']}")
+    print("Results:", out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
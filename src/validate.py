@@ -0,0 +1,229 @@
+"""Validate CSV tables against the JSON schemas in schemas/.
+
+Each schema describes one CSV row as a JSON object (see `schemas/*.schema.json`).
+Schemas are compiled once into per-column check functions, and files are streamed
+row by row, so large tables are never loaded into memory.
+
+Supported schema keywords (the subset our schemas use):
+- required, properties
+- type: integer | number | string | null (or a list of those)
+- minLength, pattern, enum
+- minimum, maximum, exclusiveMinimum, exclusiveMaximum
+
+An empty CSV cell is treated as null. Literal placeholders such as `$undefined`
+are *not* null and fail numeric checks.
+
+Usage:
+  python -m src.validate --season 2025
+  python -m src.validate data/seasons/2025/raw/f1fantasytools_prices_drivers_long.csv
+  python -m src.validate --schema schemas/prices_drivers.schema.json my_snapshot.csv
+
+Exit code is 1 if any violation was found (so it can gate the refresh pipeline).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import fnmatch
+import json
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMAS = ROOT / "schemas"
+
+# File-name pattern -> schema file (first match wins).
+SCHEMA_FOR_FILE = [
+    ("prices_drivers.csv", "prices_drivers.schema.json"),
+    ("prices_constructors.csv", "prices_constructors.schema.json"),
+    ("f1fantasytools_points_*_long*.csv", "f1fantasytools_points_long.schema.json"),
+    ("f1fantasytools_prices_*_long*.csv", "f1fantasytools_prices_long.schema.json"),
+]
+
+Check = Callable[[str], "str | None"]
+
+
+@dataclass
+class Violation:
+    path: Path
+    row: int
+    column: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.row}:{self.column}: {self.message}"
+
+
+def _parse_integer(s: str) -> int | None:
+    try:
+        return int(s)
+    except ValueError:
+        return None
+
+
+def _parse_number(s: str) -> float | None:
+    try:
+        v = float(s)
+    except ValueError:
+        return None
+    return v if math.isfinite(v) else None
+
+
+def compile_property(spec: dict) -> Check:
+    """Compile one property schema into `check(cell) -> error message | None`."""
+    types = spec.get("type") or []
+    if isinstance(types, str):
+        types = [types]
+    nullable = "null" in types
+    types = [t for t in types if t != "null"]
+
+    parse: Callable[[str], object] | None = None
+    if "integer" in types:
+        parse = _parse_integer
+        type_name = "integer"
+    elif "number" in types:
+        parse = _parse_number
+        type_name = "number"
+
+    bounds: list[tuple[Callable[[float], bool], str]] = []
+    if "minimum" in spec:
+        lo = spec["minimum"]
+        bounds.append((lambda v, lo=lo: v >= lo, f">= {lo}"))
+    if "maximum" in spec:
+        hi = spec["maximum"]
+        bounds.append((lambda v, hi=hi: v <= hi, f"<= {hi}"))
+    if "exclusiveMinimum" in spec:
+        lo = spec["exclusiveMinimum"]
+        bounds.append((lambda v, lo=lo: v > lo, f"> {lo}"))
+    if "exclusiveMaximum" in spec:
+        hi = spec["exclusiveMaximum"]
+        bounds.append((lambda v, hi=hi: v < hi, f"< {hi}"))
+
+    min_length = spec.get("minLength")
+    pattern = re.compile(spec["pattern"]) if "pattern" in spec else None
+    enum = set(map(str, spec["enum"])) if "enum" in spec else None
+
+    def check(cell: str) -> str | None:
+        if cell == "":
+            return None if nullable else "missing value"
+        if parse is not None:
+            v = parse(cell)
+            if v is None:
+                return f"expected {type_name}, got {cell!r}"
+            for ok, desc in bounds:
+                if not ok(v):
+                    return f"{cell} is not {desc}"
+        if min_length is not None and len(cell) < min_length:
+            return f"shorter than {min_length}"
+        if pattern is not None and not pattern.search(cell):
+            return f"{cell!r} does not match {pattern.pattern}"
+        if enum is not None and cell not in enum:
+            return f"{cell!r} not in {sorted(enum)}"
+        return None
+
+    return check
+
+
+@dataclass
+class CompiledSchema:
+    title: str
+    required: list[str]
+    checks: dict[str, Check]
+
+
+def compile_schema(path: Path) -> CompiledSchema:
+    schema = json.loads(path.read_text(encoding="utf-8"))
+    props = schema.get("properties") or {}
+    return CompiledSchema(
+        title=schema.get("title") or path.name,
+        required=list(schema.get("required") or []),
+        checks={name: compile_property(spec) for name, spec in props.items()},
+    )
+
+
+_compiled: dict[Path, CompiledSchema] = {}
+
+
+def schema_for(path: Path) -> CompiledSchema | None:
+    for pattern, schema_name in SCHEMA_FOR_FILE:
+        if fnmatch.fnmatch(path.name, pattern):
+            schema_path = SCHEMAS / schema_name
+            if schema_path not in _compiled:
+                _compiled[schema_path] = compile_schema(schema_path)
+            return _compiled[schema_path]
+    return None
+
+
+def validate_file(path: Path, schema: CompiledSchema) -> Iterator[Violation]:
+    """Stream `path` and yield every violation (row numbers are file line numbers)."""
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            yield Violation(path, 1, "", "empty file (no header)")
+            return
+
+        for name in schema.required:
+            if name not in header:
+                yield Violation(path, 1, name, "required column missing from header")
+
+        plan = [(i, name, schema.checks[name]) for i, name in enumerate(header) if name in schema.checks]
+        width = len(header)
+        for row in reader:
+            if len(row) != width:
+                yield Violation(path, reader.line_num, "", f"expected {width} fields, got {len(row)}")
+                continue
+            for i, name, check in plan:
+                err = check(row[i])
+                if err is not None:
+                    yield Violation(path, reader.line_num, name, err)
+
+
+def season_files(season: int) -> list[Path]:
+    base = ROOT / "data" / "seasons" / str(season)
+    files = sorted((base / "raw").glob("*.csv")) + sorted((base / "rounds").glob("R*/*.csv"))
+    return [p for p in files if schema_for(p) is not None]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="*", type=Path, help="CSV files (schema picked by file name)")
+    ap.add_argument("--season", type=int, action="append", help="Validate a season's raw tables + round snapshots")
+    ap.add_argument("--schema", type=Path, help="Use this schema for every file given")
+    ap.add_argument("--quiet", action="store_true", help="Only print the summary")
+    args = ap.parse_args()
+
+    files: list[Path] = list(args.files)
+    for season in args.season or []:
+        files.extend(season_files(season))
+    if not files:
+        raise SystemExit("Nothing to validate (pass files or --season)")
+
+    forced = compile_schema(args.schema) if args.schema else None
+
+    total = 0
+    for path in files:
+        schema = forced or schema_for(path)
+        if schema is None:
+            print(f"{path}: no schema for this file (skipped)")
+            continue
+        n = 0
+        for v in validate_file(path, schema):
+            n += 1
+            if not args.quiet:
+                print(v)
+        if n:
+            print(f"{path}: {n} violation(s) against {schema.title}")
+        total += n
+
+    print(f"Validated {len(files)} file(s): {total} violation(s)")
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
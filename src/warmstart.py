@@ -0,0 +1,299 @@
+"""Warm-started re-optimization after small price / projection updates.
+
+A full solve enumerates every driver 5-set, sums prices/points and looks up the
+best affordable constructor pair for each. When one asset's price or projection
+changes mid-week most of that work is still valid, so the solver state is kept
+per (season, round):
+
+  data/seasons/<season>/derived/optimizer_state/R<round>.state
+
+It holds the inputs of the last solve (DRS boost included), the combination index,
+per-combination sums, the best score of every driver 5-set (`total`) and the
+incumbent team. The file is a JSON header followed by the raw, 8-byte aligned
+arrays (one read + np.frombuffer to load), and the last state saved by this
+process is kept in memory and reused while the file is unchanged, so a what-if is
+not dominated by (de)serialization.
+
+Re-solve after a delta:
+- only driver changed: recompute the combinations that contain the changed
+  drivers (about 5/N of them); every other `total` is still exact.
+- constructor or budget changed: rebuild the 45-pair constructor table, rescore
+  the previous incumbent as a lower bound, and skip driver sets whose upper bound
+  (driver points + best pair at any price) cannot beat it.
+- too many assets changed (e.g. a new projection window) or another boost: full solve.
+
+Skipped sets are marked stale together with the bound they were proven below,
+and are re-evaluated later only if the best score drops under that bound, so the
+result always equals a full solve (`python -m src.optimizer ... --verify`).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from . import optimizer as opt
+
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_VERSION = 3
+STATE_MAGIC = b"F1STATE\0"
+
+# Arrays persisted verbatim (the index fields are stored flat under these names).
+_ARRAYS = (
+    "is_driver", "price", "points", "d_combo", "d_price", "c_combo", "c_price",
+    "d_points", "c_points", "total", "stale", "members_ptr", "members_idx",
+)
+
+# path -> (file stat key, state): the last state this process saved or loaded.
+_memo: dict[Path, tuple[tuple[int, int, int], "SolverState"]] = {}
+
+# Above this share of changed assets a warm start is not worth it.
+MAX_CHANGED_SHARE = 0.25
+
+
+def state_path(season: int, rnd: int, root: Path = ROOT) -> Path:
+    return root / "data" / "seasons" / str(season) / "derived" / "optimizer_state" / f"R{rnd:02d}.state"
+
+
+@dataclass
+class SolverState:
+    budget: int
+    boost: tuple[float, ...]
+    ids: list[str]
+    abbr: list[str]
+    is_driver: np.ndarray
+    price: np.ndarray
+    points: np.ndarray
+    index: opt.ComboIndex
+    d_points: np.ndarray
+    c_points: np.ndarray
+    total: np.ndarray  # best score per driver set (-inf if infeasible or stale)
+    stale: np.ndarray  # bool: total not evaluated, proven < stale_bound
+    stale_bound: float
+    members_ptr: np.ndarray  # CSR: pool position -> driver sets containing it
+    members_idx: np.ndarray
+
+    @property
+    def pool(self) -> opt.Pool:
+        return opt.Pool(ids=self.ids, abbr=self.abbr, is_driver=self.is_driver, price=self.price, points=self.points)
+
+    # --- construction / persistence ---
+
+    @classmethod
+    def full_solve(cls, pool: opt.Pool, budget: int, boost: tuple[float, ...] = ()) -> "SolverState":
+        index = opt.ComboIndex.build(pool)
+        d_points = index.driver_points(pool.points, boost)
+        c_points = index.constructor_points(pool.points)
+        total = opt.score_driver_sets(index, d_points, c_points, budget)
+
+        flat = index.d_combo.ravel()
+        rows = np.repeat(np.arange(len(index.d_combo), dtype=np.int32), index.d_combo.shape[1])
+        order = np.argsort(flat, kind="stable")
+        counts = np.bincount(flat, minlength=len(pool.ids))
+        ptr = np.concatenate(([0], np.cumsum(counts)))
+        return cls(
+            budget=budget,
+            boost=tuple(boost),
+            ids=list(pool.ids),
+            abbr=list(pool.abbr),
+            is_driver=pool.is_driver.copy(),
+            price=pool.price.copy(),
+            points=pool.points.copy(),
+            index=index,
+            d_points=d_points,
+            c_points=c_points,
+            total=total,
+            stale=np.zeros(len(total), dtype=bool),
+            stale_bound=-np.inf,
+            members_ptr=ptr,
+            members_idx=rows[order],
+        )
+
+    def _array(self, name: str) -> np.ndarray:
+        return getattr(self.index, name) if name in ("d_combo", "d_price", "c_combo", "c_price") else getattr(self, name)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = [np.ascontiguousarray(self._array(name)) for name in _ARRAYS]
+        header = json.dumps(
+            {
+                "version": STATE_VERSION,
+                "byteorder": sys.byteorder,
+                "budget": self.budget,
+                "boost": list(self.boost),
+                "ids": self.ids,
+                "abbr": self.abbr,
+                "stale_bound": self.stale_bound if np.isfinite(self.stale_bound) else None,
+                "arrays": [{"name": n, "dtype": a.dtype.str, "shape": list(a.shape)} for n, a in zip(_ARRAYS, arrays)],
+            }
+        ).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(STATE_MAGIC + struct.pack("<I", len(header)) + header)
+                for a in arrays:
+                    f.write(b"\0" * (-f.tell() % 8))
+                    f.write(a.data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        _memo[path] = (_stat_key(path), self)
+
+    @classmethod
+    def load(cls, path: Path) -> "SolverState | None":
+        try:
+            key = _stat_key(path)
+        except OSError:
+            return None
+        hit = _memo.get(path)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        buf = bytearray(path.read_bytes())  # writable: resolve() updates the arrays in place
+        try:
+            if buf[: len(STATE_MAGIC)] != STATE_MAGIC:
+                return None
+            (n,) = struct.unpack_from("<I", buf, len(STATE_MAGIC))
+            pos = len(STATE_MAGIC) + 4
+            header = json.loads(buf[pos : pos + n].decode("utf-8"))
+            if header.get("version") != STATE_VERSION or header.get("byteorder") != sys.byteorder:
+                return None
+            pos += n
+            z = {}
+            for a in header["arrays"]:
+                pos += -pos % 8
+                dtype, shape = np.dtype(a["dtype"]), tuple(a["shape"])
+                count = int(np.prod(shape))
+                z[a["name"]] = np.frombuffer(buf, dtype=dtype, count=count, offset=pos).reshape(shape)
+                pos += count * dtype.itemsize
+        except (struct.error, ValueError, KeyError):
+            return None
+        bound = header["stale_bound"]
+        state = cls(
+            budget=int(header["budget"]),
+            boost=tuple(float(x) for x in header["boost"]),
+            ids=list(header["ids"]),
+            abbr=list(header["abbr"]),
+            is_driver=z["is_driver"],
+            price=z["price"],
+            points=z["points"],
+            index=opt.ComboIndex(d_combo=z["d_combo"], d_price=z["d_price"], c_combo=z["c_combo"], c_price=z["c_price"]),
+            d_points=z["d_points"],
+            c_points=z["c_points"],
+            total=z["total"],
+            stale=z["stale"],
+            stale_bound=-np.inf if bound is None else float(bound),
+            members_ptr=z["members_ptr"],
+            members_idx=z["members_idx"],
+        )
+        _memo[path] = (key, state)
+        return state
+
+    # --- solving ---
+
+    def teams(self, top: int = 1) -> list[opt.Team]:
+        """Best `top` teams from the cached scores (no full re-score)."""
+        rows = opt.top_rows(self.total, top)
+        if self.stale.any() and (len(rows) < top or self.total[rows[-1]] < self.stale_bound):
+            self._evaluate_stale()
+            rows = opt.top_rows(self.total, top)
+        return opt.teams_for_rows(self.pool, self.index, rows, self.total, self.c_points, self.budget, self.boost)
+
+    def _evaluate_stale(self) -> int:
+        rows = np.flatnonzero(self.stale)
+        self.total[rows] = opt.score_driver_sets(self.index, self.d_points, self.c_points, self.budget, rows)
+        self.stale[:] = False
+        self.stale_bound = -np.inf
+        return len(rows)
+
+    def best(self) -> tuple[int, float]:
+        """(driver set, score) of the incumbent; ties go to the lowest set index like a full solve."""
+        if not np.isfinite(self.total).any():
+            return -1, -np.inf
+        i = int(np.argmax(self.total))
+        return i, float(self.total[i])
+
+    def _rows_for(self, positions: np.ndarray) -> np.ndarray:
+        parts = [self.members_idx[self.members_ptr[p] : self.members_ptr[p + 1]] for p in positions]
+        return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def resolve(self, pool: opt.Pool, budget: int, boost: tuple[float, ...] = ()) -> tuple["SolverState", dict]:
+        """Bring the state up to date with `pool`/`budget`. Returns (state, stats)."""
+        if pool.ids != self.ids or not np.array_equal(pool.is_driver, self.is_driver):
+            return SolverState.full_solve(pool, budget, boost), {"mode": "full", "reason": "asset list changed"}
+        if tuple(boost) != self.boost:
+            return SolverState.full_solve(pool, budget, boost), {"mode": "full", "reason": "boost changed"}
+
+        changed = np.flatnonzero((pool.price != self.price) | (pool.points != self.points))
+        if len(changed) > MAX_CHANGED_SHARE * len(self.ids):
+            return SolverState.full_solve(pool, budget, boost), {"mode": "full", "reason": f"{len(changed)} assets changed"}
+
+        idx = self.index
+        d_changed = changed[self.is_driver[changed]]
+        c_changed = changed[~self.is_driver[changed]]
+
+        # Incremental sums: recompute (not add deltas) so floats match a full solve exactly.
+        touched = self._rows_for(d_changed)
+        if len(touched):
+            idx.d_price[touched] = pool.price[idx.d_combo[touched]].sum(axis=1)
+            self.d_points[touched] = opt.combo_points(pool.points, idx.d_combo[touched], self.boost)
+        if len(c_changed):
+            idx.c_price[:] = pool.price[idx.c_combo].sum(axis=1)
+            self.c_points[:] = pool.points[idx.c_combo].sum(axis=1)
+
+        prev_best, _ = self.best()
+        self.price, self.points = pool.price.copy(), pool.points.copy()
+        evaluated = 0
+
+        if len(c_changed) or budget != self.budget:
+            self.budget = budget
+            # Lower bound: the previous incumbent driver set under the new data.
+            lb = -np.inf
+            if prev_best >= 0:
+                lb = float(opt.score_driver_sets(idx, self.d_points, self.c_points, budget, np.array([prev_best]))[0])
+            ub = self.d_points + (self.c_points.max() if len(self.c_points) else 0.0)
+            cand = np.flatnonzero(ub >= lb)
+            self.total[:] = -np.inf
+            self.total[cand] = opt.score_driver_sets(idx, self.d_points, self.c_points, budget, cand)
+            self.stale[:] = True
+            self.stale[cand] = False
+            self.stale_bound = lb
+            evaluated = len(cand)
+        elif len(touched):
+            self.total[touched] = opt.score_driver_sets(idx, self.d_points, self.c_points, budget, touched)
+            self.stale[touched] = False
+            evaluated = len(touched)
+
+        # Stale sets are only guaranteed below stale_bound; re-check if the best fell under it.
+        _, best = self.best()
+        if self.stale.any() and best < self.stale_bound:
+            evaluated += self._evaluate_stale()
+
+        return self, {"mode": "warm", "changed": [self.ids[i] for i in changed], "evaluated": evaluated, "of": len(self.total)}
+
+
+def _stat_key(path: Path) -> tuple[int, int, int]:
+    st = path.stat()  # os.replace() gives every save a new inode
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def warm_solve(
+    season: int, rnd: int, pool: opt.Pool, budget: int, *, top: int = 1, boost: tuple[float, ...] = ()
+) -> tuple[list[opt.Team], dict]:
+    """Solve using (and then updating) the persisted state for (season, round)."""
+    path = state_path(season, rnd)
+    state = SolverState.load(path)
+    if state is None:
+        state, stats = SolverState.full_solve(pool, budget, boost), {"mode": "full", "reason": "no saved state"}
+    else:
+        state, stats = state.resolve(pool, budget, boost)
+    state.save(path)
+    return state.teams(top), stats
@@ -0,0 +1,376 @@
+"""Race-weekend watch mode: poll only around sessions, rebuild only what changed.
+
+`scripts/refresh.sh` refetches and rewrites everything whenever it runs. This is a
+long-running replacement for race weekends:
+
+Windows:
+- race start times come from data/seasons/<season>/raw/dim_round_dates.csv
+  (`raceDate` + `raceTime`, 14:00Z when the time is blank)
+- sources are polled from `--before-hours` before a race to `--after-hours` after it;
+  outside those windows the watcher sleeps until the next one opens
+- the schedule itself is re-checked once a day
+
+Polling (per source, adaptive):
+- starts at `--min-interval` seconds and doubles after every unchanged poll, up to
+  `--max-interval` (`--hot-max-interval` from 1h before a race to `--hot-hours` after,
+  when results and prices land); any change resets it, errors count as unchanged
+- f1fantasytools: conditional GET of the statistics API (ETag / Last-Modified), the
+  body streamed to a temp file and hashed; the four long tables are only rewritten
+  (from that file, no second download) when the hash differs
+- Ergast/Jolpica: a few tiny probes (season result / sprint counts with limit=1, plus
+  the latest race's results); `src.ergast_points` only runs when they differ
+
+Rebuilds: every downstream stage lists its input files; after a fetch, a stage runs
+only if the content hash of its inputs differs from its last successful run, in
+pipeline order (dims -> facts -> partitions -> validate). A failing stage stops the
+stages after it until its inputs change again; validate only reports.
+
+State (ETags, hashes, stage input digests) is kept in outputs/watch/state_<season>.json,
+so a restart does not refetch or rebuild anything that is current.
+
+Usage:
+  python -m src.watch --season 2025
+  python -m src.watch --season 2025 --once          # one poll of every source, then rebuild (cron-friendly)
+  python -m src.watch --season 2025 --min-interval 30 --hot-max-interval 120
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import requests
+
+from . import ergast_points
+from .dimensions import read_csv
+from .scrape_f1fantasytools import BASE_URL, scrape_api
+
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_DIR = ROOT / "outputs" / "watch"
+
+DEFAULT_RACE_TIME = "14:00:00Z"
+SCHEDULE_EVERY = timedelta(days=1)
+IDLE_SLEEP_MAX = 6 * 3600  # re-read the calendar at least this often while idle
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    module: str
+    inputs: tuple[str, ...]  # globs relative to data/seasons/<season>/
+    gate: bool = True  # a failure stops the stages after it
+
+
+STAGES = (
+    Stage("dims", "src.dimensions", ("raw/f1fantasytools_*_long.csv",)),
+    Stage("facts", "src.fact_table", ("raw/f1fantasytools_*_long.csv", "raw/f1_official_*.csv", "raw/dim_*.csv")),
+    Stage("partitions", "src.partitions", ("raw/f1fantasytools_*_long.csv", "raw/f1_official_*.csv", "raw/dim_round_dates.csv", "derived/fact_asset_round.csv")),
+    # Last, as in scripts/refresh.sh: violations are reported, nothing waits on them.
+    Stage("validate", "src.validate", ("raw/f1fantasytools_*_long.csv", "raw/dim_*.csv", "raw/f1_official_*.csv"), gate=False),
+)
+
+
+def log(msg: str) -> None:
+    print(f"[{datetime.now(timezone.utc):%Y-%m-%d %H:%M:%S}Z] {msg}", flush=True)
+
+
+# --- schedule ----------------------------------------------------------------------
+
+
+def race_starts(season: int) -> list[tuple[int, datetime]]:
+    """(round, race start UTC) from dim_round_dates.csv, by start time."""
+    out = []
+    for r in read_csv(ROOT / "data" / "seasons" / str(season) / "raw" / "dim_round_dates.csv"):
+        if not (r.get("raceDate") or "").strip():
+            continue
+        t = (r.get("raceTime") or "").strip() or DEFAULT_RACE_TIME
+        start = datetime.fromisoformat(f"{r['raceDate'].strip()}T{t.rstrip('Z')}").replace(tzinfo=timezone.utc)
+        out.append((int(r["round"]), start))
+    return sorted(out, key=lambda x: x[1])
+
+
+@dataclass
+class Window:
+    round: int
+    race: datetime
+    start: datetime
+    end: datetime
+
+    def hot(self, now: datetime, hot_hours: float) -> bool:
+        return self.race - timedelta(hours=1) <= now <= self.race + timedelta(hours=hot_hours)
+
+
+def windows(races: list[tuple[int, datetime]], before_hours: float, after_hours: float) -> list[Window]:
+    return [Window(rnd, t, t - timedelta(hours=before_hours), t + timedelta(hours=after_hours)) for rnd, t in races]
+
+
+def current_window(ws: list[Window], now: datetime) -> Window | None:
+    return next((w for w in ws if w.start <= now <= w.end), None)
+
+
+def next_window(ws: list[Window], now: datetime) -> Window | None:
+    return next((w for w in ws if w.start > now), None)
+
+
+# --- state -------------------------------------------------------------------------
+
+
+def load_state(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def save_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class Backoff:
+    """Poll interval that doubles while nothing changes and resets on a change."""
+
+    def __init__(self, lo: float, hi: float):
+        self.lo, self.hi = lo, hi
+        self.interval = lo
+
+    def update(self, changed: bool) -> None:
+        self.interval = self.lo if changed else min(self.interval * 2, self.hi)
+
+    def delay(self, cap: float) -> float:
+        # +-10% jitter so several watchers do not poll in lockstep.
+        return min(self.interval, cap) * random.uniform(0.9, 1.1)
+
+
+# --- sources -----------------------------------------------------------------------
+
+
+def poll_fantasy(season: int, base: str, session: requests.Session, state: dict) -> bool:
+    """True if the f1fantasytools tables were rewritten."""
+    st = state.setdefault("fantasy", {})
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if st.get("etag"):
+        headers["If-None-Match"] = st["etag"]
+    if st.get("last_modified"):
+        headers["If-Modified-Since"] = st["last_modified"]
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_DIR / f"statistics_{season}.json.tmp"
+    h = hashlib.sha256()
+    try:
+        with session.get(f"{base}/api/statistics/{season}", headers=headers, timeout=60, stream=True) as r:
+            if r.status_code == 304:
+                return False
+            r.raise_for_status()
+            with tmp.open("wb") as f:
+                for chunk in r.iter_content(chunk_size=1 << 16):
+                    h.update(chunk)
+                    f.write(chunk)
+            validators = {"etag": r.headers.get("ETag") or "", "last_modified": r.headers.get("Last-Modified") or ""}
+        digest = h.hexdigest()
+        if digest == st.get("sha256"):
+            st.update(validators)
+            return False
+        outdir, records = scrape_api(str(tmp), season, session)
+        # Only now: validators saved before a failed scrape would turn every retry into a 304.
+        st.update(validators, sha256=digest)
+        log(f"fantasy: new data, rewrote tables in {outdir.relative_to(ROOT)} ({records} records)")
+        return True
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def results_key(season: int) -> str:
+    """Cheap fingerprint of the season's official results (a few small requests)."""
+    parts = []
+    for path in (f"/f1/{season}/results.json", f"/f1/{season}/sprint.json"):
+        data = ergast_points._get_json(path, params={"limit": 1})
+        parts.append(str((data.get("MRData") or {}).get("total", "0")))
+    last = ergast_points._get_json(f"/f1/{season}/last/results.json", params={"limit": 100})
+    races = ((last.get("MRData") or {}).get("RaceTable") or {}).get("Races") or []
+    parts.append(hashlib.sha256(json.dumps(races, sort_keys=True).encode("utf-8")).hexdigest()[:16])
+    return "/".join(parts)
+
+
+def poll_results(season: int, state: dict) -> bool:
+    """True if the official points tables were refetched."""
+    st = state.setdefault("results", {})
+    key = results_key(season)
+    if key == st.get("key"):
+        return False
+    log(f"results: changed ({st.get('key') or 'first run'} -> {key}), refetching official points")
+    if not run_module("src.ergast_points", season):
+        raise RuntimeError("src.ergast_points failed")
+    st["key"] = key
+    return True
+
+
+def poll_schedule(season: int, state: dict, now: datetime) -> bool:
+    """Once a day: refetch dim_round_dates.csv if the calendar changed."""
+    st = state.setdefault("schedule", {})
+    checked = st.get("checked_at")
+    if checked and now - datetime.fromisoformat(checked) < SCHEDULE_EVERY:
+        return False
+    data = ergast_points._get_json(f"/f1/{season}.json", params={"limit": 1000})
+    races = ((data.get("MRData") or {}).get("RaceTable") or {}).get("Races") or []
+    digest = hashlib.sha256(json.dumps(races, sort_keys=True).encode("utf-8")).hexdigest()
+    st["checked_at"] = now.isoformat()
+    raw = ROOT / "data" / "seasons" / str(season) / "raw" / "dim_round_dates.csv"
+    if digest == st.get("sha256") and raw.exists():
+        return False
+    log("schedule: changed, refetching dim_round_dates.csv")
+    if not run_module("src.ergast_schedule", season):
+        raise RuntimeError("src.ergast_schedule failed")
+    st["sha256"] = digest
+    return True
+
+
+# --- rebuilds ----------------------------------------------------------------------
+
+
+def run_module(module: str, season: int) -> bool:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-m", module, "--season", str(season)], cwd=ROOT)
+    ok = proc.returncode == 0
+    log(f"{module}: {'ok' if ok else f'failed (exit {proc.returncode})'} in {time.perf_counter() - t0:.1f}s")
+    return ok
+
+
+def inputs_digest(season_dir: Path, patterns: tuple[str, ...]) -> str:
+    h = hashlib.sha256()
+    for path in sorted({p for pattern in patterns for p in season_dir.glob(pattern)}):
+        h.update(str(path.relative_to(season_dir)).encode("utf-8") + b"\0")
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def rebuild(season: int, state: dict) -> list[str]:
+    """Run the stages whose inputs changed since their last successful run."""
+    season_dir = ROOT / "data" / "seasons" / str(season)
+    done = state.setdefault("stages", {})
+    ran = []
+    for stage in STAGES:
+        digest = inputs_digest(season_dir, stage.inputs)
+        if done.get(stage.name) == digest:
+            continue
+        if not run_module(stage.module, season):
+            if stage.gate:
+                log(f"stopping after {stage.name}; later stages wait for new inputs")
+                break
+            continue
+        done[stage.name] = digest
+        ran.append(stage.name)
+    return ran
+
+
+# --- main loop ---------------------------------------------------------------------
+
+
+def poll_once(season: int, base: str, session: requests.Session, state: dict, names: list[str]) -> bool:
+    changed = False
+    for name in names:
+        try:
+            if name == "fantasy":
+                hit = poll_fantasy(season, base, session, state)
+            else:
+                hit = poll_results(season, state)
+        except (requests.RequestException, RuntimeError, ValueError) as e:
+            log(f"{name}: poll failed: {e}")
+            continue
+        if not hit:
+            log(f"{name}: unchanged")
+        changed |= hit
+    return changed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--season", type=int, default=2025)
+    ap.add_argument("--once", action="store_true", help="Poll every source once, rebuild, exit")
+    ap.add_argument("--base-url", default=BASE_URL, help="f1fantasytools host (default: %(default)s)")
+    ap.add_argument("--ergast-base-url", action="append", help="Ergast-compatible base URL (repeatable, tried in order)")
+    ap.add_argument("--before-hours", type=float, default=72, help="Start polling this long before a race")
+    ap.add_argument("--after-hours", type=float, default=48, help="Keep polling this long after a race")
+    ap.add_argument("--hot-hours", type=float, default=8, help="After a race, cap the interval at --hot-max-interval this long")
+    ap.add_argument("--min-interval", type=float, default=60, help="Seconds between polls right after a change")
+    ap.add_argument("--max-interval", type=float, default=1800, help="Longest backoff inside a window (seconds)")
+    ap.add_argument("--hot-max-interval", type=float, default=300, help="Longest backoff around a race (seconds)")
+    args = ap.parse_args()
+
+    if args.ergast_base_url:
+        ergast_points.BASE_URLS[:] = args.ergast_base_url
+        os.environ["ERGAST_BASE_URLS"] = ",".join(args.ergast_base_url)  # for the fetch subprocesses
+    base = args.base_url.rstrip("/")
+    state_path = STATE_DIR / f"state_{args.season}.json"
+    state = load_state(state_path)
+    session = requests.Session()
+    sources = ["fantasy", "results"]
+
+    def cycle(names: list[str]) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            poll_schedule(args.season, state, now)
+        except (requests.RequestException, RuntimeError, ValueError) as e:
+            log(f"schedule: check failed: {e}")
+        changed = poll_once(args.season, base, session, state, names)
+        ran = rebuild(args.season, state) if changed or not state.get("stages") else []
+        if ran:
+            log(f"rebuilt: {', '.join(ran)}")
+        save_state(state_path, state)
+        return changed
+
+    if args.once:
+        cycle(sources)
+        return 0
+
+    backoff = {s: Backoff(args.min_interval, args.max_interval) for s in sources}
+    due = {s: 0.0 for s in sources}
+    log(f"watching season {args.season} (state: {state_path.relative_to(ROOT)})")
+    try:
+        while True:
+            now = datetime.now(timezone.utc)
+            ws = windows(race_starts(args.season), args.before_hours, args.after_hours)
+            win = current_window(ws, now)
+            if win is None:
+                nxt = next_window(ws, now)
+                wait = IDLE_SLEEP_MAX if nxt is None else min((nxt.start - now).total_seconds(), IDLE_SLEEP_MAX)
+                log(f"idle; next window: {f'round {nxt.round} at {nxt.start:%Y-%m-%d %H:%MZ}' if nxt else 'none'}")
+                for s in sources:
+                    backoff[s].interval = args.min_interval
+                    due[s] = 0.0
+                time.sleep(max(wait, 1.0))
+                # Keep the calendar fresh while idle.
+                try:
+                    poll_schedule(args.season, state, datetime.now(timezone.utc))
+                    save_state(state_path, state)
+                except (requests.RequestException, RuntimeError, ValueError) as e:
+                    log(f"schedule: check failed: {e}")
+                continue
+
+            mono = time.monotonic()
+            todo = [s for s in sources if due[s] <= mono]
+            if todo:
+                for s in todo:
+                    changed = cycle([s])
+                    backoff[s].update(changed)
+                    cap = args.hot_max_interval if win.hot(datetime.now(timezone.utc), args.hot_hours) else args.max_interval
+                    due[s] = time.monotonic() + backoff[s].delay(cap)
+                    log(f"{s}: next poll in {due[s] - time.monotonic():.0f}s (round {win.round} window)")
+            left = (win.end - datetime.now(timezone.utc)).total_seconds()
+            time.sleep(max(1.0, min(min(due.values()) - time.monotonic(), left)))
+    except KeyboardInterrupt:
+        save_state(state_path, state)
+        log("stopped")
+        return 130
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+"""The anytime planner must honour the transfer cap and report scores without the soft wall."""
+
+from __future__ import annotations
+
+import pytest
+
+from src import anytime
+from src import optimizer as opt
+
+
+CURRENT = {"drivers": ["COL", "STR", "HUL", "PIA", "HAD"], "constructors": ["MCL", "WIL"]}
+
+
+@pytest.fixture(scope="module")
+def data() -> opt.SeasonData:
+    return opt.load_season(2025)
+
+
+def problem(data, max_transfers: int, free_transfers: int = 2) -> anytime.PlanProblem:
+    return anytime.PlanProblem.build(
+        data,
+        10,
+        horizon=3,
+        constraints=opt.Constraints(**CURRENT, max_transfers=max_transfers),
+        free_transfers=free_transfers,
+    )
+
+
+def test_no_feasible_plan_raises(data):
+    # The current team is over budget, so keeping it (0 transfers) is impossible.
+    with pytest.raises(ValueError, match="at most 0 transfer"):
+        anytime.solve_anytime(problem(data, 0), time_budget_ms=300)
+
+
+def test_plan_respects_cap_and_reports_net_points(data):
+    p = problem(data, 1, free_transfers=0)
+    result = anytime.solve_anytime(p, time_budget_ms=300)
+    s = anytime.Search(p, 0)
+    assert s.over_cap(result.plan) == []
+    rows = anytime.plan_rows(p, result)
+    assert all(r["transfers"] <= 1 for r in rows)
+    points = sum(float(r["expected_points"]) for r in rows)
+    penalty = sum(float(r["penalty_points"]) for r in rows)
+    assert result.score == pytest.approx(points - penalty, abs=0.05)
+    assert result.gap == pytest.approx(max(result.bound - result.score, 0.0))
@@ -0,0 +1,49 @@
+"""Empty year files are skipped when combining, in full rebuilds and appends."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+_spec = importlib.util.spec_from_file_location("combine_mycsv_years", ROOT / "scripts" / "combine_mycsv_years.py")
+combine = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(combine)
+
+
+@pytest.fixture
+def table(tmp_path) -> Path:
+    d = tmp_path / "dim_x"
+    d.mkdir()
+    return d
+
+
+@pytest.mark.parametrize("empty_year", [2023, 2024])
+def test_rebuild_skips_empty_inputs(table, empty_year):
+    for year in (2023, 2024, 2025):
+        text = "" if year == empty_year else f"id,season\na,{year}\n"
+        (table / f"dim_x{year}.csv").write_text(text, encoding="utf-8")
+    action, _ = combine.combine_table(table, None, dry_run=False, force=False)
+    assert action == "rebuild"
+    want = ["id,season"] + [f"a,{y}" for y in (2023, 2024, 2025) if y != empty_year]
+    assert (table / "dim_x.csv").read_text(encoding="utf-8").splitlines() == want
+
+
+def test_append_skips_empty_inputs(table):
+    (table / "dim_x2023.csv").write_text("", encoding="utf-8")
+    _, entry = combine.combine_table(table, None, dry_run=False, force=False)
+    assert (table / "dim_x.csv").read_text(encoding="utf-8") == ""
+
+    # First non-empty file arrives later: the headerless output is rebuilt, not appended to.
+    (table / "dim_x2024.csv").write_text("id,season\na,2024\n", encoding="utf-8")
+    action, entry = combine.combine_table(table, entry, dry_run=False, force=False)
+    assert action == "rebuild"
+
+    (table / "dim_x2025.csv").write_text("", encoding="utf-8")
+    (table / "dim_x2026.csv").write_text("id,season\na,2026\n", encoding="utf-8")
+    action, _ = combine.combine_table(table, entry, dry_run=False, force=False)
+    assert action == "append"
+    assert (table / "dim_x.csv").read_text(encoding="utf-8").splitlines() == ["id,season", "a,2024", "a,2026"]
@@ -0,0 +1,59 @@
+"""The binary table cache must round-trip a CSV exactly and reject damaged files."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+
+import pytest
+
+from src.records import CACHE_SUFFIX, Table
+
+
+CSV = "season,round,id,price,note\r\n2025,1,RED_VER,30.5,\"a, b\"\r\n2025,2,MCL_NOR,,é\r\n2025,3,FER_LEC,$undefined\r\n"
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("F1_TABLE_CACHE", raising=False)
+    path = tmp_path / "t.csv"
+    path.write_bytes(CSV.encode("utf-8"))
+    return path
+
+
+def rows(table: Table) -> list[dict]:
+    return [dict(r) for r in table]
+
+
+def test_cache_round_trip(csv_path):
+    parsed = Table.read_csv(csv_path, cache=False)
+    Table.read_csv(csv_path)  # writes the cache
+    cache = csv_path.with_name(csv_path.name + CACHE_SUFFIX)
+    assert cache.exists()
+    assert not list(csv_path.parent.glob("*.tmp"))
+    mapped = Table.read_csv(csv_path)
+    assert mapped._map is not None
+    assert rows(mapped) == rows(parsed)
+    assert list(mapped.numeric("round")) == [1.0, 2.0, 3.0]
+    assert mapped.numeric("price") is None  # "$undefined"
+    codes, values = mapped.codes("id")
+    assert [values[c] for c in codes] == ["RED_VER", "MCL_NOR", "FER_LEC"]
+
+
+def test_numeric_blank_is_nan(csv_path):
+    csv_path.write_bytes(b"a,b\n1,\n2,3.5\n")
+    Table.read_csv(csv_path)
+    b = list(Table.read_csv(csv_path).numeric("b"))
+    assert math.isnan(b[0]) and b[1] == 3.5
+
+
+@pytest.mark.parametrize("damage", ["truncate", "extend"])
+def test_damaged_cache_is_rebuilt(csv_path, damage):
+    Table.read_csv(csv_path)
+    cache = csv_path.with_name(csv_path.name + CACHE_SUFFIX)
+    data = cache.read_bytes()
+    cache.write_bytes(data[:-3] if damage == "truncate" else data + b"\0" * 8)
+    stat = csv_path.stat()
+    assert Table.load_cache(cache, stat.st_size, hashlib.sha256(csv_path.read_bytes()).hexdigest()) is None
+    assert rows(Table.read_csv(csv_path)) == rows(Table.read_csv(csv_path, cache=False))
+    assert cache.read_bytes() == data
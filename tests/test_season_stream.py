@@ -0,0 +1,73 @@
+"""Chunking must not change what the incremental season scanner sees."""
+
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+
+from src.season_stream import iter_flight_text, scan_season
+
+
+def payload() -> dict:
+    races = {}
+    for rnd in (1, 2, 10):
+        races[str(rnd)] = {
+            "drivers": [
+                {"abbreviation": a, "points": p, "price": 20.5 + rnd, "note": 'say "hi"\\n é \U0001F3CE'}
+                for a, p in (("VER", 25), ("NOR", -3.5), ("LEC", None))
+            ],
+            "constructors": [{"abbreviation": c, "points": rnd * 2, "flags": [True, False]} for c in ("MCL", "FER")],
+            "other": {"drivers": [{"ignored": 1}]},
+        }
+    return {"seasonResult": {"season": 2025, "raceResults": races}}
+
+
+def expected() -> list[tuple]:
+    races = payload()["seasonResult"]["raceResults"]
+    return [(kind, int(rnd), rec) for rnd, race in races.items() for kind in ("drivers", "constructors") for rec in race[kind]]
+
+
+def pieces(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def scan(chunks) -> tuple[list[tuple], int | None]:
+    got = []
+    scanner = scan_season(chunks, lambda kind, rnd, rec: got.append((kind, rnd, rec)))
+    return got, scanner.season
+
+
+BODY = 'prefix {"x": 1} ' + json.dumps(payload()) + " trailing"
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 14, 15, 16, 64, len(BODY)])
+def test_fixed_chunk_sizes(size):
+    assert scan(pieces(BODY, size)) == (expected(), 2025)
+
+
+def test_random_chunk_sizes():
+    rng = random.Random(0)
+    for _ in range(50):
+        chunks, pos = [], 0
+        while pos < len(BODY):
+            n = rng.randint(1, 40)
+            chunks.append(BODY[pos : pos + n])
+            pos += n
+        assert scan(chunks) == (expected(), 2025)
+
+
+def test_flight_html_chunks():
+    blob = json.dumps(payload())
+    half = len(blob) // 2
+    html = "".join(
+        f"<script>self.__next_f.push([1,{json.dumps(part)}])</script>" for part in ("3:" + blob[:half], blob[half:])
+    )
+    for size in (1, 3, 7, 50):
+        assert scan(iter_flight_text(pieces(html, size))) == (expected(), 2025)
+
+
+def test_missing_marker():
+    with pytest.raises(RuntimeError):
+        scan(pieces('{"nothing": 1}', 1))
@@ -0,0 +1,78 @@
+"""Warm-started re-solves must match a full solve after every small delta."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src import optimizer as opt
+from src import warmstart
+
+
+def make_pool(rng: np.random.Generator, n_drivers: int = 14, n_constructors: int = 7) -> opt.Pool:
+    n = n_drivers + n_constructors
+    return opt.Pool(
+        ids=[f"D{i:02d}" for i in range(n_drivers)] + [f"C{i:02d}" for i in range(n_constructors)],
+        abbr=[f"D{i:02d}" for i in range(n_drivers)] + [f"C{i:02d}" for i in range(n_constructors)],
+        is_driver=np.arange(n) < n_drivers,
+        price=rng.integers(50, 300, n).astype(np.int32),
+        points=rng.normal(15.0, 8.0, n),
+    )
+
+
+def key(teams: list[opt.Team]) -> list[tuple]:
+    return [(t.drivers, t.constructors, t.price, t.points, t.boost) for t in teams]
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(warmstart, "state_path", lambda season, rnd: tmp_path / f"R{rnd:02d}.state")
+    monkeypatch.setattr(warmstart, "_memo", {})
+    return tmp_path
+
+
+@pytest.mark.parametrize("boost", sorted(opt.BOOSTS))
+def test_random_single_asset_deltas(state_dir, boost):
+    rng = np.random.default_rng(sorted(opt.BOOSTS).index(boost))
+    pool = make_pool(rng)
+    budget = 1000
+    b = opt.BOOSTS[boost]
+    modes = set()
+    for step in range(60):
+        i = int(rng.integers(len(pool.ids)))
+        if rng.random() < 0.5:
+            pool.price[i] = max(1, pool.price[i] + int(rng.integers(-30, 31)))
+        else:
+            pool.points[i] += rng.normal(0.0, 5.0)
+        if step % 10 == 9:
+            budget += int(rng.integers(-40, 41))
+        if step % 7 == 6:
+            warmstart._memo.clear()  # next load comes from disk, as in a fresh process
+        teams, stats = warmstart.warm_solve(2025, 1, pool, budget, top=3, boost=b)
+        modes.add(stats["mode"])
+        assert key(teams) == key(opt.solve(pool, budget, top=3, boost=b)), (step, stats)
+    assert "warm" in modes
+
+
+def test_boost_change_falls_back_to_full_solve(state_dir):
+    pool = make_pool(np.random.default_rng(7))
+    warmstart.warm_solve(2025, 1, pool, 1000, boost=opt.BOOSTS["2x"])
+    teams, stats = warmstart.warm_solve(2025, 1, pool, 1000, boost=opt.BOOSTS["3x"])
+    assert stats == {"mode": "full", "reason": "boost changed"}
+    assert key(teams) == key(opt.solve(pool, 1000, boost=opt.BOOSTS["3x"]))
+    assert len(teams[0].boost) == 2
+
+
+def test_state_round_trip(state_dir):
+    pool = make_pool(np.random.default_rng(3))
+    state = warmstart.SolverState.full_solve(pool, 1000, opt.BOOSTS["2x"])
+    path = state_dir / "R01.state"
+    state.save(path)
+    warmstart._memo.clear()
+    loaded = warmstart.SolverState.load(path)
+    assert loaded is not None and loaded.boost == state.boost and loaded.ids == state.ids
+    for name in warmstart._ARRAYS:
+        assert np.array_equal(loaded._array(name), state._array(name))
+    path.write_bytes(b"not a state file")
+    warmstart._memo.clear()
+    assert warmstart.SolverState.load(path) is None